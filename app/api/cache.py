@@ -0,0 +1,119 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+import orjson
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele servimos gzip
+    brotli = None
+
+
+class CachedResponse:
+    """Corpo já serializado (e comprimido) de uma resposta, pronto para enviar."""
+
+    __slots__ = ("raw", "gzip", "br", "size")
+
+    def __init__(self, payload):
+        self.raw = orjson.dumps(payload)
+        self.gzip = gzip.compress(self.raw, compresslevel=6)
+        self.br = brotli.compress(self.raw, quality=5) if brotli else None
+        self.size = len(self.raw) + len(self.gzip) + (len(self.br) if self.br else 0)
+
+    def encode_for(self, accept_encoding):
+        """Escolhe a melhor codificação aceita pelo cliente: (body, content-encoding)."""
+        accept_encoding = (accept_encoding or "").lower()
+        if self.br is not None and "br" in accept_encoding:
+            return self.br, "br"
+        if "gzip" in accept_encoding:
+            return self.gzip, "gzip"
+        return self.raw, None
+
+
+class ResponseCache:
+    """
+    Cache de respostas serializadas por geração do snapshot do DataManager.
+
+    Cada payload é serializado/comprimido uma única vez por geração. Entradas
+    "fixas" (ranking, mapas, faixas de estrelas) não são despejadas; as demais
+    (perfis de jogadores) saem por LRU quando o total passa de `max_bytes`.
+    Uma geração nova descarta tudo.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.generation = None
+        self._pinned = {}
+        self._lru = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, generation=None):
+        with self._lock:
+            self._reset(generation)
+
+    def _reset(self, generation):
+        self.generation = generation
+        self._pinned = {}
+        self._lru = OrderedDict()
+        self._bytes = 0
+
+    def get_or_build(self, generation, key, build_payload, pinned=False):
+        """
+        Retorna a resposta em cache para (generation, key) ou serializa o
+        payload de `build_payload()` e guarda.
+        """
+        with self._lock:
+            if generation != self.generation:
+                self._reset(generation)
+
+            entry = self._pinned.get(key)
+            if entry is None:
+                entry = self._lru.get(key)
+                if entry is not None:
+                    self._lru.move_to_end(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+
+        # Serializa fora do lock; em caso de corrida, o primeiro a gravar vence
+        entry = CachedResponse(build_payload())
+
+        with self._lock:
+            self.misses += 1
+            if generation != self.generation:
+                # Snapshot trocou durante a serialização: entrega sem guardar
+                return entry
+
+            existing = self._pinned.get(key) or self._lru.get(key)
+            if existing is not None:
+                return existing
+
+            if pinned:
+                self._pinned[key] = entry
+            else:
+                self._lru[key] = entry
+            self._bytes += entry.size
+            self._evict()
+            return entry
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._lru:
+            _, old = self._lru.popitem(last=False)
+            self._bytes -= old.size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "entries": len(self._pinned) + len(self._lru),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,255 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote, urlsplit
+
+import requests
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from app.config import AppConfig
+from app.data.database import DB_FOLDER
+
+try:
+    from PIL import Image
+except ImportError:  # Está no requirements.txt; sem ele o enable_proxy avisa e servimos a imagem original
+    Image = None
+
+# Proxy das imagens externas (avatares do ScoreSaber, capas do BeatSaver):
+# cada imagem é baixada uma vez, reduzida para o tamanho de miniatura pedido
+# e guardada em disco (storage/images), com despejo LRU quando o total passa
+# do limite. As views apontam para /api/img em vez do CDN.
+
+IMAGES_FOLDER = os.path.join(os.getcwd(), DB_FOLDER, "images")
+
+# Tamanhos de miniatura servidos (lado do quadrado, em px)
+THUMBNAIL_SIZES = (64, 128, 256)
+
+# Imagens maiores que isso não são baixadas
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+
+# Depois disso a imagem é baixada de novo (avatares mudam na mesma URL)
+MAX_AGE_SECONDS = 7 * 24 * 3600
+
+IMAGE_CACHE_CONTROL = f"public, max-age={MAX_AGE_SECONDS}, stale-while-revalidate=86400"
+
+_MAGIC_TYPES = (
+    (b"\x89PNG", "image/png"),
+    (b"\xff\xd8", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"RIFF", "image/webp")
+)
+
+router = APIRouter(prefix="/api")
+
+
+def _content_type(data):
+    for magic, content_type in _MAGIC_TYPES:
+        if data.startswith(magic):
+            return content_type
+    return None
+
+
+def is_allowed(url):
+    """Só imagens https dos CDNs conhecidos (AppConfig.IMAGE_PROXY_HOSTS)."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    return parts.scheme == "https" and (parts.hostname or "") in AppConfig.IMAGE_PROXY_HOSTS
+
+
+def thumbnail_size(display_size):
+    """Menor tamanho servido que cobre `display_size` em telas 2x."""
+    return next((s for s in THUMBNAIL_SIZES if s >= display_size * 2), THUMBNAIL_SIZES[-1])
+
+
+def make_thumbnail(data, size):
+    """Recorte quadrado central reduzido para `size` px, em WebP. Sem Pillow, devolve o original."""
+    if Image is None:
+        return data, _content_type(data)
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        side = min(img.size)
+        left, top = (img.width - side) // 2, (img.height - side) // 2
+        img = img.crop((left, top, left + side, top + side))
+        if side > size:
+            img = img.resize((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=80)
+    return out.getvalue(), "image/webp"
+
+
+class ImageCache:
+    """
+    Cache em disco de miniaturas, por hash da URL e tamanho, limitado a
+    `max_bytes` (LRU). Pedidos simultâneos da mesma imagem baixam uma só vez.
+    """
+
+    def __init__(self, folder=IMAGES_FOLDER, max_bytes=None):
+        self.folder = folder
+        self.max_bytes = max_bytes if max_bytes is not None else AppConfig.IMAGE_CACHE_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entries = None # nome do arquivo -> tamanho, do menos para o mais usado
+        self._bytes = 0
+        self._inflight = {} # chave -> Lock do download em andamento
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self):
+        # Arquivos já em disco (de execuções anteriores), do mais antigo para o mais novo
+        self._entries = OrderedDict()
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            names = []
+        stats = []
+        for name in names:
+            if name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            stats.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(stats):
+            self._entries[name] = size
+            self._bytes += size
+
+    @staticmethod
+    def key(url, size):
+        return f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}_{size}"
+
+    @staticmethod
+    def etag(data):
+        # Do conteúdo: muda quando a imagem é baixada de novo com outros bytes
+        return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+    def _path(self, name):
+        return os.path.join(self.folder, name)
+
+    def _lookup(self, key):
+        """(bytes, content-type) em cache e ainda válidos, ou None."""
+        with self._lock:
+            if self._entries is None:
+                self._load_index()
+            name = next((n for n in (f"{key}.webp", f"{key}.orig") if n in self._entries), None)
+            if name is None:
+                return None
+            self._entries.move_to_end(name)
+        path = self._path(name)
+        try:
+            if time.time() - os.path.getmtime(path) > MAX_AGE_SECONDS:
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        return data, ("image/webp" if name.endswith(".webp") else _content_type(data))
+
+    def _store(self, key, data, content_type):
+        name = f"{key}.webp" if content_type == "image/webp" and Image is not None else f"{key}.orig"
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = self._path(f"{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(name))
+
+        with self._lock:
+            self._bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            # Despeja as menos usadas até caber no limite
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_name, old_size = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                try:
+                    os.remove(self._path(old_name))
+                except OSError:
+                    pass
+
+    def get(self, url, size):
+        """(bytes, content-type) da miniatura, baixando e reduzindo na primeira vez."""
+        key = self.key(url, size)
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        with self._lock:
+            inflight = self._inflight.setdefault(key, threading.Lock())
+        with inflight:
+            # Outro pedido pode ter baixado enquanto esperávamos
+            cached = self._lookup(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            try:
+                self.misses += 1
+                data = self._download(url)
+                thumbnail, content_type = make_thumbnail(data, size)
+                if content_type is None:
+                    raise ValueError("Formato de imagem desconhecido.")
+                self._store(key, thumbnail, content_type)
+                return thumbnail, content_type
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    @staticmethod
+    def _download(url):
+        # Sem seguir redirecionamentos: o destino poderia estar fora da lista de hosts
+        with requests.get(url, timeout=5, stream=True, allow_redirects=False) as response:
+            response.raise_for_status()
+            if response.status_code != 200:
+                raise ValueError(f"Resposta inesperada ({response.status_code}).")
+            data = response.raw.read(MAX_SOURCE_BYTES + 1, decode_content=True)
+        if len(data) > MAX_SOURCE_BYTES:
+            raise ValueError("Imagem grande demais.")
+        return data
+
+
+image_cache = ImageCache()
+
+# Ligado pelo main.py quando a UI é servida pelo FastAPI (onde /api/img existe)
+proxy_enabled = False
+
+
+def enable_proxy():
+    """Passa a servir as imagens externas por /api/img; avisa se o Pillow não está instalado."""
+    global proxy_enabled
+    proxy_enabled = True
+    if Image is None:
+        print("Imagens: Pillow não está instalado; o /api/img vai servir as imagens originais, sem miniaturas (pip install Pillow).")
+
+
+def thumbnail_url(url, display_size):
+    """
+    URL local da miniatura para uma imagem externa exibida com `display_size` px.
+    Sem proxy (modo desktop) ou fora da lista de hosts, devolve a URL original.
+    """
+    if not url or not proxy_enabled or not is_allowed(url):
+        return url or ""
+    return f"/api/img?s={thumbnail_size(display_size)}&url={quote(url, safe='')}"
+
+
+@router.get("/img")
+def get_image(request: Request, url: str, s: int = Query(THUMBNAIL_SIZES[0])):
+    if s not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail="Tamanho inválido.")
+    if not is_allowed(url):
+        raise HTTPException(status_code=403, detail="Host de imagem não permitido.")
+
+    # A revalidação passa pelo cache: entradas vencidas são baixadas de novo antes de comparar
+    try:
+        data, content_type = image_cache.get(url, s)
+    except (requests.exceptions.RequestException, OSError, ValueError) as e:
+        print(f"Imagens: Erro ao buscar {url}: {e}")
+        raise HTTPException(status_code=502, detail="Imagem indisponível.")
+
+    etag = ImageCache.etag(data)
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=content_type, headers=headers)
@@ -0,0 +1,294 @@
+import base64
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.data.data_manager import DataManager
+from app.data.deltas import PLAYER_FIELDS, MAP_FIELDS
+from app.data.map_leaderboards import MapLeaderboards
+from app.api.cache import response_cache
+
+router = APIRouter(prefix="/api")
+
+# Uma nova geração de dados invalida todas as respostas serializadas
+DataManager.subscribe(response_cache.invalidate)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Os dados só mudam a cada ciclo do DataManager; clientes podem reaproveitar a
+# resposta por alguns minutos e revalidar pelo ETag depois disso
+CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+
+def _etag(generation):
+    # Fraco: o corpo cru, gzip e br da mesma geração são equivalentes, não idênticos byte a byte
+    return f'W/"g{generation}"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Compara o If-None-Match (lista separada por vírgulas, com "*" ou tags
+    W/) com o ETag da resposta, na comparação fraca do RFC 9110.
+    """
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def _json_response(request: Request, key, generation, build_payload, pinned=True):
+    """
+    Responde com o payload serializado (orjson) e comprimido uma única vez por
+    geração do snapshot, usando ETag/Cache-Control derivados da geração.
+    Responde 304 se o cliente já tem essa geração.
+
+    Args:
+        key: Identificador da resposta dentro da geração (rota + parâmetros).
+        build_payload: Callable que monta o payload (só chamado em cache miss).
+        pinned: Respostas quentes (primeiras páginas, estrelas) ficam fixas;
+            demais páginas e perfis usam o LRU limitado.
+    """
+    headers = {"ETag": _etag(generation), "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get_or_build(generation, key, build_payload, pinned=pinned)
+    body, encoding = cached.encode_for(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def encode_cursor(generation, offset):
+    return base64.urlsafe_b64encode(f"{generation}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        generation, offset = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        return int(generation), int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+
+def _cursor_offset(generation, cursor):
+    """
+    O cursor carrega a geração do snapshot: se os dados foram atualizados no
+    meio da paginação, o cliente recebe 410 e recomeça.
+    """
+    if not cursor:
+        return 0
+    cursor_generation, offset = decode_cursor(cursor)
+    if cursor_generation != generation:
+        raise HTTPException(status_code=410, detail="Dados atualizados, recomece a paginação.")
+    return max(offset, 0)
+
+
+def _paginate(items, generation, offset, limit):
+    """Página de uma lista do snapshot, com o cursor da próxima página."""
+    page = items[offset:offset + limit]
+    next_offset = offset + len(page)
+
+    return {
+        "generation": generation,
+        "total": len(items),
+        "items": page,
+        "next_cursor": encode_cursor(generation, next_offset) if next_offset < len(items) else None
+    }
+
+
+def _snapshot():
+    # Leitura consistente das referências publicadas pelo DataManager
+    with DataManager._lock:
+        return {
+            "generation": DataManager.generation,
+            "last_updated": DataManager.last_updated,
+            "bsbr_data": DataManager.bsbr_data,
+            "scoresaber_data": DataManager.scoresaber_data,
+            "maps_data": DataManager.maps_data,
+            "star_buckets": DataManager.star_buckets,
+            "medal_standings": DataManager.medal_standings,
+            "player_profiles": DataManager.player_profiles,
+            "is_loading": DataManager.is_loading
+        }
+
+
+@router.get("/status")
+def get_status(request: Request):
+    snap = _snapshot()
+    payload = {
+        "generation": snap["generation"],
+        "last_updated": snap["last_updated"].isoformat() if snap["last_updated"] else None,
+        "is_loading": snap["is_loading"]
+    }
+    return Response(content=orjson.dumps(payload), media_type="application/json", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/refresh/history")
+def get_refresh_history():
+    """Últimos ciclos de atualização: duração por fase, chamadas HTTP e espera no rate limiter."""
+    _, cycles = DataManager.refresh_metrics()
+    return Response(content=orjson.dumps({"cycles": cycles}), media_type="application/json", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/ranking/br")
+def get_bsbr_ranking(request: Request, cursor: str = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    snap = _snapshot()
+    offset = _cursor_offset(snap["generation"], cursor)
+    return _json_response(
+        request, ("ranking/br", offset, limit), snap["generation"],
+        lambda: _paginate(snap["bsbr_data"], snap["generation"], offset, limit),
+        pinned=offset == 0
+    )
+
+
+@router.get("/ranking/br/changes")
+def get_bsbr_ranking_changes(request: Request, since: int = Query(..., ge=0)):
+    """
+    Mudanças do ranking BR desde a geração `since`, em linhas compactas
+    (`player_fields` / `map_fields`). Responde 410 se o histórico de deltas
+    não alcança essa geração: o cliente deve buscar /ranking/br completo.
+    """
+    snap = _snapshot()
+    changes = DataManager.ranking_changes(since)
+    if changes is None:
+        raise HTTPException(status_code=410, detail="Histórico de mudanças expirado, busque o ranking completo.")
+
+    def build_payload():
+        # Nome e avatar só dos jogadores que o cliente ainda não conhece
+        entrants = {row[0] for row in changes["players"] if row[1] is None}
+        return {
+            "generation": changes["generation"],
+            "since": since,
+            "player_fields": PLAYER_FIELDS,
+            "players": changes["players"],
+            "map_fields": MAP_FIELDS,
+            "map_leaders": changes["map_leaders"],
+            "entrants": {
+                p["id"]: {"name": p["name"], "profilePicture": p["profilePicture"]}
+                for p in snap["bsbr_data"] if p["id"] in entrants
+            }
+        }
+
+    return _json_response(request, ("ranking/br/changes", since), snap["generation"], build_payload, pinned=False)
+
+
+@router.get("/ranking/scoresaber")
+def get_scoresaber_ranking(request: Request, cursor: str = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    snap = _snapshot()
+    offset = _cursor_offset(snap["generation"], cursor)
+    return _json_response(
+        request, ("ranking/scoresaber", offset, limit), snap["generation"],
+        lambda: _paginate(snap["scoresaber_data"], snap["generation"], offset, limit),
+        pinned=offset == 0
+    )
+
+
+@router.get("/players/{player_id}")
+def get_player(request: Request, player_id: str):
+    # Apenas perfis pré-calculados: a API nunca espera pela rede
+    snap = _snapshot()
+    profile = snap["player_profiles"].get(player_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Jogador não encontrado.")
+    # Perfis são muitos e de cauda longa: ficam no LRU limitado
+    return _json_response(request, ("players", player_id), snap["generation"], lambda: profile, pinned=False)
+
+
+@router.get("/players/{player_id}/history")
+def get_player_history(request: Request, player_id: str, start: float = None, end: float = None):
+    """Série histórica do jogador entre `start` e `end` (timestamps unix)."""
+    snap = _snapshot()
+    return _json_response(
+        request, ("players/history", player_id, start, end), snap["generation"],
+        lambda: {"player_id": player_id, "points": DataManager.player_history(player_id, start, end)},
+        pinned=False
+    )
+
+
+@router.get("/players/{player_id}/recommendations")
+def get_player_recommendations(request: Request, player_id: str):
+    """Mapas BR que mais aumentariam o PP do jogador na acc alvo (pré-calculados)."""
+    snap = _snapshot()
+    recommendations = DataManager.get_recommendations(player_id)
+    if recommendations is None:
+        raise HTTPException(status_code=404, detail="Jogador sem recomendações.")
+    payload = dict(recommendations, player_id=player_id)
+    return _json_response(request, ("players/recommendations", player_id), snap["generation"], lambda: payload, pinned=False)
+
+
+@router.get("/maps")
+def get_maps(request: Request, cursor: str = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    snap = _snapshot()
+    offset = _cursor_offset(snap["generation"], cursor)
+    return _json_response(
+        request, ("maps", offset, limit), snap["generation"],
+        lambda: _paginate(snap["maps_data"], snap["generation"], offset, limit),
+        pinned=offset == 0
+    )
+
+
+@router.get("/maps/{leaderboard_id}/leaderboard")
+def get_map_leaderboard(request: Request, leaderboard_id: str, cursor: str = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """Leaderboard BR do mapa (ordem: PP, score, timeSet), paginado."""
+    snap = _snapshot()
+    found = DataManager.get_map_leaderboard(leaderboard_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Mapa não encontrado.")
+    map_meta, rows, _ = found
+    offset = _cursor_offset(snap["generation"], cursor)
+
+    def build_payload():
+        payload = _paginate(rows, snap["generation"], offset, limit)
+        payload["items"] = [MapLeaderboards.to_dict(row, offset + i + 1) for i, row in enumerate(payload["items"])]
+        payload["map"] = map_meta
+        payload["podium"] = DataManager.medal_table.podium(leaderboard_id)
+        return payload
+
+    return _json_response(
+        request, ("maps/leaderboard", leaderboard_id, offset, limit), snap["generation"],
+        build_payload, pinned=False
+    )
+
+
+@router.get("/maps/{leaderboard_id}/placement")
+def get_map_placement(leaderboard_id: str, score: int = Query(None, ge=0), acc: float = Query(None, ge=0, le=100)):
+    """Posição que um score (ou acc em %) ocuparia no leaderboard BR do mapa."""
+    found = DataManager.get_map_leaderboard(leaderboard_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Mapa não encontrado.")
+    map_meta, rows, boards = found
+    if score is None:
+        if acc is None or not map_meta.get("max_score"):
+            raise HTTPException(status_code=400, detail="Informe score ou acc.")
+        score = int(map_meta["max_score"] * acc / 100)
+
+    payload = {"leaderboard_id": leaderboard_id, "score": score, "rank": boards.placement(leaderboard_id, score), "total": len(rows)}
+    return Response(content=orjson.dumps(payload), media_type="application/json", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/medals")
+def get_medal_standings(request: Request, cursor: str = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """Classificação geral de medalhas (pré-calculada a cada publicação)."""
+    snap = _snapshot()
+    offset = _cursor_offset(snap["generation"], cursor)
+    return _json_response(
+        request, ("medals", offset, limit), snap["generation"],
+        lambda: _paginate(snap["medal_standings"], snap["generation"], offset, limit),
+        pinned=offset == 0
+    )
+
+
+@router.get("/stars")
+def get_star_buckets(request: Request):
+    snap = _snapshot()
+    return _json_response(
+        request, ("stars",), snap["generation"],
+        lambda: {"generation": snap["generation"], **snap["star_buckets"]}
+    )
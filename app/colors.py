@@ -10,6 +10,8 @@ class AppColors:
     PRIMARY = "#2E7D32"    
     # Amarelo (Secondary) - Um amarelo ouro/amber
     SECONDARY = "#FFD600"  
+    # Vermelho - Erros e quedas no ranking
+    ERROR = "#E53935"
     
     # Text
     TEXT = "#FFFFFF"
@@ -0,0 +1,150 @@
+import json
+import math
+import flet as ft
+from app.colors import AppColors
+
+
+class RecycledRow:
+    """
+    Linha reaproveitável de uma VirtualList.
+
+    A árvore de controles é criada uma única vez em `build()`; a cada troca de
+    página `bind(item)` apenas atualiza os campos que mudaram (via `set`), de
+    modo que o diff enviado pelo Flet contém só essas propriedades.
+    """
+
+    def __init__(self):
+        self.item = None
+        self.patch_bytes = 0
+        self.control = self.build()
+
+    def build(self) -> ft.Control:
+        raise NotImplementedError
+
+    def bind(self, item):
+        raise NotImplementedError
+
+    def set(self, control, attr, value):
+        """Atribui a propriedade somente se o valor mudou, contabilizando o payload."""
+        if getattr(control, attr) != value:
+            setattr(control, attr, value)
+            # Estimativa do patch enviado ao cliente: {"attr": "valor"}
+            self.patch_bytes += len(json.dumps({attr: value}, default=str, ensure_ascii=False).encode("utf-8"))
+
+
+class VirtualList(ft.Column):
+    """
+    Lista paginada com um conjunto fixo de linhas recicladas.
+
+    Args:
+        row_factory: Callable que cria uma RecycledRow.
+        source: Lista ou callable que devolve a sequência atual de itens
+            (ex: lambda: DataManager.bsbr_data). Só a fatia da página visível
+            é lida a cada troca de página.
+        page_size: Quantidade de linhas por página.
+        empty_content: Callable que devolve o controle exibido quando não há itens.
+    """
+
+    def __init__(self, row_factory, source, page_size=10, empty_content=None, spacing=5, scroll=None, icon_color=None, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.page_size = page_size
+        self.empty_content = empty_content
+        self.current_page = 1
+        self.total_pages = 1
+
+        # Bytes estimados do último diff (troca de página ou refresh)
+        self.last_patch_bytes = 0
+
+        self.rows = [row_factory() for _ in range(page_size)]
+        self.empty_container = ft.Container(visible=False)
+        self.list_column = ft.Column(
+            [self.empty_container] + [row.control for row in self.rows],
+            spacing=spacing,
+            scroll=scroll
+        )
+
+        self.page_info = ft.Text("Página 1/1", size=12, color=AppColors.TEXT_SECONDARY)
+        self.btn_prev = ft.IconButton(ft.Icons.CHEVRON_LEFT, on_click=self.prev_page, disabled=True, icon_color=icon_color)
+        self.btn_next = ft.IconButton(ft.Icons.CHEVRON_RIGHT, on_click=self.next_page, disabled=True, icon_color=icon_color)
+        self.pager = ft.Row(
+            [self.btn_prev, self.page_info, self.btn_next],
+            alignment=ft.MainAxisAlignment.CENTER
+        )
+
+        self.controls = [
+            ft.Container(content=self.list_column, expand=True),
+            self.pager
+        ]
+
+        self.bind_page()
+
+    def _items(self):
+        return self.source() if callable(self.source) else self.source
+
+    def set_source(self, source):
+        """Troca a fonte de dados (ex: resultado de uma busca) e volta para a página 1."""
+        self.source = source
+        self.current_page = 1
+        self.bind_page()
+
+    def bind_page(self):
+        """Preenche as linhas recicladas com a fatia da página atual."""
+        items = self._items() or []
+        self.total_pages = max(1, math.ceil(len(items) / self.page_size))
+        self.current_page = min(self.current_page, self.total_pages)
+
+        patch_bytes = 0
+        is_empty = len(items) == 0
+
+        if is_empty and self.empty_content:
+            self.empty_container.content = self.empty_content()
+        self.empty_container.visible = is_empty
+        self.pager.visible = not is_empty
+
+        start = (self.current_page - 1) * self.page_size
+        page_items = items[start:start + self.page_size]
+
+        for i, row in enumerate(self.rows):
+            row.patch_bytes = 0
+            if i < len(page_items):
+                row.bind(page_items[i])
+                row.item = page_items[i]
+                row.set(row.control, "visible", True)
+            else:
+                row.item = None
+                row.set(row.control, "visible", False)
+            patch_bytes += row.patch_bytes
+
+        self.page_info.value = f"Página {self.current_page}/{self.total_pages}"
+        self.btn_prev.disabled = self.current_page == 1
+        self.btn_next.disabled = self.current_page == self.total_pages
+        self.last_patch_bytes = patch_bytes
+
+    def refresh(self):
+        """Rebind da página atual (ex: após nova atualização dos dados)."""
+        self.bind_page()
+        self.update()
+
+    def refresh_changed(self):
+        """
+        Rebind da página atual enviando só as linhas que mudaram (atualização
+        ao vivo): o diff do Flet é calculado apenas sobre esses controles.
+        Fora da página (ex: aba ainda não exibida), só atualiza os controles.
+        """
+        self.bind_page()
+        if self.page is None:
+            return
+        changed = [row.control for row in self.rows if row.patch_bytes]
+        changed += [self.empty_container, self.pager]
+        self.page.update(*changed)
+
+    def prev_page(self, e):
+        if self.current_page > 1:
+            self.current_page -= 1
+            self.refresh()
+
+    def next_page(self, e):
+        if self.current_page < self.total_pages:
+            self.current_page += 1
+            self.refresh()
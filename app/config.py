@@ -1,2 +1,34 @@
+import os
+
 class AppConfig:
     DISCORD_LINK = "https://discord.gg/dmtfhxdgah"
+
+    # "embedded": o servidor web também faz o crawl/cálculo (um único updater por processo)
+    # "worker": o crawl roda em `python worker.py`; o servidor só lê o snapshot
+    REFRESH_MODE = os.environ.get("BSBR_REFRESH_MODE", "embedded")
+
+    # Processos usados no cálculo do ranking e das faixas de estrelas (0 = núcleos da máquina)
+    COMPUTE_WORKERS = int(os.environ.get("BSBR_COMPUTE_WORKERS", "0")) or None
+
+    # URLs base das APIs externas (apontar para benchmarks/fixture_server.py em testes de carga)
+    SCORESABER_API_URL = os.environ.get("BSBR_SCORESABER_API_URL", "https://scoresaber.com/api").rstrip("/")
+    BEATSAVER_API_URL = os.environ.get("BSBR_BEATSAVER_API_URL", "https://api.beatsaver.com").rstrip("/")
+
+    # Limite de chamadas ao ScoreSaber por minuto (gap de segurança para o limite de 400)
+    SCORESABER_RATE_LIMIT = int(os.environ.get("BSBR_SCORESABER_RATE_LIMIT", "350"))
+
+    # Pontos de medalha por posição no leaderboard BR de cada mapa (1º, 2º, ...)
+    MEDAL_POINTS = os.environ.get("BSBR_MEDAL_POINTS", "10,8,6,5,4,3,2,1,1,1")
+
+    # Hosts de imagens servidos pelo proxy /api/img (lista separada por vírgula)
+    IMAGE_PROXY_HOSTS = frozenset(h.strip() for h in os.environ.get(
+        "BSBR_IMAGE_PROXY_HOSTS",
+        "cdn.scoresaber.com,cdn.beatsaver.com,eu.cdn.beatsaver.com,na.cdn.beatsaver.com,"
+        "avatars.akamai.steamstatic.com,avatars.steamstatic.com,steamcdn-a.akamaihd.net"
+    ).split(",") if h.strip())
+
+    # Limite do cache em disco de miniaturas (storage/images), em MB
+    IMAGE_CACHE_MB = int(os.environ.get("BSBR_IMAGE_CACHE_MB", "256"))
+
+    # Views montadas guardadas por sessão (rota + geração dos dados) no router
+    VIEW_CACHE_SIZE = int(os.environ.get("BSBR_VIEW_CACHE_SIZE", "6"))
@@ -1,14 +1,40 @@
+import os
 import threading
 import time
+from array import array
 from datetime import datetime
+from app import metrics
+from app.config import AppConfig
 from app.ppcalc import rank_calculator
-from app.ppcalc.rankedbr import ScoreSaberAPI
-from app.data.database import get_db
+from app.ppcalc.compute import compute_ranking, reprice_maps, rank_players
+from app.ppcalc.rankedbr import ScoreSaberAPI, api_counter, partial_data
+from app.data.ingestion import ingest_leaderboard_scores
+from app.data.profiles import build_player_profile, build_player_profiles, AdhocProfileStore
+from app.data.search import PlayerSearchIndex, parse_query
+from app.data.stars import build_all_star_buckets
+from app.data.history import history_store
+from app.data.update_requests import take_requests
+from app.data.map_leaderboards import MapLeaderboards, build_map_leaderboards, reprice_boards
+from app.ppcalc.medals import MedalTable, podiums_from_details
+from app.ppcalc.recommend import build_recommendations, LEADERBOARD_ID, GAIN, PP, CURRENT_PP
+from app.data.deltas import compute_delta, append_delta, rank_moves, changes_since
+from app.data.database import get_db, DB_FOLDER
+from app.data.snapshot import save_snapshot, load_snapshot, snapshot_mtime
+from app.data.process_lock import ProcessLock
 from app.data.models.ranked_br_maps import RankedBRMaps
 from app.data.models.player_score import PlayerScore
 from collections import defaultdict
 from sqlalchemy.orm import Session
 
+# Endpoints sem os quais o ranking do ciclo fica incompleto
+CRITICAL_ENDPOINTS = ("players", "leaderboard_scores")
+
+# Métricas do ciclo de atualização gravadas pelo processo que roda o updater
+METRICS_PATH = os.path.join(DB_FOLDER, "refresh_metrics.json")
+
+# Intervalo de verificação de pedidos de atualização parcial (commands.py)
+REQUEST_POLL_SECONDS = 5
+
 class DataManager:
     # Cache em memória
     scoresaber_data = []
@@ -16,26 +42,220 @@ class DataManager:
     maps_data = []
     player_details = {}
     global_scores_cache = {} # Cache para scores globais: {player_id: [scores]}
+    player_profiles = {} # Perfis pré-calculados a cada atualização: {player_id: profile}
+    search_index = PlayerSearchIndex() # Índice de busca sobre o snapshot atual
+    star_buckets = {"br": [], "global": []} # Top 1 PP por faixa de estrelas (StarsRankingView)
+    map_leaderboards = MapLeaderboards() # Leaderboard BR de cada mapa rankeado
+    medal_table = MedalTable() # Pódio de cada mapa e classificação geral de medalhas
+    medal_standings = [] # Classificação de medalhas pronta para exibição (MedalTable.rows)
+    recommendations = {} # Mapas que mais dariam PP a cada jogador (app.ppcalc.recommend)
+    ranking_deltas = [] # Diferenças entre publicações do ranking BR (app.data.deltas)
+    rank_moves = {} # Posições ganhas por jogador na última publicação: {player_id: n ou None (novo)}
     
+    # Incrementado a cada publicação de dados; usado como versão do snapshot (ETag da API)
+    generation = 0
     last_updated = None
+    last_api_calls = {} # Chamadas à API por endpoint no último ciclo
     is_loading = False
     _lock = threading.Lock()
+    _listeners = [] # callbacks(generation) chamados a cada nova publicação
+    _updater_started = False
+    runs_refresh = False # True se este processo detém o lock e executa os ciclos
+    # Scores crus do último crawl dos leaderboards BR (só no processo que atualiza);
+    # permitem recalcular o ranking sem baixar tudo de novo
+    _leaderboard_scores = {}
+    # Garante um único processo fazendo crawl/cálculo (embutido ou worker.py)
+    _worker_lock = ProcessLock(os.path.join(DB_FOLDER, "refresh_worker.lock"))
+
+    @classmethod
+    def subscribe(cls, callback):
+        """Registra `callback(generation)`, chamado sempre que um novo snapshot é publicado."""
+        cls._listeners.append(callback)
+
+    @classmethod
+    def _notify(cls, generation):
+        for callback in list(cls._listeners):
+            try:
+                callback(generation)
+            except Exception as e:
+                print(f"DataManager: Erro em listener de atualização: {e}")
 
     @classmethod
     def start_background_updater(cls, interval_seconds=1800):
-        # Carrega dados do banco ao iniciar
-        cls.load_from_db()
-        
-        def updater_loop():
-            print("--- Iniciando atualização de dados em background ---")
-            cls.update_all_data()
+        """
+        Inicia a atualização periódica dentro deste processo (modo embutido).
+
+        Roda no máximo uma vez por processo, não importa quantas sessões
+        chamem. Se outro processo (ex: worker.py) já detém o lock de
+        atualização, este processo apenas acompanha o snapshot em disco.
+        """
+        with cls._lock:
+            if cls._updater_started:
+                return
+            cls._updater_started = True
+
+        if not cls._worker_lock.acquire():
+            print("DataManager: Outro processo já executa a atualização; acompanhando o snapshot.")
+            cls._start_snapshot_watcher()
+            return
+        cls.runs_refresh = True
+
+        # Carrega o último estado calculado (ou os scores do banco) ao iniciar
+        cls._load_initial_state()
+
+        thread = threading.Thread(target=cls._updater_loop, args=(interval_seconds,), daemon=True)
+        thread.start()
+
+    @classmethod
+    def start_snapshot_watcher(cls, poll_seconds=5):
+        """
+        Modo servidor web com worker separado: não faz crawl nem cálculo,
+        apenas carrega o snapshot mais recente e observa novas gerações.
+        """
+        with cls._lock:
+            if cls._updater_started:
+                return
+            cls._updater_started = True
+        cls._start_snapshot_watcher(poll_seconds)
+
+    @classmethod
+    def run_worker(cls, interval_seconds=1800):
+        """
+        Ponto de entrada do processo de atualização (worker.py): faz o crawl,
+        calcula o ranking e persiste o snapshot para os servidores web.
+        """
+        if not cls._worker_lock.acquire():
+            print("DataManager: Já existe um worker de atualização em execução. Saindo.")
+            return
+
+        with cls._lock:
+            cls._updater_started = True
+            cls.runs_refresh = True
+
+        cls._load_initial_state()
+        cls._updater_loop(interval_seconds)
+
+    @classmethod
+    def _load_initial_state(cls):
+        state = load_snapshot()
+        if state:
+            cls.apply_snapshot(state)
+        else:
+            cls.load_from_db()
+
+    @classmethod
+    def _updater_loop(cls, interval_seconds):
+        print("--- Iniciando atualização de dados em background ---")
+        while True:
+            if cls.update_all_data():
+                cls._save_snapshot()
+            cls._save_metrics()
+            cls._wait_next_cycle(interval_seconds)
+            print("--- Executando atualização periódica ---")
+
+    @classmethod
+    def _wait_next_cycle(cls, interval_seconds):
+        # Entre ciclos, atende os pedidos de atualização parcial (ex: mapas importados)
+        deadline = time.monotonic() + interval_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(REQUEST_POLL_SECONDS, remaining))
+            pending = take_requests()
+            if not pending:
+                continue
+            published = False
+            if pending.get("reprice"):
+                published = cls.reprice_leaderboards(pending["reprice"]) or published
+            if pending.get("leaderboards"):
+                published = cls.update_leaderboards(pending["leaderboards"]) or published
+            if published:
+                cls._save_snapshot()
+
+    @classmethod
+    def _save_snapshot(cls):
+        try:
+            save_snapshot(cls.export_state())
+            print(f"DataManager: Snapshot da geração {cls.generation} salvo.")
+        except Exception as e:
+            print(f"DataManager: Erro ao salvar snapshot: {e}")
+
+    @classmethod
+    def refresh_metrics(cls):
+        """
+        Métricas (texto Prometheus) e histórico de ciclos de quem executa a
+        atualização: este processo, ou o worker (lidos do arquivo gravado por ele).
+        """
+        if cls.runs_refresh:
+            return metrics.registry.render(), metrics.history.to_list()
+        saved = metrics.load(METRICS_PATH)
+        if saved is None:
+            return None, []
+        return saved["prometheus"], saved["history"]
+
+    @classmethod
+    def _save_metrics(cls):
+        # Lido pelo servidor web no modo worker (/metrics/refresh)
+        try:
+            metrics.save(METRICS_PATH)
+        except OSError as e:
+            print(f"DataManager: Erro ao salvar métricas: {e}")
+
+    @classmethod
+    def _start_snapshot_watcher(cls, poll_seconds=5):
+        def watcher_loop():
+            last_mtime = None
             while True:
-                time.sleep(interval_seconds)
-                print("--- Executando atualização periódica ---")
-                cls.update_all_data()
-        thread = threading.Thread(target=updater_loop, daemon=True)
+                mtime = snapshot_mtime()
+                if mtime is not None and mtime != last_mtime:
+                    state = load_snapshot()
+                    if state and state.get("generation") != cls.generation:
+                        cls.apply_snapshot(state)
+                    last_mtime = mtime
+                time.sleep(poll_seconds)
+
+        thread = threading.Thread(target=watcher_loop, daemon=True)
         thread.start()
 
+    @classmethod
+    def export_state(cls):
+        """Estado publicado atualmente, no formato gravado em disco pelo snapshot."""
+        with cls._lock:
+            return {
+                "generation": cls.generation,
+                "last_updated": cls.last_updated,
+                "scoresaber_data": cls.scoresaber_data,
+                "bsbr_data": cls.bsbr_data,
+                "maps_data": cls.maps_data,
+                "player_details": cls.player_details,
+                "global_scores_cache": cls.global_scores_cache,
+                "star_buckets": cls.star_buckets,
+                "ranking_deltas": cls.ranking_deltas,
+                "map_leaderboards": cls.map_leaderboards.boards,
+                "recommendations": cls.recommendations,
+                "last_api_calls": cls.last_api_calls
+            }
+
+    @classmethod
+    def apply_snapshot(cls, state):
+        """Publica um snapshot lido do disco (sem acessar a API nem o banco)."""
+        with cls._lock:
+            cls.global_scores_cache = state.get("global_scores_cache", {})
+            cls.last_api_calls = state.get("last_api_calls", {})
+        cls._publish(
+            state["scoresaber_data"],
+            state["bsbr_data"],
+            state["maps_data"],
+            state["player_details"],
+            generation=state.get("generation"),
+            last_updated=state.get("last_updated"),
+            star_buckets=state.get("star_buckets"),
+            ranking_deltas=state.get("ranking_deltas"),
+            map_leaderboards=MapLeaderboards(state.get("map_leaderboards")),
+            recommendations=state.get("recommendations")
+        )
+
     @classmethod
     def load_from_db(cls):
         """Carrega os scores salvos no banco para a memória."""
@@ -48,8 +268,11 @@ class DataManager:
             for s in scores_db:
                 new_cache[s.player_id].append(s.to_dict())
             
+            new_cache = dict(new_cache)
+
             with cls._lock:
-                cls.global_scores_cache = dict(new_cache)
+                cls.global_scores_cache = new_cache
+            # Só enche o cache: faixas de estrelas, perfis e índice saem do _publish
             print(f"DataManager: {len(scores_db)} scores carregados do banco.")
         except Exception as e:
             print(f"DataManager: Erro ao carregar do banco: {e}")
@@ -102,167 +325,514 @@ class DataManager:
 
     @classmethod
     def update_all_data(cls):
+        """Executa um ciclo completo de atualização. Retorna True se publicou novos dados."""
         with cls._lock:
             cls.is_loading = True
 
+        api_counter.reset()
+        partial_data.reset()
+        metrics.start_cycle()
+        # O ciclo completo já cobre os mapas de pedidos parciais pendentes
+        take_requests()
+
         try:
             # 1. ScoreSaber Global/BR Oficial
-            print("DataManager: Atualizando ScoreSaber...")
-            raw_players = ScoreSaberAPI.get_players(country="BR")
-            new_scoresaber = [{"id": p["id"], "profilePicture": p["profilePicture"], "pos": p["countryRank"], "name": p["name"], "pp": f"{p['pp']}pp"} for p in raw_players]
+            with metrics.span("players"):
+                print("DataManager: Atualizando ScoreSaber...")
+                raw_players = ScoreSaberAPI.get_players(country="BR")
+                new_scoresaber = [{"id": p["id"], "profilePicture": p["profilePicture"], "pos": p["countryRank"], "name": p["name"], "pp": f"{p['pp']}pp"} for p in raw_players]
 
             # 2. Mapas Rankeados (Vindo do Banco de Dados)
-            print("DataManager: Buscando Mapas do Banco de Dados...")
-            db = next(get_db())
-            maps_db = (
-                db.query(RankedBRMaps)
-                .order_by(
-                    RankedBRMaps.map_name.asc(),
-                    RankedBRMaps.stars.desc()
-                )
-                .all()
-            )
-            maps_lookup = {m.leaderboard_id: {"leaderboard_id": m.leaderboard_id, "name": m.map_name, "diff": m.difficulty.replace("Plus", "+") if m.difficulty else "?", "stars": f"{m.stars:.2f}★", "cover_image": m.cover_image} for m in maps_db}
-            new_maps = list(maps_lookup.values())
-            db.close()
+            with metrics.span("maps_db"):
+                print("DataManager: Buscando Mapas do Banco de Dados...")
+                maps_lookup, _ = cls._load_ranked_maps()
+                new_maps = list(maps_lookup.values())
 
             # 3. Ranking BR Customizado
             print("DataManager: Calculando Ranking BR Customizado...")
-            bsbr_result = rank_calculator()
+            bsbr_result = rank_calculator(workers=AppConfig.COMPUTE_WORKERS)
             
-            new_bsbr = [{"pos": p["rank"], "name": p["name"], "id": p["id"], "profilePicture": p["profilePicture"], "pp": f"{p['total_pp']:.2f}pp"} for p in bsbr_result["ranking"]]
+            new_bsbr = cls._bsbr_rows(bsbr_result["ranking"])
+
+            # Páginas que falharam (mesmo após os retries) deixariam o ranking
+            # incompleto; mantemos o snapshot atual em vez de publicá-lo.
+            if partial_data.has_failures(CRITICAL_ENDPOINTS) and cls.bsbr_data:
+                print(f"DataManager: Ciclo com dados parciais {partial_data.snapshot()}; mantendo os dados atuais.")
+                metrics.finish_cycle("partial")
+                with cls._lock:
+                    cls.is_loading = False
+                return False
             
             # 4. Processamento Detalhado por Jogador (Mapas BR)
-            new_player_details = defaultdict(lambda: {"scores": [], "total_medals": 0})
-            map_scores = bsbr_result.get("map_scores", {})
-
-            def medal_from_rank(rank: int):
-                if rank == 1: return 10
-                elif rank == 2: return 8
-                elif rank == 3: return 6
-                elif rank == 4: return 5
-                elif rank == 5: return 4
-                elif rank == 6: return 3
-                elif rank == 7: return 2
-                elif rank > 7: return 1
-                else: return 0
-            
-            for map_id, scores_list in map_scores.items():
-                map_meta = maps_lookup.get(str(map_id), {})
-                for rank, score in enumerate(scores_list, 1):
-                    pid = score["player_id"]
-                    if rank <= 10:
-                        new_player_details[pid]["total_medals"] += medal_from_rank(rank)
-                    
-                    new_player_details[pid]["scores"].append({
-                        "map_name": map_meta.get("name", "Unknown Map"),
-                        "map_cover": map_meta.get("cover_image"),
-                        "diff": map_meta.get("diff", "?"),
-                        "stars": map_meta.get("stars", "?"),
-                        "acc": score["accuracy"],
-                        "pp": score["pp"],
-                        "score": score["score"],
-                        "map_rank": rank
-                    })
-
-            for pid, details in new_player_details.items():
-                details["scores"].sort(key=lambda x: x["pp"], reverse=True)
-                for i, score in enumerate(details["scores"]):
-                    score["weighted_pp"] = score["pp"] * (0.965 ** i)
-
-            # 5. Atualização de Scores Globais (Inteligente)
-            print("DataManager: Iniciando atualização inteligente de scores globais...")
+            with metrics.span("details"):
+                new_player_details = cls._build_player_details(bsbr_result.get("player_scores", {}), maps_lookup)
+
+            # 5. Ingestão dos scores do crawl de leaderboards BR
+            with metrics.span("ingest"):
+                # Os mesmos scores viriam de novo no histórico de cada jogador; gravamos
+                # direto no PlayerScore e o passo seguinte ignora esses leaderboards.
+                print("DataManager: Gravando scores dos leaderboards BR...")
+                covered_lbs = ingest_leaderboard_scores(bsbr_result.get("leaderboard_scores", {}), maps_lookup)
+
+            # 6. Atualização de Scores Globais (Inteligente)
+            with metrics.span("global_sync"):
+                print("DataManager: Iniciando atualização inteligente de scores globais...")
             
-            top_players = raw_players[:50]
+                top_players = raw_players[:50]
             
-            def fetch_and_save_player(player):
-                pid = player["id"]
+                def fetch_and_save_player(player):
+                    pid = player["id"]
+                    cached = cls.global_scores_cache.get(pid, [])
                 
-                # Verifica se já temos dados desse jogador no cache
-                has_data = pid in cls.global_scores_cache and len(cls.global_scores_cache[pid]) > 0
+                    # Scores já conhecidos fora dos leaderboards cobertos pelo crawl
+                    known = {(s["leaderboard_id"], s["score"]) for s in cached if s["leaderboard_id"] not in covered_lbs}
+                    has_data = len(known) > 0
                 
-                if has_data:
-                    # Se já tem, busca apenas os RECENTES (ex: últimas 5 páginas ~ 400 scores)
-                    # Isso deve cobrir as jogadas novas
-                    print(f"Atualizando recentes para {player['name']}...")
-                    scores = ScoreSaberAPI.get_player_scores(pid, limit=100, max_pages=5, sort="recent")
-                else:
-                    # Se não tem, busca TUDO (Top scores)
-                    print(f"Baixando TUDO para {player['name']}...")
-                    scores = ScoreSaberAPI.get_player_scores(pid, limit=100, max_pages=None, sort="top")
+                    if has_data:
+                        # Se já tem, busca os RECENTES página a página (até 5 páginas)
+                        # e para na primeira página que já contém um score conhecido
+                        print(f"Atualizando recentes para {player['name']}...")
+                        scores = ScoreSaberAPI.get_player_recent_scores(
+                            pid,
+                            stop_when=lambda page: any((s["leaderboard"]["id"], s["score"]["baseScore"]) in known for s in page),
+                            limit=100,
+                            max_pages=5
+                        )
+                    else:
+                        # Se não tem, busca TUDO (Top scores)
+                        print(f"Baixando TUDO para {player['name']}...")
+                        scores = ScoreSaberAPI.get_player_scores(pid, limit=100, max_pages=None, sort="top")
                 
-                processed_scores = []
-                for s in scores:
-                    leaderboard = s["leaderboard"]
-                    score_data = s["score"]
+                    processed_scores = []
+                    for s in scores:
+                        leaderboard = s["leaderboard"]
+                        score_data = s["score"]
                     
-                    if score_data["pp"] <= 0: continue
-
-                    processed_scores.append({
-                        "leaderboard_id": leaderboard["id"],
-                        "map_name": leaderboard["songName"],
-                        "map_cover": leaderboard["coverImage"],
-                        "diff": leaderboard["difficulty"]["difficultyRaw"],
-                        "stars": f"{leaderboard['stars']}★",
-                        "acc": (score_data["baseScore"] / leaderboard["maxScore"]) * 100 if leaderboard["maxScore"] > 0 else 0,
-                        "pp": score_data["pp"],
-                        "score": score_data["baseScore"],
-                        "map_rank": score_data["rank"]
-                    })
+                        if score_data["pp"] <= 0: continue
+                        # Já gravado pela ingestão dos leaderboards BR
+                        if leaderboard["id"] in covered_lbs: continue
+
+                        processed_scores.append({
+                            "leaderboard_id": leaderboard["id"],
+                            "map_name": leaderboard["songName"],
+                            "map_cover": leaderboard["coverImage"],
+                            "diff": leaderboard["difficulty"]["difficultyRaw"],
+                            "stars": f"{leaderboard['stars']}★",
+                            "acc": (score_data["baseScore"] / leaderboard["maxScore"]) * 100 if leaderboard["maxScore"] > 0 else 0,
+                            "pp": score_data["pp"],
+                            "score": score_data["baseScore"],
+                            "map_rank": score_data["rank"]
+                        })
                 
-                if processed_scores:
-                    cls.save_scores_to_db(pid, processed_scores)
-                    return pid
-                return None
+                    if processed_scores:
+                        cls.save_scores_to_db(pid, processed_scores)
+                        return pid
+                    return None
 
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                futures = {executor.submit(fetch_and_save_player, p): p for p in top_players}
-                for future in as_completed(futures):
-                    future.result()
+                from concurrent.futures import ThreadPoolExecutor, as_completed
+                with ThreadPoolExecutor(max_workers=5) as executor:
+                    futures = {executor.submit(fetch_and_save_player, p): p for p in top_players}
+                    for future in as_completed(futures):
+                        future.result()
 
             # Recarrega do banco para garantir consistência e atualizar o cache
-            cls.load_from_db()
+            with metrics.span("load_from_db"):
+                cls.load_from_db()
 
-            # Atualização Atômica
+            cls.last_api_calls = api_counter.snapshot()
+            print(f"DataManager: {api_counter.total} chamadas à API neste ciclo {cls.last_api_calls}")
+
+            # Amostra gravada antes da publicação: quem recebe a nova geração já a encontra no histórico
+            with metrics.span("history"):
+                cls._record_history(new_bsbr, new_scoresaber)
+
+            with metrics.span("publish"):
+                new_map_leaderboards = MapLeaderboards(build_map_leaderboards(bsbr_result.get("map_scores", {})))
+                cls._publish(new_scoresaber, new_bsbr, new_maps, new_player_details, map_leaderboards=new_map_leaderboards)
+            cls._leaderboard_scores = bsbr_result.get("leaderboard_scores", {})
+            metrics.finish_cycle("ok")
+            return True
+
+        except Exception as e:
+            print(f"DataManager Erro Crítico: {e}")
+            metrics.finish_cycle("error")
             with cls._lock:
-                cls.scoresaber_data = new_scoresaber
-                cls.bsbr_data = new_bsbr
-                cls.maps_data = new_maps
-                cls.player_details = new_player_details
-                cls.last_updated = datetime.now()
                 cls.is_loading = False
-                print(f"DataManager: Dados atualizados com sucesso em {cls.last_updated}")
+            return False
 
+    @classmethod
+    def _load_ranked_maps(cls):
+        """
+        Mapas rankeados do banco.
+
+        Returns:
+            tuple: ({leaderboard_id: dados de exibição do mapa}, [{"leaderboard_id",
+                "stars", "max_score"}] no formato de compute_ranking)
+        """
+        db = next(get_db())
+        try:
+            maps_db = (
+                db.query(RankedBRMaps)
+                .order_by(
+                    RankedBRMaps.map_name.asc(),
+                    RankedBRMaps.stars.desc()
+                )
+                .all()
+            )
+        finally:
+            db.close()
+        maps_lookup = {m.leaderboard_id: {"leaderboard_id": m.leaderboard_id, "map_id": m.map_id, "name": m.map_name, "diff": m.difficulty.replace("Plus", "+") if m.difficulty else "?", "stars": f"{m.stars:.2f}★", "cover_image": m.cover_image, "max_score": m.max_score} for m in maps_db}
+        rank_maps = [{"leaderboard_id": m.leaderboard_id, "stars": m.stars, "max_score": m.max_score} for m in maps_db]
+        return maps_lookup, rank_maps
+
+    @staticmethod
+    def _bsbr_rows(ranking):
+        return [{"pos": p["rank"], "name": p["name"], "id": p["id"], "profilePicture": p["profilePicture"], "pp": f"{p['total_pp']:.2f}pp"} for p in ranking]
+
+    @staticmethod
+    def _build_player_details(player_scores, maps_lookup):
+        # Ordenação, weighted_pp e medalhas já vêm calculados pelo compute_ranking;
+        # aqui só anexamos os dados de exibição do mapa.
+        details = {}
+        for pid, player in player_scores.items():
+            scores = []
+            for score in player["scores"]:
+                map_meta = maps_lookup.get(str(score["leaderboard_id"]), {})
+                scores.append({
+                    "leaderboard_id": str(score["leaderboard_id"]),
+                    "map_name": map_meta.get("name", "Unknown Map"),
+                    "map_cover": map_meta.get("cover_image"),
+                    "diff": map_meta.get("diff", "?"),
+                    "stars": map_meta.get("stars", "?"),
+                    "acc": score["acc"],
+                    "pp": score["pp"],
+                    "score": score["score"],
+                    "map_rank": score["map_rank"],
+                    "weighted_pp": score["weighted_pp"]
+                })
+            details[pid] = {"scores": scores, "total_medals": player["total_medals"]}
+        return details
+
+    @classmethod
+    def update_leaderboards(cls, leaderboard_ids):
+        """
+        Atualização parcial após incluir mapas: baixa apenas os leaderboards
+        informados e recalcula o ranking com os scores dos demais mapas já em
+        memória. Sem o crawl anterior em memória, executa um ciclo completo.
+        Retorna True se publicou novos dados.
+        """
+        if not cls._leaderboard_scores:
+            print("DataManager: Sem crawl anterior em memória; executando ciclo completo.")
+            return cls.update_all_data()
+
+        with cls._lock:
+            cls.is_loading = True
+        try:
+            maps_lookup, rank_maps = cls._load_ranked_maps()
+            wanted = [str(lb_id) for lb_id in leaderboard_ids if str(lb_id) in maps_lookup]
+            print(f"DataManager: Atualização parcial de {len(wanted)} leaderboards...")
+
+            partial_data.reset()
+            fetched = {}
+            for lb_id in wanted:
+                fetched[lb_id] = ScoreSaberAPI.get_leaderboard_scores(lb_id)
+            if partial_data.has_failures(CRITICAL_ENDPOINTS):
+                print(f"DataManager: Leaderboards incompletos {partial_data.snapshot()}; ficam para o próximo ciclo.")
+                with cls._lock:
+                    cls.is_loading = False
+                return False
+
+            # Mapas removidos do banco saem do ranking
+            leaderboard_scores = {lb_id: scores for lb_id, scores in cls._leaderboard_scores.items() if lb_id in maps_lookup}
+            leaderboard_scores.update(fetched)
+
+            result = compute_ranking(rank_maps, leaderboard_scores, workers=AppConfig.COMPUTE_WORKERS)
+            ingest_leaderboard_scores(fetched, maps_lookup)
+            new_details = cls._build_player_details(result["player_scores"], maps_lookup)
+
+            new_map_leaderboards = MapLeaderboards(build_map_leaderboards(result["map_scores"]))
+            cls._publish(cls.scoresaber_data, cls._bsbr_rows(result["ranking"]), list(maps_lookup.values()), new_details, map_leaderboards=new_map_leaderboards)
+            cls._leaderboard_scores = leaderboard_scores
+            return True
         except Exception as e:
-            print(f"DataManager Erro Crítico: {e}")
+            print(f"DataManager: Erro na atualização parcial: {e}")
             with cls._lock:
                 cls.is_loading = False
+            return False
 
     @classmethod
-    def get_player_detail(cls, player_id):
-        ss_info = next((p for p in cls.scoresaber_data if p["id"] == player_id), None)
-        if not ss_info:
-            ss_info = ScoreSaberAPI.get_player_full(player_id)
-            if ss_info is None:
-                return None
-            ss_info["pos"] = 0
+    def reprice_leaderboards(cls, leaderboard_ids):
+        """
+        Recalcula o PP dos scores já publicados nos leaderboards informados com
+        as estrelas atuais do banco (sem acessar a rede). Só os jogadores com
+        scores nesses mapas são reordenados e têm o total recalculado; a
+        posição no mapa e as medalhas não dependem das estrelas.
+        Retorna True se publicou novos dados.
+        """
+        with cls._lock:
+            details = cls.player_details
+            bsbr_data = cls.bsbr_data
+            if not bsbr_data:
+                return False
+            cls.is_loading = True
+        try:
+            maps_lookup, rank_maps = cls._load_ranked_maps()
+            # Ids fora do banco (ex: mapa removido nesse meio tempo) são ignorados
+            lb_ids = sorted({str(lb_id) for lb_id in leaderboard_ids if str(lb_id) in maps_lookup})
+            if not lb_ids:
+                with cls._lock:
+                    cls.is_loading = False
+                return False
+            map_stars = {m["leaderboard_id"]: float(m["stars"]) for m in rank_maps if m["leaderboard_id"] in lb_ids}
+
+            start = time.perf_counter()
+            exact = cls._exact_accuracies(lb_ids, maps_lookup)
+
+            # 1. Linhas (jogador, índice do score, acc) agrupadas por mapa
+            rows_by_map = {lb_id: [] for lb_id in lb_ids}
+            for pid, detail in details.items():
+                for i, score in enumerate(detail["scores"]):
+                    rows = rows_by_map.get(score["leaderboard_id"])
+                    if rows is not None:
+                        rows.append((pid, i, exact.get(score["leaderboard_id"], {}).get(pid, score["acc"])))
+
+            stars = array("d", (map_stars[lb_id] for lb_id in lb_ids))
+            starts = array("I", [0])
+            accs = array("d")
+            for lb_id in lb_ids:
+                accs.extend(acc for _, _, acc in rows_by_map[lb_id])
+                starts.append(len(accs))
+            pps = reprice_maps(stars, starts, accs, workers=AppConfig.COMPUTE_WORKERS)
+
+            # 2. Novos scores dos jogadores afetados
+            new_pp = {}
+            r = 0
+            for lb_id in lb_ids:
+                for pid, i, _ in rows_by_map[lb_id]:
+                    new_pp[(pid, i)] = pps[r]
+                    r += 1
+            affected = sorted({pid for pid, _ in new_pp})
+
+            player_starts = array("I", [0])
+            ranks = array("I")
+            player_pps = array("d")
+            player_rows = []
+            for pid in affected:
+                for i, score in enumerate(details[pid]["scores"]):
+                    pp = new_pp.get((pid, i), score["pp"])
+                    if (pid, i) in new_pp:
+                        score = dict(score, pp=pp, stars=maps_lookup[score["leaderboard_id"]]["stars"])
+                    player_rows.append(score)
+                    ranks.append(score["map_rank"])
+                    player_pps.append(pp)
+                player_starts.append(len(player_pps))
+
+            # 3. Reordena e pondera só os afetados; os demais mantêm o total publicado
+            order, weighted, totals, _ = rank_players(player_starts, ranks, player_pps, workers=AppConfig.COMPUTE_WORKERS)
+            new_details = dict(details)
+            new_totals = {}
+            for p, pid in enumerate(affected):
+                scores = []
+                for k in range(player_starts[p], player_starts[p + 1]):
+                    scores.append(dict(player_rows[order[k]], weighted_pp=weighted[k]))
+                new_details[pid] = {"scores": scores, "total_medals": details[pid]["total_medals"]}
+                new_totals[pid] = totals[p]
+
+            ranking = []
+            for player in bsbr_data:
+                total = new_totals.get(player["id"])
+                if total is None:
+                    total = sum(s["weighted_pp"] for s in details.get(player["id"], {}).get("scores", []))
+                ranking.append({"id": player["id"], "name": player["name"], "profilePicture": player["profilePicture"], "total_pp": total})
+            ranking.sort(key=lambda x: x["total_pp"], reverse=True)
+            for i, player in enumerate(ranking):
+                player["rank"] = i + 1
+
+            print(f"DataManager: PP recalculado em {len(lb_ids)} leaderboards ({len(accs)} scores, {len(affected)} jogadores) em {time.perf_counter() - start:.2f}s.")
+            new_map_leaderboards = MapLeaderboards(reprice_boards(cls.map_leaderboards.boards, lb_ids, new_details))
+            cls._publish(cls.scoresaber_data, cls._bsbr_rows(ranking), list(maps_lookup.values()), new_details, map_leaderboards=new_map_leaderboards)
+            return True
+        except Exception as e:
+            print(f"DataManager: Erro ao recalcular PP dos leaderboards: {e}")
+            with cls._lock:
+                cls.is_loading = False
+            return False
+
+    @classmethod
+    def _exact_accuracies(cls, lb_ids, maps_lookup):
+        # Acc sem arredondamento a partir do último crawl em memória (mesma conta do
+        # compute_ranking); sem ele, usa a acc publicada (2 casas)
+        exact = {}
+        for lb_id in lb_ids:
+            raw = cls._leaderboard_scores.get(lb_id)
+            max_score = maps_lookup[lb_id]["max_score"] or 0
+            if raw and max_score > 0:
+                exact[lb_id] = {
+                    s["leaderboardPlayerInfo"]["id"]: (s["modifiedScore"] / max_score) * 100
+                    for s in raw if "NF" not in s["modifiers"]
+                }
+        return exact
+
+    @classmethod
+    def _publish(cls, scoresaber_data, bsbr_data, maps_data, player_details, generation=None, last_updated=None, star_buckets=None, ranking_deltas=None, map_leaderboards=None, recommendations=None):
+        """
+        Monta os dados derivados (perfis, índice de busca, faixas de estrelas,
+        delta do ranking) e troca o snapshot em memória de forma atômica. A
+        geração é incrementada, ou assume a do snapshot carregado do disco
+        (`generation`). Faixas de estrelas, deltas e recomendações já calculados
+        (`star_buckets`, `ranking_deltas`, `recommendations`, vindos do
+        snapshot) são reaproveitados. Sem
+        `map_leaderboards`, os leaderboards por mapa atuais são mantidos. A
+        tabela de medalhas é atualizada só nos mapas cujo pódio mudou.
+        """
+        # Perfis prontos para a PlayerView
+        new_profiles = build_player_profiles(scoresaber_data, bsbr_data, player_details)
+        new_search_index = PlayerSearchIndex(bsbr_data, scoresaber_data, player_details)
+        new_buckets = star_buckets or build_all_star_buckets(maps_data, player_details, cls.global_scores_cache, bsbr_data, scoresaber_data, workers=AppConfig.COMPUTE_WORKERS)
+        new_recommendations = recommendations if recommendations is not None else build_recommendations(maps_data, player_details, workers=AppConfig.COMPUTE_WORKERS)
+
+        # Só o ciclo de atualização compara com o snapshot anterior; snapshots
+        # do disco já trazem o histórico de deltas de quem os gravou
+        if ranking_deltas is not None:
+            new_deltas = ranking_deltas
+        elif cls.bsbr_data:
+            delta = compute_delta(cls.generation, cls.generation + 1, cls.bsbr_data, bsbr_data, cls.player_details, player_details)
+            new_deltas = append_delta(cls.ranking_deltas, delta)
+        else:
+            new_deltas = cls.ranking_deltas
+        new_moves = rank_moves(new_deltas[-1] if new_deltas else None)
+
+        new_medal_table = cls.medal_table.updated(podiums_from_details(player_details))
+        new_medal_standings = new_medal_table.rows(bsbr_data)
+
+        # Atualização Atômica
+        with cls._lock:
+            cls.scoresaber_data = scoresaber_data
+            cls.bsbr_data = bsbr_data
+            cls.maps_data = maps_data
+            cls.player_details = player_details
+            cls.player_profiles = new_profiles
+            cls.search_index = new_search_index
+            cls.star_buckets = new_buckets
+            cls.ranking_deltas = new_deltas
+            if map_leaderboards is not None:
+                cls.map_leaderboards = map_leaderboards
+            cls.rank_moves = new_moves
+            cls.medal_table = new_medal_table
+            cls.medal_standings = new_medal_standings
+            cls.recommendations = new_recommendations
+            cls.generation = generation if generation is not None else cls.generation + 1
+            generation = cls.generation
+            metrics.snapshot_generation.set(generation)
+            cls.last_updated = last_updated or datetime.now()
+            cls.is_loading = False
+            print(f"DataManager: Dados atualizados com sucesso em {cls.last_updated} (geração {cls.generation})")
+
+        # Perfis avulsos foram montados com o ranking anterior
+        cls.adhoc_profiles.clear()
+        cls._notify(generation)
+
+    @classmethod
+    def ranking_changes(cls, since):
+        """
+        Mudanças do ranking BR desde a geração `since` (ver app.data.deltas.changes_since).
+        Retorna None se o histórico de deltas não alcança essa geração.
+        """
+        with cls._lock:
+            history, current = cls.ranking_deltas, cls.generation
+        return changes_since(history, since, current)
+
+    @classmethod
+    def _record_history(cls, bsbr_data, scoresaber_data):
+        # Amostra do ciclo na série histórica (fora do bsbr.db) e downsampling dos dados antigos
+        try:
+            history_store.record(bsbr_data, scoresaber_data)
+            history_store.compact()
+        except OSError as e:
+            print(f"DataManager: Erro ao gravar histórico: {e}")
+
+    @classmethod
+    def player_history(cls, player_id, start=None, end=None):
+        """Série de PP BR, posição BR e posição ScoreSaber do jogador (timestamps unix)."""
+        return history_store.player_history(player_id, start, end)
+
+    @classmethod
+    def get_map_leaderboard(cls, leaderboard_id):
+        """(dados do mapa, linhas do leaderboard BR, MapLeaderboards) ou None se o mapa não existe."""
+        with cls._lock:
+            maps_data, boards = cls.maps_data, cls.map_leaderboards
+        leaderboard_id = str(leaderboard_id)
+        map_meta = next((m for m in maps_data if str(m["leaderboard_id"]) == leaderboard_id), None)
+        if map_meta is None:
+            return None
+        return map_meta, boards.rows(leaderboard_id) or [], boards
+
+    @classmethod
+    def get_recommendations(cls, player_id):
+        """
+        Mapas recomendados ao jogador (maior ganho de PP ponderado na acc alvo),
+        com os dados de exibição do mapa. None se não há recomendações.
+        """
+        with cls._lock:
+            maps_data, recommendation = cls.maps_data, cls.recommendations.get(player_id)
+        if recommendation is None:
+            return None
+
+        maps_lookup = {str(m["leaderboard_id"]): m for m in maps_data}
+        rows = []
+        for row in recommendation["maps"]:
+            map_meta = maps_lookup.get(row[LEADERBOARD_ID])
+            if map_meta is None:
+                continue
+            rows.append({
+                "leaderboard_id": row[LEADERBOARD_ID],
+                "map_name": map_meta["name"],
+                "map_cover": map_meta.get("cover_image"),
+                "diff": map_meta["diff"],
+                "stars": map_meta["stars"],
+                "gain": row[GAIN],
+                "pp": row[PP],
+                "current_pp": row[CURRENT_PP]
+            })
+        return {"acc": recommendation["acc"], "maps": rows}
+
+    @classmethod
+    def _fetch_adhoc_profile(cls, player_id):
+        """Busca na API um jogador fora da lista (roda em background)."""
+        ss_info = ScoreSaberAPI.get_player_full(player_id)
+        if ss_info is None:
+            return None
+        ss_info["pos"] = 0
+        ss_info["pp"] = f"{ss_info['pp']}pp"
 
         bsbr_info = next((p for p in cls.bsbr_data if p["id"] == player_id), None)
-        detail = cls.player_details.get(player_id)
-        
-        player_profile = {
-            "info": {
-                "name": ss_info["name"],
-                "id": ss_info["id"],
-                "profilePicture": ss_info["profilePicture"]
-            },
-            "scores": detail["scores"] if detail else [],
-            "total_medals": detail["total_medals"] if detail else 0,
-            "ss_rank": ss_info["pos"],
-            "ss_pp": ss_info["pp"],
-            "bsbr_rank": bsbr_info["pos"] if bsbr_info else "Sem Rank",
-            "bsbr_pp": bsbr_info["pp"] if bsbr_info else "0pp",
-            "profile_picture": ss_info["profilePicture"]
-        }
-        return player_profile
+        return build_player_profile(ss_info, bsbr_info, cls.player_details.get(player_id))
+
+    @classmethod
+    def get_player_detail(cls, player_id):
+        """
+        Retorna o perfil pronto do jogador, sem acessar a rede.
+        Retorna None se o perfil ainda não existe (use fetch_player_detail_async).
+        """
+        profile = cls.player_profiles.get(player_id)
+        if profile is not None:
+            return profile
+        return cls.adhoc_profiles.get(player_id)
+
+    @classmethod
+    def search_players(cls, text, source="bsbr", limit=None):
+        """
+        Busca no índice em memória. Aceita filtros no texto, ex:
+        "joao pp:300-500 medalhas:10" (ver app.data.search.parse_query).
+        """
+        query, filters = parse_query(text)
+        return cls.search_index.search(query, source=source, limit=limit, **filters)
+
+    @classmethod
+    def fetch_player_detail_async(cls, player_id, callback):
+        """Busca em background um jogador fora da lista e chama `callback(profile_ou_None)`."""
+        cls.adhoc_profiles.fetch_async(player_id, callback)
+
+
+# LRU de perfis buscados sob demanda (jogadores fora da lista pré-calculada)
+DataManager.adhoc_profiles = AdhocProfileStore(DataManager._fetch_adhoc_profile, max_size=256)
@@ -0,0 +1,143 @@
+from datetime import datetime
+
+# Diferenças do ranking BR entre publicações consecutivas: mudanças de
+# posição, novos jogadores, PP ganho e novo #1 em cada mapa. As listas são
+# ordenadas pela chave (id do jogador / leaderboard) e comparadas em uma única
+# passada (merge), sem buscas cruzadas entre os dois snapshots.
+
+# Deltas mantidos (~1 dia com o intervalo padrão de 30 min)
+DELTA_HISTORY = 48
+
+# Campos das linhas compactas de cada delta (None = ausente naquele snapshot)
+PLAYER_FIELDS = ("id", "old_pos", "new_pos", "old_pp", "new_pp")
+MAP_FIELDS = ("leaderboard_id", "old_player", "new_player")
+
+
+def _parse_pp(value):
+    # bsbr_data guarda o PP formatado ("1234.56pp")
+    try:
+        return float(str(value).rstrip("p"))
+    except ValueError:
+        return 0.0
+
+
+def ranking_rows(bsbr_data):
+    """Linhas (id, pos, pp) do ranking, ordenadas por id."""
+    rows = [(p["id"], p["pos"], _parse_pp(p["pp"])) for p in bsbr_data]
+    rows.sort()
+    return rows
+
+
+def map_leader_rows(player_details):
+    """Linhas (leaderboard_id, player_id) do #1 de cada mapa, ordenadas por leaderboard."""
+    leaders = {}
+    for pid, details in player_details.items():
+        for score in details.get("scores", ()):
+            lb_id = score.get("leaderboard_id")
+            if score.get("map_rank") == 1 and lb_id is not None:
+                leaders.setdefault(str(lb_id), pid)
+    return sorted(leaders.items())
+
+
+def merge_changes(old_rows, new_rows):
+    """
+    Percorre duas listas ordenadas pela chave (primeiro campo) e produz
+    (chave, linha_antiga, linha_nova) para cada chave que entrou, saiu ou mudou.
+    """
+    i = j = 0
+    old_len, new_len = len(old_rows), len(new_rows)
+    while i < old_len or j < new_len:
+        if j == new_len or (i < old_len and old_rows[i][0] < new_rows[j][0]):
+            yield old_rows[i][0], old_rows[i], None
+            i += 1
+        elif i == old_len or new_rows[j][0] < old_rows[i][0]:
+            yield new_rows[j][0], None, new_rows[j]
+            j += 1
+        else:
+            if old_rows[i] != new_rows[j]:
+                yield old_rows[i][0], old_rows[i], new_rows[j]
+            i += 1
+            j += 1
+
+
+def compute_delta(base, generation, old_bsbr, new_bsbr, old_details, new_details):
+    """
+    Delta entre o snapshot da geração `base` e o da nova `generation`.
+    As linhas seguem PLAYER_FIELDS e MAP_FIELDS.
+    """
+    players = []
+    for pid, old, new in merge_changes(ranking_rows(old_bsbr), ranking_rows(new_bsbr)):
+        players.append([
+            pid,
+            old[1] if old else None,
+            new[1] if new else None,
+            old[2] if old else None,
+            new[2] if new else None
+        ])
+
+    map_leaders = []
+    for lb_id, old, new in merge_changes(map_leader_rows(old_details), map_leader_rows(new_details)):
+        map_leaders.append([lb_id, old[1] if old else None, new[1] if new else None])
+
+    return {
+        "base": base,
+        "generation": generation,
+        "created": datetime.now().isoformat(),
+        "players": players,
+        "map_leaders": map_leaders
+    }
+
+
+def append_delta(history, delta):
+    """Nova lista de histórico (a anterior continua válida para quem já a leu)."""
+    return (list(history) + [delta])[-DELTA_HISTORY:]
+
+
+def rank_moves(delta):
+    """{player_id: posições ganhas (negativo = perdidas), ou None se entrou agora}."""
+    moves = {}
+    if not delta:
+        return moves
+    for pid, old_pos, new_pos, _, _ in delta["players"]:
+        if new_pos is None:
+            continue
+        moves[pid] = None if old_pos is None else old_pos - new_pos
+    return moves
+
+
+def changes_since(history, since, current):
+    """
+    Combina os deltas publicados depois da geração `since` em um só.
+    Retorna None só se `since` é anterior ao delta mais antigo mantido (o
+    cliente deve buscar o ranking completo). Cada publicação gera exatamente
+    uma geração e um delta, então qualquer geração a partir daí é coberta.
+    """
+    if since >= current:
+        return {"base": since, "generation": current, "players": [], "map_leaders": []}
+
+    pending = [delta for delta in history if delta["generation"] > since]
+    if not pending or pending[0]["base"] > since:
+        return None
+
+    players = {}
+    map_leaders = {}
+    for delta in pending:
+        # Mantém o "antes" do primeiro delta e o "depois" do último
+        for pid, old_pos, new_pos, old_pp, new_pp in delta["players"]:
+            row = players.get(pid)
+            if row is None:
+                players[pid] = [pid, old_pos, new_pos, old_pp, new_pp]
+            else:
+                row[2], row[4] = new_pos, new_pp
+        for lb_id, old_player, new_player in delta["map_leaders"]:
+            row = map_leaders.get(lb_id)
+            if row is None:
+                map_leaders[lb_id] = [lb_id, old_player, new_player]
+            else:
+                row[2] = new_player
+
+    # Mudanças que se desfizeram no intervalo não aparecem
+    player_rows = [r for r in players.values() if (r[1], r[3]) != (r[2], r[4])]
+    player_rows.sort(key=lambda r: (r[2] is None, r[2] or 0))
+    map_rows = sorted(r for r in map_leaders.values() if r[1] != r[2])
+    return {"base": since, "generation": current, "players": player_rows, "map_leaders": map_rows}
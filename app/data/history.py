@@ -0,0 +1,302 @@
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+from app.data.database import DB_FOLDER
+
+# Série histórica por jogador (PP BR, posição BR e posição ScoreSaber),
+# amostrada a cada ciclo de atualização. Fica fora do bsbr.db, em arquivos
+# binários só de acréscimo:
+#
+#   players.txt              ids dos jogadores; a linha N é o jogador nº N
+#   raw/AAAA-MM-DD.bin       amostras de cada ciclo (~30 min), um arquivo por dia
+#   hourly/AAAA-MM.bin       última amostra de cada hora, um arquivo por mês
+#   daily/AAAA.bin           última amostra de cada dia, um arquivo por ano
+#
+# Cada arquivo é uma sequência de blocos (um por instante):
+#   cabeçalho   timestamp f64 | nº linhas u32
+#   colunas     jogador u32[n] (ordenado) | pp BR f32[n] | posição BR u32[n] | posição SS u32[n]
+# Posição 0 = fora daquele ranking. A busca por jogador em um bloco é binária
+# na coluna ordenada de jogadores; blocos fora do intervalo são pulados pelo
+# índice de timestamps de cada arquivo.
+#
+# Arquivos antigos são condensados para a camada seguinte e removidos
+# (`compact`), então anos de amostras ocupam poucos MB.
+
+HISTORY_FOLDER = os.path.join(os.getcwd(), DB_FOLDER, "history")
+
+# Idade a partir da qual cada camada é condensada na seguinte
+RAW_RETENTION = timedelta(days=7)
+HOURLY_RETENTION = timedelta(days=90)
+
+_BLOCK = struct.Struct("<dI")
+_COLUMNS = (("player", "I"), ("br_pp", "f"), ("br_rank", "I"), ("ss_rank", "I"))
+_ROW_SIZE = sum(array(code).itemsize for _, code in _COLUMNS)
+
+# camada -> (formato do nome do arquivo, truncagem do instante para o downsampling)
+_TIERS = {
+    "raw": ("%Y-%m-%d", None),
+    "hourly": ("%Y-%m", lambda t: t.replace(minute=0, second=0, microsecond=0)),
+    "daily": ("%Y", lambda t: t.replace(hour=0, minute=0, second=0, microsecond=0))
+}
+
+
+def _parse_pp(value):
+    try:
+        return float(str(value).rstrip("p"))
+    except ValueError:
+        return 0.0
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def _encode_block(timestamp, rows):
+    """`rows`: [(jogador, pp, posição BR, posição SS)] ordenadas por jogador."""
+    parts = [_BLOCK.pack(timestamp, len(rows))]
+    for idx, (_, code) in enumerate(_COLUMNS):
+        parts.append(array(code, (row[idx] for row in rows)).tobytes())
+    return b"".join(parts)
+
+
+def _scan_blocks(f, offset, size):
+    """Índice [(timestamp, offset, nº linhas)] dos blocos completos a partir de `offset`."""
+    index = []
+    while offset + _BLOCK.size <= size:
+        f.seek(offset)
+        timestamp, count = _BLOCK.unpack(f.read(_BLOCK.size))
+        end = offset + _BLOCK.size + count * _ROW_SIZE
+        if end > size:
+            break  # bloco truncado (gravação interrompida)
+        index.append((timestamp, offset, count))
+        offset = end
+    return index, offset
+
+
+def _read_rows(f, offset, count):
+    """Todas as linhas de um bloco como tuplas na ordem de _COLUMNS."""
+    f.seek(offset + _BLOCK.size)
+    columns = []
+    for _, code in _COLUMNS:
+        col = array(code)
+        col.frombytes(f.read(count * col.itemsize))
+        columns.append(col)
+    return list(zip(*columns))
+
+
+def _read_player(f, offset, count, player_no):
+    """Linha do jogador no bloco (busca binária na coluna ordenada), ou None."""
+    f.seek(offset + _BLOCK.size)
+    players = array("I")
+    players.frombytes(f.read(count * players.itemsize))
+    i = bisect_left(players, player_no)
+    if i == count or players[i] != player_no:
+        return None
+
+    values = []
+    column_offset = offset + _BLOCK.size
+    for _, code in _COLUMNS:
+        itemsize = array(code).itemsize
+        f.seek(column_offset + i * itemsize)
+        values.append(struct.unpack(f"<{code}", f.read(itemsize))[0])
+        column_offset += count * itemsize
+    return values
+
+
+class HistoryStore:
+    def __init__(self, folder=HISTORY_FOLDER):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._player_nos = {}
+        self._players_size = 0
+        self._indexes = {} # caminho -> (bytes indexados, [(timestamp, offset, nº linhas)])
+        # Leituras da API e o compact do updater indexam os mesmos arquivos
+        self._index_lock = threading.Lock()
+
+    # --- Jogadores ---
+
+    def _players_path(self):
+        return os.path.join(self.folder, "players.txt")
+
+    def _reload_players(self):
+        # O arquivo só cresce: lê apenas as linhas acrescentadas (ex: pelo worker)
+        try:
+            with open(self._players_path(), "rb") as f:
+                f.seek(self._players_size)
+                chunk = f.read()
+        except OSError:
+            return
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            self._player_nos[line] = len(self._player_nos)
+        self._players_size += len(complete)
+
+    def _player_no(self, player_id, create=False):
+        with self._lock:
+            if player_id not in self._player_nos:
+                self._reload_players()
+            no = self._player_nos.get(player_id)
+            if no is None and create:
+                with open(self._players_path(), "a", encoding="utf-8") as f:
+                    f.write(f"{player_id}\n")
+                self._reload_players()
+                no = self._player_nos[player_id]
+            return no
+
+    # --- Escrita ---
+
+    def _tier_path(self, tier, when):
+        name_format, _ = _TIERS[tier]
+        return os.path.join(self.folder, tier, f"{when.strftime(name_format)}.bin")
+
+    def record(self, bsbr_data, scoresaber_data, timestamp=None):
+        """Acrescenta uma amostra de todos os jogadores do ranking BR e do ScoreSaber BR."""
+        timestamp = timestamp if timestamp is not None else datetime.now(timezone.utc).timestamp()
+        os.makedirs(self.folder, exist_ok=True)
+
+        samples = {}
+        for p in bsbr_data:
+            samples[p["id"]] = [_parse_pp(p["pp"]), p["pos"], 0]
+        for p in scoresaber_data:
+            samples.setdefault(p["id"], [0.0, 0, 0])[2] = p["pos"]
+
+        rows = sorted(
+            (self._player_no(pid, create=True), pp, br_rank, ss_rank)
+            for pid, (pp, br_rank, ss_rank) in samples.items()
+        )
+        self._append(self._tier_path("raw", _utc(timestamp)), timestamp, rows)
+        return len(rows)
+
+    def _append(self, path, timestamp, rows):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(_encode_block(timestamp, rows))
+
+    def compact(self, now=None):
+        """
+        Condensa as camadas: dias "raw" mais antigos que RAW_RETENTION viram
+        amostras por hora; meses "hourly" mais antigos que HOURLY_RETENTION
+        viram amostras por dia. Os arquivos de origem são removidos depois.
+        """
+        now = now or datetime.now(timezone.utc)
+        self._downsample("raw", "hourly", now - RAW_RETENTION)
+        self._downsample("hourly", "daily", now - HOURLY_RETENTION)
+
+    def _downsample(self, source, target, cutoff):
+        truncate = _TIERS[target][1]
+        for path, period_end in self._files(source):
+            # Só arquivos cujo período inteiro já passou do corte
+            if period_end > cutoff:
+                continue
+
+            with open(path, "rb") as f:
+                # Última amostra de cada intervalo da camada de destino
+                buckets = {}
+                for timestamp, offset, count in self._index(path):
+                    buckets[truncate(_utc(timestamp))] = (offset, count)
+
+                for bucket, (offset, count) in sorted(buckets.items()):
+                    target_path = self._tier_path(target, bucket)
+                    # Idempotente: se a remoção falhou antes, não duplica blocos
+                    existing = self._index(target_path)
+                    if existing and existing[-1][0] >= bucket.timestamp():
+                        continue
+                    self._append(target_path, bucket.timestamp(), _read_rows(f, offset, count))
+
+            os.remove(path)
+            with self._index_lock:
+                self._indexes.pop(path, None)
+
+    # --- Leitura ---
+
+    def _files(self, tier):
+        """[(caminho, fim do período)] dos arquivos da camada, em ordem cronológica."""
+        folder = os.path.join(self.folder, tier)
+        name_format, _ = _TIERS[tier]
+        try:
+            names = sorted(n for n in os.listdir(folder) if n.endswith(".bin"))
+        except OSError:
+            return []
+
+        files = []
+        for name in names:
+            try:
+                start = datetime.strptime(name[:-4], name_format).replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            if tier == "raw":
+                end = start + timedelta(days=1)
+            elif tier == "hourly":
+                end = (start + timedelta(days=32)).replace(day=1)
+            else:
+                end = start.replace(year=start.year + 1)
+            files.append((os.path.join(folder, name), end))
+        return files
+
+    def _index(self, path):
+        """Índice de blocos do arquivo; se ele cresceu, indexa só o trecho novo."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return []
+        with self._index_lock:
+            indexed, index = self._indexes.get(path, (0, []))
+            if indexed < size:
+                with open(path, "rb") as f:
+                    new_blocks, indexed = _scan_blocks(f, indexed, size)
+                index = index + new_blocks
+                self._indexes[path] = (indexed, index)
+        return index
+
+    def player_history(self, player_id, start=None, end=None):
+        """
+        Amostras do jogador entre `start` e `end` (timestamps unix, inclusive),
+        em ordem cronológica, das três camadas.
+        """
+        player_no = self._player_no(player_id)
+        if player_no is None:
+            return []
+        start = start if start is not None else 0.0
+        end = end if end is not None else float("inf")
+
+        points = []
+        for tier, (_, truncate) in _TIERS.items():
+            # O _downsample grava o bloco condensado antes de remover o arquivo
+            # de origem: intervalos ainda presentes numa camada mais fina já
+            # estão em `points` e o bloco condensado deles é descartado
+            covered = {truncate(_utc(p["time"])).timestamp() for p in points} if truncate else set()
+            for path, period_end in self._files(tier):
+                if period_end.timestamp() < start:
+                    continue
+                index = self._index(path)
+                times = [block[0] for block in index]
+                selected = index[bisect_left(times, start):bisect_right(times, end)]
+                if not selected:
+                    continue
+                try:
+                    f = open(path, "rb")
+                except OSError:
+                    continue  # condensado para a camada seguinte durante a leitura
+                with f:
+                    for timestamp, offset, count in selected:
+                        if timestamp in covered:
+                            continue
+                        row = _read_player(f, offset, count, player_no)
+                        if row is None:
+                            continue
+                        points.append({
+                            "time": timestamp,
+                            "br_pp": round(row[1], 2),
+                            "br_rank": row[2] or None,
+                            "ss_rank": row[3] or None
+                        })
+
+        points.sort(key=lambda p: p["time"])
+        return points
+
+
+history_store = HistoryStore()
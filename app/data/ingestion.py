@@ -0,0 +1,119 @@
+from app.data.database import get_db
+from app.data.models.player_score import PlayerScore
+from app.ppcalc.rankedbr import ScoreSaberAPI, partial_data
+
+
+def _chunks(items, size=500):
+    # SQLite limita a quantidade de parâmetros em um IN (...)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def ingest_leaderboard_scores(leaderboard_scores, maps_lookup):
+    """
+    Grava no PlayerScore os scores obtidos no crawl dos leaderboards BR
+    (ScoreSaberAPI.get_leaderboard_scores com countries=BR), evitando que o
+    histórico de cada jogador precise baixá-los de novo.
+
+    Deduplica por (player_id, leaderboard_id): se o registro já existe, só é
+    atualizado quando o score melhorou (mesma regra de save_scores_to_db).
+
+    Args:
+        leaderboard_scores (dict): leaderboard_id -> scores crus da API.
+        maps_lookup (dict): leaderboard_id (str) -> metadados do mapa (max_score).
+
+    Returns:
+        set: leaderboard_ids (int) cobertos pelo crawl: só os que vieram
+            completos e foram gravados. Os demais (página perdida, crawl vazio
+            ou sem metadados) continuam vindo do histórico de cada jogador.
+    """
+    if not leaderboard_scores:
+        return set()
+    failed = partial_data.failed("leaderboard_scores")
+    covered = set()
+
+    db = next(get_db())
+    try:
+        # Uma consulta por bloco de leaderboards em vez de uma por score
+        existing = {}
+        for chunk in _chunks(sorted({int(lb_id) for lb_id in leaderboard_scores})):
+            for row in db.query(PlayerScore).filter(PlayerScore.leaderboard_id.in_(chunk)):
+                existing[(row.player_id, row.leaderboard_id)] = row
+
+        # Metadados do leaderboard (nome, capa, estrelas do ScoreSaber) reaproveitados
+        # de qualquer registro já salvo; só consulta a API para leaderboards novos
+        lb_meta = {}
+        for (_, lb_id), row in existing.items():
+            if lb_id not in lb_meta:
+                lb_meta[lb_id] = {"map_name": row.map_name, "map_cover": row.map_cover, "diff": row.diff, "stars": row.stars}
+
+        inserted = 0
+        updated = 0
+
+        for lb_id, scores in leaderboard_scores.items():
+            lb_id = int(lb_id)
+            max_score = maps_lookup.get(str(lb_id), {}).get("max_score") or 0
+
+            if lb_id not in lb_meta and scores:
+                info = ScoreSaberAPI.get_leaderboard_info(lb_id)
+                if not info:
+                    continue
+                lb_meta[lb_id] = {
+                    "map_name": info["songName"],
+                    "map_cover": info["coverImage"],
+                    "diff": info["difficulty"]["difficultyRaw"],
+                    "stars": f"{info['stars']}★"
+                }
+                max_score = max_score or info.get("maxScore", 0)
+
+            meta = lb_meta.get(lb_id)
+            if meta is None:
+                continue
+            if scores and str(lb_id) not in failed:
+                covered.add(lb_id)
+
+            for score in scores:
+                # Mesmo filtro do compute_ranking: sem pp ou com No Fail não conta
+                if score["pp"] <= 0 or "NF" in score["modifiers"]:
+                    continue
+
+                pid = score["leaderboardPlayerInfo"]["id"]
+                base_score = score["baseScore"]
+                acc = (base_score / max_score) * 100 if max_score > 0 else 0
+
+                row = existing.get((pid, lb_id))
+                if row:
+                    if base_score > row.score:
+                        row.pp = score["pp"]
+                        row.score = base_score
+                        row.acc = acc
+                        row.map_rank = score["rank"]
+                        updated += 1
+                else:
+                    row = PlayerScore(
+                        player_id=pid,
+                        leaderboard_id=lb_id,
+                        map_name=meta["map_name"],
+                        map_cover=meta["map_cover"],
+                        diff=meta["diff"],
+                        stars=meta["stars"],
+                        acc=acc,
+                        pp=score["pp"],
+                        score=base_score,
+                        map_rank=score["rank"]
+                    )
+                    db.add(row)
+                    existing[(pid, lb_id)] = row
+                    inserted += 1
+
+        db.commit()
+        print(f"Ingestão: {inserted} scores novos e {updated} atualizados a partir de {len(leaderboard_scores)} leaderboards BR ({len(covered)} completos).")
+    except Exception as e:
+        print(f"Ingestão: Erro ao gravar scores dos leaderboards: {e}")
+        db.rollback()
+        # Nada foi gravado: o histórico dos jogadores volta a cobrir esses mapas
+        covered = set()
+    finally:
+        db.close()
+
+    return covered
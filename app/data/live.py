@@ -0,0 +1,75 @@
+import itertools
+import threading
+
+from app.data.data_manager import DataManager
+
+# Atualizações ao vivo para as sessões Flet abertas.
+#
+# O DataManager chama `publish` na thread do updater a cada nova geração; ele
+# só guarda a geração e acorda o dispatcher (O(1), independe do número de
+# abas). A thread do dispatcher percorre as sessões e agenda o callback de
+# cada uma no executor da própria página (page.run_thread), sem esperar:
+# uma sessão lenta não atrasa as demais.
+
+
+class LiveHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {} # token -> (page, callback(geração))
+        self._tokens = itertools.count(1)
+        self._generation = None
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def publish(self, generation):
+        """Listener do DataManager: registra a geração e acorda o dispatcher."""
+        self._generation = generation
+        self._wakeup.set()
+
+    def subscribe(self, page, callback):
+        """Registra a sessão; `callback(geração)` roda no executor da página. Retorna o token."""
+        with self._lock:
+            token = next(self._tokens)
+            self._sessions[token] = (page, callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop, name="live-hub", daemon=True)
+                self._thread.start()
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def session_count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _dispatch_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Várias publicações seguidas viram um único aviso com a mais recente
+            generation = self._generation
+            with self._lock:
+                sessions = list(self._sessions.items())
+
+            for token, (page, callback) in sessions:
+                try:
+                    page.run_thread(callback, generation)
+                except Exception as e:
+                    # Sessão encerrada (loop/executor da página já fechados)
+                    print(f"LiveHub: Removendo sessão {token}: {e}")
+                    self.unsubscribe(token)
+
+
+live_hub = LiveHub()
+DataManager.subscribe(live_hub.publish)
+
+
+def bind_live_refresh(view, refresh):
+    """
+    Marca a view como capaz de se atualizar no lugar: `refresh()` é chamado
+    (pelo router) quando chega uma nova geração enquanto ela está visível.
+    """
+    view.live_refresh = refresh
+    return view
@@ -0,0 +1,81 @@
+from bisect import bisect_right
+
+# Leaderboard BR de cada mapa rankeado, montado a partir do map_scores do
+# compute_ranking (sem novo crawl) e gravado no snapshot.
+#
+# Cada linha é uma lista compacta na ordem de FIELDS. A ordem é PP BR
+# (decrescente), score (decrescente) e timeSet (o mais antigo primeiro). Como
+# o PP cresce com a acc no mesmo mapa, é também a ordem por score.
+
+FIELDS = ("player_id", "player_name", "score", "acc", "pp", "time_set")
+PLAYER_ID, PLAYER_NAME, SCORE, ACC, PP, TIME_SET = range(len(FIELDS))
+
+
+def _sort_key(row):
+    return (-row[PP], -row[SCORE], row[TIME_SET] or "")
+
+
+def build_map_leaderboards(map_scores):
+    """{leaderboard_id: [linhas]} a partir do map_scores do compute_ranking."""
+    boards = {}
+    for lb_id, scores in map_scores.items():
+        rows = [
+            [s["player_id"], s["player_name"], s["score"], s["accuracy"], s["pp"], s["timeSet"]]
+            for s in scores
+        ]
+        rows.sort(key=_sort_key)
+        for row in rows:
+            row[PP] = round(row[PP], 2)
+        boards[str(lb_id)] = rows
+    return boards
+
+
+def reprice_boards(boards, leaderboard_ids, player_details):
+    """
+    Cópia de `boards` com o PP dos leaderboards informados tirado dos
+    player_details já recalculados (a ordem não muda: só as estrelas mudaram).
+    """
+    wanted = {str(lb_id) for lb_id in leaderboard_ids} & boards.keys()
+    new_pp = {}
+    for pid, detail in player_details.items():
+        for score in detail["scores"]:
+            if score["leaderboard_id"] in wanted:
+                new_pp[(pid, score["leaderboard_id"])] = round(score["pp"], 2)
+
+    new_boards = dict(boards)
+    for lb_id in wanted:
+        new_boards[lb_id] = [
+            row[:PP] + [new_pp.get((row[PLAYER_ID], lb_id), row[PP])] + row[PP + 1:]
+            for row in boards[lb_id]
+        ]
+    return new_boards
+
+
+class MapLeaderboards:
+    """Leaderboards por mapa publicados, com busca de posição em O(log n)."""
+
+    def __init__(self, boards=None):
+        self.boards = boards or {}
+        # Scores negativos (ordem crescente) por leaderboard, montados sob demanda
+        self._keys = {}
+
+    def rows(self, leaderboard_id):
+        return self.boards.get(str(leaderboard_id))
+
+    def placement(self, leaderboard_id, score):
+        """
+        Posição que um score ocuparia no leaderboard BR do mapa (empate fica
+        depois do score existente, que é mais antigo). None se o mapa não existe.
+        """
+        leaderboard_id = str(leaderboard_id)
+        rows = self.boards.get(leaderboard_id)
+        if rows is None:
+            return None
+        keys = self._keys.get(leaderboard_id)
+        if keys is None:
+            keys = self._keys[leaderboard_id] = [-row[SCORE] for row in rows]
+        return bisect_right(keys, -score) + 1
+
+    @staticmethod
+    def to_dict(row, rank):
+        return dict(zip(FIELDS, row), rank=rank)
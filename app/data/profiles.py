@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_player_profile(ss_info, bsbr_info, detail):
+    """
+    Monta o perfil pronto para a PlayerView a partir das informações do
+    ScoreSaber, do ranking BR e dos scores BR (já ordenados com weighted_pp).
+    """
+    return {
+        "info": {
+            "name": ss_info["name"],
+            "id": ss_info["id"],
+            "profilePicture": ss_info["profilePicture"]
+        },
+        "scores": detail["scores"] if detail else [],
+        "total_medals": detail["total_medals"] if detail else 0,
+        "ss_rank": ss_info["pos"],
+        "ss_pp": ss_info["pp"],
+        "bsbr_rank": bsbr_info["pos"] if bsbr_info else "Sem Rank",
+        "bsbr_pp": bsbr_info["pp"] if bsbr_info else "0pp",
+        "profile_picture": ss_info["profilePicture"]
+    }
+
+
+def build_player_profiles(scoresaber_data, bsbr_data, player_details):
+    """Pré-calcula o perfil de todos os jogadores conhecidos (ScoreSaber BR + Ranking BR)."""
+    bsbr_by_id = {p["id"]: p for p in bsbr_data}
+    profiles = {}
+
+    for ss_info in scoresaber_data:
+        pid = ss_info["id"]
+        profiles[pid] = build_player_profile(ss_info, bsbr_by_id.get(pid), player_details.get(pid))
+
+    # Jogadores do ranking BR que não vieram na lista do ScoreSaber
+    for bsbr_info in bsbr_data:
+        pid = bsbr_info["id"]
+        if pid not in profiles:
+            ss_info = {
+                "id": pid,
+                "name": bsbr_info["name"],
+                "profilePicture": bsbr_info["profilePicture"],
+                "pos": 0,
+                "pp": "0pp"
+            }
+            profiles[pid] = build_player_profile(ss_info, bsbr_info, player_details.get(pid))
+
+    return profiles
+
+
+class AdhocProfileStore:
+    """
+    Perfis de jogadores fora da lista pré-calculada.
+
+    A busca na API acontece em background (nunca na thread da view) e o
+    resultado fica em um LRU limitado a `max_size` perfis.
+    """
+
+    def __init__(self, fetch_func, max_size=256, max_workers=2):
+        self.fetch_func = fetch_func
+        self.max_size = max_size
+        self._profiles = OrderedDict()
+        self._pending = {}  # player_id -> [callbacks]
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="profile-fetch")
+
+    def get(self, player_id):
+        with self._lock:
+            profile = self._profiles.get(player_id)
+            if profile is not None:
+                self._profiles.move_to_end(player_id)
+            return profile
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    def fetch_async(self, player_id, callback):
+        """
+        Agenda a busca do perfil e chama `callback(profile_ou_None)` quando
+        terminar. Pedidos simultâneos do mesmo jogador compartilham a busca.
+        """
+        with self._lock:
+            if player_id in self._profiles:
+                profile = self._profiles[player_id]
+                self._profiles.move_to_end(player_id)
+            else:
+                profile = None
+                if player_id in self._pending:
+                    self._pending[player_id].append(callback)
+                    return
+                self._pending[player_id] = [callback]
+
+        if profile is not None:
+            callback(profile)
+            return
+
+        self._executor.submit(self._run_fetch, player_id)
+
+    def _run_fetch(self, player_id):
+        profile = None
+        try:
+            profile = self.fetch_func(player_id)
+        except Exception as e:
+            print(f"Perfil: Erro ao buscar jogador {player_id}: {e}")
+
+        with self._lock:
+            if profile is not None:
+                self._profiles[player_id] = profile
+                self._profiles.move_to_end(player_id)
+                while len(self._profiles) > self.max_size:
+                    self._profiles.popitem(last=False)
+            callbacks = self._pending.pop(player_id, [])
+
+        for callback in callbacks:
+            try:
+                callback(profile)
+            except Exception as e:
+                print(f"Perfil: Erro ao notificar view do jogador {player_id}: {e}")
@@ -0,0 +1,151 @@
+import bisect
+import re
+import unicodedata
+
+
+def normalize(text):
+    """Remove acentos e normaliza caixa ("João" -> "joao")."""
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+
+def parse_pp(value):
+    """Converte "123.45pp" (formato dos dados do DataManager) em float."""
+    try:
+        return float(str(value).replace("pp", "").strip())
+    except ValueError:
+        return 0.0
+
+
+# Filtros aceitos no texto da busca: "pp:300-500", "pp:300", "medalhas:10"
+_FILTER_RE = re.compile(r"(pp|medalhas):(\d+(?:\.\d+)?)?(?:-(\d+(?:\.\d+)?))?", re.IGNORECASE)
+
+
+def parse_query(text):
+    """
+    Separa o texto livre dos filtros. Ex: "joao pp:300-500 medalhas:10"
+    -> ("joao", {"min_pp": 300.0, "max_pp": 500.0, "min_medals": 10.0})
+    """
+    filters = {}
+
+    def collect(match):
+        field, low, high = match.group(1).lower(), match.group(2), match.group(3)
+        prefix = "pp" if field == "pp" else "medals"
+        if low is not None:
+            filters[f"min_{prefix}"] = float(low)
+        if high is not None:
+            filters[f"max_{prefix}"] = float(high)
+        return " "
+
+    query = _FILTER_RE.sub(collect, text or "")
+    return " ".join(query.split()), filters
+
+
+class PlayerSearchIndex:
+    """
+    Índice de busca em memória sobre os jogadores do snapshot do DataManager.
+
+    Construído uma vez por atualização; cada consulta faz apenas buscas binárias
+    em listas ordenadas (prefixo do nome/palavras/id e faixa de PP), sem acessar
+    o banco de dados.
+    """
+
+    def __init__(self, bsbr_data=None, scoresaber_data=None, player_details=None):
+        self.entries = []
+        self._keys = []         # [(chave_normalizada, idx)] ordenado para bisect
+        self._pp_sorted = []    # idx ordenados por PP BR crescente
+        self._pp_values = []    # PP BR crescente (paralelo a _pp_sorted)
+        if bsbr_data is not None or scoresaber_data is not None:
+            self.build(bsbr_data or [], scoresaber_data or [], player_details or {})
+
+    def build(self, bsbr_data, scoresaber_data, player_details):
+        players = {}
+
+        for row in scoresaber_data:
+            players[row["id"]] = {"id": row["id"], "name": row["name"], "ss": row, "bsbr": None}
+        for row in bsbr_data:
+            entry = players.setdefault(row["id"], {"id": row["id"], "name": row["name"], "ss": None, "bsbr": None})
+            entry["bsbr"] = row
+
+        entries = []
+        for entry in players.values():
+            detail = player_details.get(entry["id"])
+            entry["pp"] = parse_pp(entry["bsbr"]["pp"]) if entry["bsbr"] else 0.0
+            entry["medals"] = detail["total_medals"] if detail else 0
+            entry["order"] = (
+                entry["bsbr"]["pos"] if entry["bsbr"] else float("inf"),
+                entry["ss"]["pos"] if entry["ss"] else float("inf")
+            )
+            entries.append(entry)
+
+        # Ordem de exibição: ranking BR, depois ranking ScoreSaber
+        entries.sort(key=lambda e: e["order"])
+
+        keys = []
+        for idx, entry in enumerate(entries):
+            name = normalize(entry["name"])
+            keys.append((name, idx))
+            for token in name.split()[1:]:
+                keys.append((token, idx))
+            keys.append((str(entry["id"]), idx))
+        keys.sort()
+
+        pp_sorted = sorted(range(len(entries)), key=lambda i: entries[i]["pp"])
+
+        self.entries = entries
+        self._keys = keys
+        self._pp_sorted = pp_sorted
+        self._pp_values = [entries[i]["pp"] for i in pp_sorted]
+        return self
+
+    def _prefix_matches(self, prefix):
+        matches = set()
+        pos = bisect.bisect_left(self._keys, (prefix, -1))
+        while pos < len(self._keys) and self._keys[pos][0].startswith(prefix):
+            matches.add(self._keys[pos][1])
+            pos += 1
+        return matches
+
+    def search(self, query="", min_pp=None, max_pp=None, min_medals=None, max_medals=None, source="bsbr", limit=None):
+        """
+        Busca jogadores por prefixo do nome (qualquer palavra, sem acentos) ou id,
+        com filtros opcionais de PP BR e medalhas.
+
+        Args:
+            source (str): "bsbr" ou "ss" — define qual linha é retornada
+                (jogadores sem linha nessa fonte são ignorados).
+
+        Returns:
+            list: Linhas no formato de DataManager.bsbr_data / scoresaber_data.
+        """
+        candidates = None
+
+        terms = normalize(query).split()
+        for term in terms:
+            matched = self._prefix_matches(term)
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+
+        if min_pp is not None or max_pp is not None:
+            lo = bisect.bisect_left(self._pp_values, min_pp) if min_pp is not None else 0
+            hi = bisect.bisect_right(self._pp_values, max_pp) if max_pp is not None else len(self._pp_values)
+            in_range = set(self._pp_sorted[lo:hi])
+            candidates = in_range if candidates is None else candidates & in_range
+
+        indexes = sorted(candidates) if candidates is not None else range(len(self.entries))
+
+        results = []
+        for idx in indexes:
+            entry = self.entries[idx]
+            if min_medals is not None and entry["medals"] < min_medals:
+                continue
+            if max_medals is not None and entry["medals"] > max_medals:
+                continue
+            row = entry[source]
+            if row is None:
+                continue
+            results.append(row)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
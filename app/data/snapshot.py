@@ -0,0 +1,612 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+
+import orjson
+
+from app.data.database import DB_FOLDER
+
+# Snapshot binário versionado do estado calculado pelo DataManager.
+#
+# Layout (little-endian, seções alinhadas em 8 bytes):
+#   cabeçalho   magic "BSBRSNAP" | versão u16 | reservado u16 | nº seções u32 | geração u64 | criado em f64
+#   tabela      nº seções x (nome 24s | offset u64 | tamanho u64)
+#   seções      blobs JSON (meta, mapas, faixas de estrelas, deltas) e colunas
+#               tipadas + tabelas de strings (lidas direto do mmap)
+#
+# Tudo que cresce com o número de jogadores ou de scores é colunar: scores
+# globais, ranking BR e ScoreSaber, player_details, map_leaderboards e
+# recomendações. Essas seções viram views somente leitura que só montam um
+# jogador/leaderboard quando ele é acessado. Só o que é pequeno e de tamanho
+# fixo (meta, mapas ranqueados, faixas de estrelas, deltas) fica em JSON.
+#
+# Uma tabela cujo formato não bate com o esperado (campo a mais, tipo
+# diferente) é gravada como JSON com o mesmo nome, e o load_snapshot aceita
+# as duas formas.
+#
+# Cada geração vai para um arquivo próprio (snapshot-<geração>.bin) e o
+# arquivo "snapshot.current" aponta para o mais recente. Assim um processo
+# pode manter o arquivo antigo mapeado enquanto o worker publica um novo.
+
+SNAPSHOT_FOLDER = os.path.join(os.getcwd(), DB_FOLDER)
+
+MAGIC = b"BSBRSNAP"
+FORMAT_VERSION = 5
+KEEP_FILES = 2
+
+_HEADER = struct.Struct("<8sHHIQd")
+_SECTION = struct.Struct("<24sQQ")
+_ALIGN = 8
+_NULL = 0xFFFFFFFF  # índice de string ausente (None)
+
+# Seções JSON do estado
+_JSON_SECTIONS = ("meta", "maps_data", "star_buckets", "ranking_deltas")
+
+# Colunas dos scores globais: nome -> typecode do array
+_SCORE_COLUMNS = {
+    "gs.leaderboard_id": "q",
+    "gs.acc": "d",
+    "gs.pp": "d",
+    "gs.score": "q",
+    "gs.map_rank": "q",
+    "gs.map_name": "I",
+    "gs.map_cover": "I",
+    "gs.diff": "I",
+    "gs.stars": "I",
+}
+
+
+class _StringTable:
+    def __init__(self):
+        self.index = {}
+        self.offsets = array("I", [0])
+        self.data = bytearray()
+
+    def add(self, value):
+        if value is None:
+            return _NULL
+        value = str(value)
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.index)
+            self.index[value] = idx
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return idx
+
+
+def _encode_global_scores(global_scores_cache):
+    """Converte {player_id: [scores]} em colunas tipadas + tabela de strings."""
+    strings = _StringTable()
+    columns = {name: array(code) for name, code in _SCORE_COLUMNS.items()}
+    players = array("I")
+    player_start = array("I", [0])
+
+    for player_id, scores in global_scores_cache.items():
+        players.append(strings.add(player_id))
+        for s in scores:
+            columns["gs.leaderboard_id"].append(int(s["leaderboard_id"]))
+            columns["gs.acc"].append(float(s["acc"] or 0))
+            columns["gs.pp"].append(float(s["pp"] or 0))
+            columns["gs.score"].append(int(s["score"] or 0))
+            columns["gs.map_rank"].append(int(s["map_rank"] or 0))
+            columns["gs.map_name"].append(strings.add(s["map_name"]))
+            columns["gs.map_cover"].append(strings.add(s["map_cover"]))
+            columns["gs.diff"].append(strings.add(s["diff"]))
+            columns["gs.stars"].append(strings.add(s["stars"]))
+        player_start.append(len(columns["gs.pp"]))
+
+    sections = {name: col for name, col in columns.items()}
+    sections["gs.players"] = players
+    sections["gs.player_start"] = player_start
+    sections["gs.str_offsets"] = strings.offsets
+    sections["gs.str_data"] = bytes(strings.data)
+    return sections
+
+
+# Tabelas colunares: campos (nome, tipo) das linhas e, nas seções por
+# jogador/leaderboard, dos valores de cada chave. "s" vira índice na tabela de
+# strings, "i" int64, "f" float64 (None -> NaN) e _ROWS marca a lista de linhas.
+_ROWS = "rows"
+_TYPECODES = {"s": "I", "i": "q", "f": "d"}
+
+
+class _Table:
+    def __init__(self, prefix, rows, keyed=False, group=None, as_dict=True):
+        self.prefix = prefix
+        self.rows = rows          # campos de cada linha
+        self.keyed = keyed        # {chave: ...} em vez de lista
+        self.group = group        # campos do valor de cada chave (None: o valor é a lista)
+        self.as_dict = as_dict    # linhas como dict (senão lista na ordem dos campos)
+
+
+_RANKING_ROW = (("pos", "i"), ("name", "s"), ("id", "s"), ("profilePicture", "s"), ("pp", "s"))
+
+_TABLES = {
+    "bsbr_data": _Table("bsbr", _RANKING_ROW),
+    "scoresaber_data": _Table("ss", (("id", "s"), ("profilePicture", "s"), ("pos", "i"), ("name", "s"), ("pp", "s"))),
+    "player_details": _Table(
+        "pd",
+        (("leaderboard_id", "s"), ("map_name", "s"), ("map_cover", "s"), ("diff", "s"), ("stars", "s"),
+         ("acc", "f"), ("pp", "f"), ("score", "i"), ("map_rank", "i"), ("weighted_pp", "f")),
+        keyed=True, group=(("scores", _ROWS), ("total_medals", "i"))
+    ),
+    # [player_id, player_name, score, acc, pp, time_set]
+    "map_leaderboards": _Table("ml", (("", "s"), ("", "s"), ("", "i"), ("", "f"), ("", "f"), ("", "s")), keyed=True, as_dict=False),
+    # {"acc": ..., "maps": [[leaderboard_id, pp, acc, pp atual]]}
+    "recommendations": _Table("rec", (("", "s"), ("", "f"), ("", "f"), ("", "f")), keyed=True, group=(("acc", "f"), ("maps", _ROWS)), as_dict=False),
+}
+
+
+class _Unencodable(Exception):
+    """A seção não tem o formato da tabela colunar; vai como JSON."""
+
+
+def _encode_value(kind, value, strings):
+    if kind == "s":
+        if value is not None and not isinstance(value, str):
+            raise _Unencodable(kind)
+        return strings.add(value)
+    if kind == "i":
+        if type(value) is not int:
+            raise _Unencodable(kind)
+        return value
+    if value is None:
+        return float("nan")
+    if type(value) is not float or value != value:
+        raise _Unencodable(kind)
+    return value
+
+
+def _encode_table(table, value, strings):
+    """Converte uma seção em colunas; levanta _Unencodable se o formato não bate."""
+    p = table.prefix
+    row_cols = [array(_TYPECODES[kind]) for _, kind in table.rows]
+    sections = {f"{p}.r{i}": col for i, col in enumerate(row_cols)}
+
+    def add_rows(rows):
+        if not isinstance(rows, Sequence) or isinstance(rows, str):
+            raise _Unencodable(p)
+        for row in rows:
+            if not isinstance(row, Mapping if table.as_dict else list) or len(row) != len(table.rows):
+                raise _Unencodable(p)
+            values = [row[name] for name, _ in table.rows] if table.as_dict else row
+            for (_, kind), v, col in zip(table.rows, values, row_cols):
+                col.append(_encode_value(kind, v, strings))
+
+    if not table.keyed:
+        add_rows(value)
+        return sections
+
+    if not isinstance(value, Mapping):
+        raise _Unencodable(p)
+    keys = array("I")
+    start = array("I", [0])
+    group_cols = [array(_TYPECODES[kind]) for _, kind in table.group or () if kind != _ROWS]
+    for key, item in value.items():
+        if not isinstance(key, str):
+            raise _Unencodable(p)
+        keys.append(strings.add(key))
+        if table.group is None:
+            add_rows(item)
+        else:
+            if not isinstance(item, Mapping) or len(item) != len(table.group):
+                raise _Unencodable(p)
+            cols = iter(group_cols)
+            for name, kind in table.group:
+                if kind == _ROWS:
+                    add_rows(item[name])
+                else:
+                    next(cols).append(_encode_value(kind, item[name], strings))
+        start.append(len(row_cols[0]))
+
+    sections[f"{p}.keys"] = keys
+    sections[f"{p}.start"] = start
+    for i, col in enumerate(group_cols):
+        sections[f"{p}.g{i}"] = col
+    return sections
+
+
+def _to_bytes(value):
+    if isinstance(value, array):
+        if sys.byteorder != "little":
+            value = array(value.typecode, value)
+            value.byteswap()
+        return value.tobytes()
+    return bytes(value)
+
+
+def _pad(length):
+    return (-length) % _ALIGN
+
+
+def save_snapshot(state, folder=SNAPSHOT_FOLDER):
+    """
+    Grava o estado em um novo arquivo versionado e atualiza o ponteiro
+    "snapshot.current" de forma atômica. Retorna o caminho do arquivo.
+    """
+    generation = int(state.get("generation") or 0)
+    last_updated = state.get("last_updated")
+    meta = {
+        "last_updated": last_updated.isoformat() if isinstance(last_updated, datetime) else last_updated,
+        "last_api_calls": state.get("last_api_calls", {})
+    }
+
+    blobs = {"meta": orjson.dumps(meta)}
+    for name in _JSON_SECTIONS[1:]:
+        blobs[name] = orjson.dumps(state.get(name) or ({} if name == "star_buckets" else []))
+    for name, value in _encode_global_scores(state.get("global_scores_cache") or {}).items():
+        blobs[name] = _to_bytes(value)
+
+    strings = _StringTable()
+    for name, table in _TABLES.items():
+        value = state.get(name) or ({} if table.keyed else [])
+        try:
+            columns = _encode_table(table, value, strings)
+        except (_Unencodable, KeyError, TypeError, OverflowError):
+            print(f"Snapshot: {name} fora do formato colunar; gravando como JSON.")
+            blobs[name] = orjson.dumps(_plain(value))
+            continue
+        for section, column in columns.items():
+            blobs[section] = _to_bytes(column)
+    blobs["tb.str_offsets"] = _to_bytes(strings.offsets)
+    blobs["tb.str_data"] = bytes(strings.data)
+
+    # Calcula os offsets: cabeçalho + tabela + seções alinhadas
+    table_size = _HEADER.size + _SECTION.size * len(blobs)
+    offset = table_size + _pad(table_size)
+    table = []
+    for name, blob in blobs.items():
+        table.append((name, offset, len(blob)))
+        offset += len(blob) + _pad(len(blob))
+
+    filename = f"snapshot-{generation}.bin"
+    path = os.path.join(folder, filename)
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(blobs), generation, datetime.now().timestamp()))
+        for name, sec_offset, length in table:
+            f.write(_SECTION.pack(name.encode("ascii"), sec_offset, length))
+        f.write(b"\0" * _pad(table_size))
+        for name, _, length in table:
+            f.write(blobs[name])
+            f.write(b"\0" * _pad(length))
+    os.replace(tmp_path, path)
+
+    # Troca o ponteiro por último: leitores só enxergam arquivos completos
+    pointer_tmp = os.path.join(folder, "snapshot.current.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(filename)
+    os.replace(pointer_tmp, os.path.join(folder, "snapshot.current"))
+
+    _cleanup_old_files(folder, keep=filename)
+    return path
+
+
+def _plain(value):
+    """Views de um snapshot carregado viram dict/list para o orjson."""
+    if isinstance(value, Mapping):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, (str, list)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _cleanup_old_files(folder, keep):
+    files = sorted(
+        (f for f in os.listdir(folder) if f.startswith("snapshot-") and f.endswith(".bin")),
+        key=lambda f: os.path.getmtime(os.path.join(folder, f)),
+        reverse=True
+    )
+    for old in files[KEEP_FILES:]:
+        if old == keep:
+            continue
+        try:
+            os.remove(os.path.join(folder, old))
+        except OSError:
+            # Ainda mapeado por outro processo (Windows); fica para a próxima
+            pass
+
+
+def _column(view, section, code):
+    offset, length = section
+    column = view[offset:offset + length]
+    if sys.byteorder != "little":
+        values = array(code, column.tobytes())
+        values.byteswap()
+        return values
+    return column.cast(code)
+
+
+class _Strings:
+    """Tabela de strings de um snapshot; cada string é decodificada uma vez."""
+
+    def __init__(self, view, sections, prefix):
+        self._offsets = _column(view, sections[f"{prefix}.str_offsets"], "I")
+        offset, length = sections[f"{prefix}.str_data"]
+        self._data = view[offset:offset + length]
+        self._cache = {}
+
+    def get(self, idx):
+        if idx == _NULL:
+            return None
+        value = self._cache.get(idx)
+        if value is None:
+            start, end = self._offsets[idx], self._offsets[idx + 1]
+            value = bytes(self._data[start:end]).decode("utf-8")
+            self._cache[idx] = value
+        return value
+
+
+class GlobalScoresView(Mapping):
+    """
+    {player_id: [scores]} somente leitura sobre as colunas do snapshot em mmap.
+    As listas de dicts só são montadas quando um jogador é acessado.
+    """
+
+    def __init__(self, mm, sections):
+        self._mm = mm  # mantém o mapeamento vivo enquanto houver views
+        view = memoryview(mm)
+        self._cols = {}
+        for name, code in _SCORE_COLUMNS.items():
+            self._cols[name] = _column(view, sections[name], code)
+        self._strings = _Strings(view, sections, "gs")
+        self._player_start = _column(view, sections["gs.player_start"], "I")
+
+        players = _column(view, sections["gs.players"], "I")
+        self._players = {self._strings.get(idx): i for i, idx in enumerate(players)}
+
+    def __getitem__(self, player_id):
+        i = self._players[player_id]
+        c = self._cols
+        s = self._strings.get
+        scores = []
+        for row in range(self._player_start[i], self._player_start[i + 1]):
+            scores.append({
+                "map_name": s(c["gs.map_name"][row]),
+                "map_cover": s(c["gs.map_cover"][row]),
+                "diff": s(c["gs.diff"][row]),
+                "stars": s(c["gs.stars"][row]),
+                "acc": c["gs.acc"][row],
+                "pp": c["gs.pp"][row],
+                "score": c["gs.score"][row],
+                "map_rank": c["gs.map_rank"][row],
+                "leaderboard_id": c["gs.leaderboard_id"][row]
+            })
+        return scores
+
+    def __iter__(self):
+        return iter(self._players)
+
+    def __len__(self):
+        return len(self._players)
+
+
+class _TableColumns:
+    """Colunas de uma tabela do snapshot; monta linhas e valores por chave."""
+
+    def __init__(self, mm, sections, table, strings):
+        self._mm = mm
+        self.table = table
+        self.strings = strings
+        view = memoryview(mm)
+        p = table.prefix
+        self.rows = [_column(view, sections[f"{p}.r{i}"], _TYPECODES[kind]) for i, (_, kind) in enumerate(table.rows)]
+        if table.keyed:
+            self.keys = _column(view, sections[f"{p}.keys"], "I")
+            self.start = _column(view, sections[f"{p}.start"], "I")
+            group = [kind for _, kind in table.group or () if kind != _ROWS]
+            self.group = [_column(view, sections[f"{p}.g{i}"], _TYPECODES[kind]) for i, kind in enumerate(group)]
+
+    def _value(self, kind, raw):
+        if kind == "s":
+            return self.strings.get(raw)
+        if kind == "f" and raw != raw:
+            return None
+        return raw
+
+    def values(self, field):
+        """Valores de um campo em todas as linhas, sem montar as linhas."""
+        i = next(i for i, (name, _) in enumerate(self.table.rows) if name == field)
+        kind = self.table.rows[i][1]
+        return [self._value(kind, raw) for raw in self.rows[i]]
+
+    def row(self, r):
+        fields = self.table.rows
+        values = [self._value(kind, col[r]) for (_, kind), col in zip(fields, self.rows)]
+        if self.table.as_dict:
+            return dict(zip((name for name, _ in fields), values))
+        return values
+
+    def item(self, g):
+        rows = [self.row(r) for r in range(self.start[g], self.start[g + 1])]
+        if self.table.group is None:
+            return rows
+        value = {}
+        cols = iter(self.group)
+        for name, kind in self.table.group:
+            value[name] = rows if kind == _ROWS else self._value(kind, next(cols)[g])
+        return value
+
+
+class TableRowsView(Sequence):
+    """Lista somente leitura de linhas (ranking) montadas sob demanda."""
+
+    def __init__(self, columns):
+        self._columns = columns
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._columns.rows[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        row = self._cache.get(index)
+        if row is None:
+            row = self._cache[index] = self._columns.row(index)
+        return row
+
+
+class TableView(Mapping):
+    """{chave: valor} somente leitura; cada valor é montado no primeiro acesso."""
+
+    def __init__(self, columns):
+        self._columns = columns
+        self._index = None
+        self._cache = {}
+
+    def _keys(self):
+        if self._index is None:
+            get = self._columns.strings.get
+            self._index = {get(idx): g for g, idx in enumerate(self._columns.keys)}
+        return self._index
+
+    def __getitem__(self, key):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = self._columns.item(self._keys()[key])
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._columns.keys)
+
+
+def _current_path(folder):
+    pointer = os.path.join(folder, "snapshot.current")
+    try:
+        with open(pointer, "r", encoding="utf-8") as f:
+            return os.path.join(folder, f.read().strip())
+    except OSError:
+        return None
+
+
+def _open(path):
+    """(mmap, geração, {seção: (offset, tamanho)}) do arquivo, ou None se o formato não bate."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, _, count, generation, _ = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            print(f"Snapshot: Formato incompatível em {path} (versão {version}).")
+            mm.close()
+            return None
+
+        sections = {}
+        for i in range(count):
+            name, offset, length = _SECTION.unpack_from(mm, _HEADER.size + i * _SECTION.size)
+            sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+        return mm, generation, sections
+    except (ValueError, struct.error):
+        mm.close()
+        raise
+
+
+def _close(mm):
+    if mm is None:
+        return
+    try:
+        mm.close()
+    except BufferError:
+        # Alguma view já exporta o mapeamento; o GC fecha depois
+        pass
+
+
+def load_snapshot(folder=SNAPSHOT_FOLDER):
+    """
+    Mapeia o snapshot mais recente e devolve o estado. Só as seções JSON
+    pequenas (meta, mapas, faixas de estrelas, deltas) são decodificadas na
+    hora; ranking, player_details, map_leaderboards, recomendações e scores
+    globais são views sobre o mmap. Retorna None se não houver snapshot válido.
+    """
+    path = _current_path(folder)
+    if not path or not os.path.exists(path):
+        return None
+
+    mm = None
+    try:
+        opened = _open(path)
+        if opened is None:
+            return None
+        mm, generation, sections = opened
+
+        state = {"generation": generation}
+        for name in _JSON_SECTIONS:
+            offset, length = sections[name]
+            state[name] = orjson.loads(mm[offset:offset + length])
+
+        strings = _Strings(memoryview(mm), sections, "tb")
+        for name, table in _TABLES.items():
+            if name in sections:
+                offset, length = sections[name]
+                state[name] = orjson.loads(mm[offset:offset + length])
+                continue
+            columns = _TableColumns(mm, sections, table, strings)
+            state[name] = TableView(columns) if table.keyed else TableRowsView(columns)
+
+        meta = state.pop("meta")
+        state["last_updated"] = datetime.fromisoformat(meta["last_updated"]) if meta.get("last_updated") else None
+        state["last_api_calls"] = meta.get("last_api_calls", {})
+        state["global_scores_cache"] = GlobalScoresView(mm, sections)
+        return state
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        print(f"Snapshot: Erro ao ler {path}: {e}")
+        _close(mm)
+        return None
+
+
+def load_player_names(folder=SNAPSHOT_FOLDER):
+    """
+    {id: nome} dos rankings ScoreSaber e BR do snapshot (o BR prevalece),
+    lendo só as colunas de id e nome. Vazio se não houver snapshot válido.
+    """
+    path = _current_path(folder)
+    if not path or not os.path.exists(path):
+        return {}
+
+    mm = None
+    try:
+        opened = _open(path)
+        if opened is None:
+            return {}
+        mm, _, sections = opened
+        return _read_names(mm, sections)
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        print(f"Snapshot: Erro ao ler {path}: {e}")
+        return {}
+    finally:
+        _close(mm)
+
+
+def _read_names(mm, sections):
+    # As views sobre o mmap morrem no retorno, e o load_player_names consegue fechá-lo
+    names = {}
+    strings = _Strings(memoryview(mm), sections, "tb")
+    for name in ("scoresaber_data", "bsbr_data"):
+        if name in sections:
+            offset, length = sections[name]
+            names.update((p["id"], p["name"]) for p in orjson.loads(mm[offset:offset + length]))
+            continue
+        columns = _TableColumns(mm, sections, _TABLES[name], strings)
+        names.update(zip(columns.values("id"), columns.values("name")))
+    return names
+
+
+def snapshot_mtime(folder=SNAPSHOT_FOLDER):
+    """Momento da última publicação (mtime do ponteiro), ou None."""
+    try:
+        return os.stat(os.path.join(folder, "snapshot.current")).st_mtime_ns
+    except OSError:
+        return None
@@ -0,0 +1,87 @@
+from array import array
+
+from app.ppcalc.compute import best_in_ranges
+
+STAR_STEP = 0.5
+
+
+def build_star_buckets(source_data, player_lookup, allowed_maps=None, workers=None):
+    """
+    Melhor score (maior PP) por faixa de estrelas (0.00-0.50, 0.50-1.00, ...).
+    Mesma lógica de generate_star_ranking em app.ranking.
+
+    Args:
+        source_data (dict): {player_id: [scores]} no formato de PlayerScore.to_dict().
+        player_lookup (dict): {player_id: (nome, avatar)}.
+        allowed_maps (set): Se informado, apenas scores cujo (map_name, diff, stars)
+            esteja no conjunto são considerados (mapas BR).
+        workers (int): Processos usados na busca do máximo por faixa.
+
+    Returns:
+        list: [{"range": "x.xx-y.yy", "data": {...}}] ordenado por faixa.
+    """
+    # Candidatos em colunas (estrelas, PP) + referência ao score original
+    stars = array("d")
+    pps = array("d")
+    candidates = []
+
+    for player_id, scores_list in source_data.items():
+        for score in scores_list:
+            # Se for para filtrar apenas mapas BR e o mapa não estiver na lista, pula
+            if allowed_maps is not None and (score["map_name"], score["diff"], score["stars"]) not in allowed_maps:
+                continue
+
+            if score["pp"] <= 0:
+                continue
+
+            try:
+                stars_val = float(str(score["stars"]).replace("★", ""))
+            except ValueError:
+                continue
+
+            if stars_val == 0:
+                continue
+
+            stars.append(stars_val)
+            pps.append(score["pp"])
+            candidates.append((player_id, score))
+
+    # Chave: range_start (float), Valor: (pp, índice do candidato)
+    best_scores_by_range = best_in_ranges(stars, pps, STAR_STEP, workers=workers)
+
+    final_list = []
+    for r_start in sorted(best_scores_by_range.keys()):
+        r_end = r_start + STAR_STEP
+        player_id, score = candidates[best_scores_by_range[r_start][1]]
+        player_name, player_avatar = player_lookup.get(player_id, ("Desconhecido", None))
+        final_list.append({
+            "range": f"{r_start:.2f}-{r_end:.2f}",
+            "data": {
+                "player_name": player_name,
+                "player_avatar": player_avatar,
+                "pp": score["pp"],
+                "acc": score["acc"],
+                "stars": score["stars"],
+                "map_name": score["map_name"],
+                "diff": score["diff"],
+                "cover": score["map_cover"]
+            }
+        })
+
+    return final_list
+
+
+def build_all_star_buckets(maps_data, player_details, global_scores_cache, bsbr_data, scoresaber_data, workers=None):
+    """Monta as duas listas da StarsRankingView: mapas BR e ScoreSaber (geral)."""
+    # Ranking BR tem prioridade para nome/avatar
+    player_lookup = {p["id"]: (p["name"], p["profilePicture"]) for p in scoresaber_data}
+    player_lookup.update({p["id"]: (p["name"], p["profilePicture"]) for p in bsbr_data})
+
+    # O score salvo em player_details tem: map_name, diff, stars
+    allowed_maps = {(m["name"], m["diff"], m["stars"]) for m in maps_data}
+    br_scores = {pid: details["scores"] for pid, details in player_details.items()}
+
+    return {
+        "br": build_star_buckets(br_scores, player_lookup, allowed_maps, workers=workers),
+        "global": build_star_buckets(global_scores_cache, player_lookup, workers=workers)
+    }
@@ -0,0 +1,54 @@
+import json
+import os
+
+from app.data.database import DB_FOLDER
+
+# Pedidos de atualização parcial feitos fora do processo de atualização
+# (ex: commands.py após importar mapas). O processo que detém o lock de
+# atualização consome o arquivo entre um ciclo e outro.
+
+REQUESTS_PATH = os.path.join(DB_FOLDER, "update_request.json")
+
+
+def request_update(leaderboards=(), reprice=(), path=REQUESTS_PATH):
+    """
+    Registra pedidos de atualização sem esperar o próximo ciclo completo.
+    Pedidos ainda não consumidos são somados.
+
+    Args:
+        leaderboards: Leaderboards novos (baixados e incluídos no ranking).
+        reprice: Leaderboards com estrelas alteradas (PP recalculado sem rede).
+    """
+    pending = _read(path)
+    merged = {
+        "leaderboards": sorted(set(pending.get("leaderboards", [])) | {str(lb) for lb in leaderboards}),
+        "reprice": sorted(set(pending.get("reprice", [])) | {str(lb) for lb in reprice})
+    }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f)
+    os.replace(tmp_path, path)
+
+
+def take_requests(path=REQUESTS_PATH):
+    """Consome os pedidos pendentes: {"leaderboards": [...], "reprice": [...]} ou None."""
+    if not os.path.exists(path):
+        return None
+    # Renomeia antes de ler: um pedido gravado durante a leitura fica para a próxima
+    taken_path = f"{path}.taken"
+    try:
+        os.replace(path, taken_path)
+    except OSError:
+        return None
+    pending = _read(taken_path)
+    os.remove(taken_path)
+    return pending
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+import time
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# Métricas do processo (formato texto do Prometheus) e histórico dos últimos
+# ciclos de atualização. Sem dependências externas.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# Ciclos mantidos em memória
+HISTORY_SIZE = 20
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        with self.lock:
+            self.values[self._key(labels)] += amount
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in sorted(self.values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.values = {}
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in sorted(self.values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def _samples(self):
+        lines = []
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labels, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "bsbr_http_requests_total", "Chamadas HTTP às APIs externas por endpoint e status.", ("endpoint", "status")
+)
+http_latency = registry.histogram(
+    "bsbr_http_request_duration_seconds", "Latência das chamadas HTTP às APIs externas.", ("endpoint",)
+)
+http_retries = registry.counter(
+    "bsbr_http_retries_total", "Novas tentativas de chamadas HTTP.", ("endpoint", "reason")
+)
+circuit_rejections = registry.counter(
+    "bsbr_http_circuit_open_total", "Chamadas recusadas pelo circuit breaker (sem acessar a rede).", ("endpoint",)
+)
+rate_limit_wait = registry.histogram(
+    "bsbr_rate_limit_wait_seconds", "Tempo bloqueado no rate limiter antes de cada chamada.", ("endpoint",)
+)
+refresh_phase = registry.histogram(
+    "bsbr_refresh_phase_duration_seconds", "Duração de cada fase do ciclo de atualização.", ("phase",)
+)
+refresh_cycles = registry.counter(
+    "bsbr_refresh_cycles_total", "Ciclos de atualização por resultado.", ("result",)
+)
+refresh_last_success = registry.gauge(
+    "bsbr_refresh_last_success_timestamp_seconds", "Momento (unix) do último ciclo bem-sucedido."
+)
+snapshot_generation = registry.gauge(
+    "bsbr_snapshot_generation", "Geração do snapshot publicado neste processo."
+)
+
+
+class CycleHistory:
+    """
+    Histórico dos últimos ciclos de atualização: duração por fase, chamadas
+    HTTP por endpoint/status e tempo de espera no rate limiter.
+    """
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.cycles = deque(maxlen=size)
+        self.current = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            self.current = {
+                "started": datetime.now().isoformat(),
+                "_start": time.perf_counter(),
+                "phases": defaultdict(float),
+                "http": defaultdict(int),
+                "retries": 0,
+                "rate_limit_wait": 0.0
+            }
+
+    def finish(self, result):
+        with self.lock:
+            cycle = self.current
+            if cycle is None:
+                return None
+            self.current = None
+            cycle["duration"] = time.perf_counter() - cycle.pop("_start")
+            cycle["result"] = result
+            cycle["phases"] = dict(cycle["phases"])
+            cycle["http"] = dict(cycle["http"])
+            self.cycles.append(cycle)
+            return cycle
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            if self.current is not None:
+                self.current["phases"][name] += seconds
+
+    def add_http(self, endpoint, status, wait_seconds):
+        with self.lock:
+            if self.current is not None:
+                self.current["http"][f"{endpoint}:{status}"] += 1
+                self.current["rate_limit_wait"] += wait_seconds
+
+    def add_retry(self):
+        with self.lock:
+            if self.current is not None:
+                self.current["retries"] += 1
+
+    def to_list(self):
+        with self.lock:
+            return list(self.cycles)
+
+
+history = CycleHistory()
+
+
+@contextmanager
+def span(phase):
+    """Mede a duração de uma fase do ciclo (histograma + histórico do ciclo atual)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        refresh_phase.observe(elapsed, phase=phase)
+        history.add_phase(phase, elapsed)
+
+
+def start_cycle():
+    history.start()
+
+
+def finish_cycle(result):
+    """Fecha o ciclo atual. `result`: "ok", "partial" (não publicado) ou "error"."""
+    refresh_cycles.inc(result=result)
+    if result == "ok":
+        refresh_last_success.set(time.time())
+    return history.finish(result)
+
+
+def record_http(endpoint, status, seconds, wait_seconds=0.0):
+    """Registra uma chamada HTTP (status numérico ou "error" para falha de conexão)."""
+    http_requests.inc(endpoint=endpoint, status=status)
+    http_latency.observe(seconds, endpoint=endpoint)
+    rate_limit_wait.observe(wait_seconds, endpoint=endpoint)
+    history.add_http(endpoint, status, wait_seconds)
+
+
+def record_retry(endpoint, reason):
+    http_retries.inc(endpoint=endpoint, reason=reason)
+    history.add_retry()
+
+
+# --- Exportação entre processos (modo worker) ---
+
+def save(path):
+    """Grava as métricas e o histórico para o servidor web (modo worker)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"prometheus": registry.render(), "history": history.to_list()}, f)
+    os.replace(tmp_path, path)
+
+
+def load(path):
+    """Lê o arquivo gravado por `save`, ou None."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
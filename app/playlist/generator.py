@@ -2,6 +2,7 @@ import json
 import base64
 import os
 import requests
+from app.config import AppConfig
 from collections import defaultdict
 from app.data.database import get_db
 from app.data.models.ranked_br_maps import RankedBRMaps
@@ -9,7 +10,7 @@ from app.data.models.ranked_br_maps import RankedBRMaps
 def get_hash_from_scoresaber(leaderboard_id):
     """Busca o hash do mapa usando a API do ScoreSaber."""
     try:
-        url = f"https://scoresaber.com/api/leaderboard/by-id/{leaderboard_id}/info"
+        url = f"{AppConfig.SCORESABER_API_URL}/leaderboard/by-id/{leaderboard_id}/info"
         response = requests.get(url, timeout=5)
         if response.status_code == 200:
             return response.json().get("songHash")
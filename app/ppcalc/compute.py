@@ -0,0 +1,352 @@
+import math
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from app.scorecalc import get_pp, get_total_weighted_pp, WEIGHT_COEFFICIENT
+from app.ppcalc.medals import medal_points
+
+# Fase de cálculo do ranking BR (depois do crawl), fora da thread do updater.
+#
+# Os dados vão para os processos como arrays compactos (stars, max_score,
+# modifiedScore, NF, jogador) e voltam como arrays; os dicts finais são
+# montados só no processo pai.
+
+# Abaixo disso o custo de serializar para os processos não compensa
+MIN_PARALLEL_ROWS = 20000
+CHUNKS_PER_WORKER = 4
+
+_pool = None
+_pool_workers = 0
+
+
+def get_pool(workers=None):
+    """ProcessPoolExecutor compartilhado (criado sob demanda)."""
+    global _pool, _pool_workers
+    workers = workers or os.cpu_count() or 1
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        # "spawn": o pai tem threads (updater, sessões), e um fork copiaria
+        # locks presos; os filhos só importam os módulos de cálculo
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_workers = workers
+    return _pool
+
+
+def _split(starts, parts):
+    """Divide [0, len(starts)-1) em até `parts` faixas com quantidade parecida de linhas."""
+    total = starts[-1]
+    count = len(starts) - 1
+    if count == 0:
+        return []
+    target = max(1, math.ceil(total / parts))
+    ranges = []
+    lo = 0
+    for i in range(1, count + 1):
+        if starts[i] - starts[lo] >= target or i == count:
+            ranges.append((lo, i))
+            lo = i
+    return ranges
+
+
+def _run(func, tasks, workers):
+    """Executa `func(*args)` para cada tarefa, em processos quando vale a pena."""
+    rows = sum(len(task[-1]) for task in tasks)
+    if workers == 1 or len(tasks) <= 1 or rows < MIN_PARALLEL_ROWS:
+        return [func(*task) for task in tasks]
+    return list(get_pool(workers).map(func, *zip(*tasks)))
+
+
+def score_maps_chunk(stars, max_scores, starts, scores, nf):
+    """
+    Acc, PP e posição no mapa de cada score (linhas NF ficam com posição 0).
+
+    Args:
+        stars, max_scores: Um valor por mapa do bloco.
+        starts: Offsets (relativos ao bloco) das linhas de cada mapa, len = mapas + 1.
+        scores, nf: modifiedScore e flag de No Fail por linha.
+    """
+    acc_out = array("d")
+    pp_out = array("d")
+    rank_out = array("I")
+    for m in range(len(stars)):
+        map_stars = stars[m]
+        max_score = max_scores[m]
+        rank = 0
+        for r in range(starts[m], starts[m + 1]):
+            if nf[r]:
+                acc_out.append(0.0)
+                pp_out.append(0.0)
+                rank_out.append(0)
+                continue
+            accuracy = (scores[r] / max_score) * 100 if max_score > 0 else 0
+            rank += 1
+            acc_out.append(accuracy)
+            pp_out.append(get_pp(map_stars, accuracy))
+            rank_out.append(rank)
+    return acc_out, pp_out, rank_out
+
+
+def reprice_chunk(stars, starts, accs):
+    """PP de cada linha com as estrelas (novas) do seu mapa, a partir da acc guardada."""
+    pp_out = array("d")
+    for m in range(len(stars)):
+        map_stars = stars[m]
+        for r in range(starts[m], starts[m + 1]):
+            pp_out.append(get_pp(map_stars, accs[r]))
+    return pp_out
+
+
+def reprice_maps(stars, starts, accs, workers=None):
+    """Versão em blocos de reprice_chunk (mesma divisão por mapas do compute_ranking)."""
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for lo, hi in _split(starts, workers * CHUNKS_PER_WORKER):
+        r0, r1 = starts[lo], starts[hi]
+        tasks.append((stars[lo:hi], array("I", (s - r0 for s in starts[lo:hi + 1])), accs[r0:r1]))
+    pps = array("d")
+    for part in _run(reprice_chunk, tasks, workers):
+        pps.extend(part)
+    return pps
+
+
+def rank_players(starts, ranks, pps, workers=None):
+    """
+    Versão em blocos de rank_players_chunk.
+
+    Returns:
+        tuple: (ordem das linhas, weighted_pp na nova ordem, PP total por
+            jogador, medalhas por jogador), com linhas indexadas como em `pps`.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    ranges = _split(starts, workers * CHUNKS_PER_WORKER)
+    for lo, hi in ranges:
+        r0, r1 = starts[lo], starts[hi]
+        tasks.append((array("I", (s - r0 for s in starts[lo:hi + 1])), ranks[r0:r1], pps[r0:r1]))
+
+    order = array("I")
+    weighted = array("d")
+    totals = array("d")
+    medals = array("I")
+    for (lo, hi), (part_order, part_weighted, part_totals, part_medals) in zip(ranges, _run(rank_players_chunk, tasks, workers)):
+        base = starts[lo]
+        order.extend(base + i for i in part_order)
+        weighted.extend(part_weighted)
+        totals.extend(part_totals)
+        medals.extend(part_medals)
+    return order, weighted, totals, medals
+
+
+def rank_players_chunk(starts, ranks, pps):
+    """
+    Ordena os scores de cada jogador por PP e calcula pesos, total e medalhas.
+
+    Returns:
+        tuple: (ordem das linhas relativa ao bloco, weighted_pp na nova ordem,
+            PP total por jogador, medalhas por jogador)
+    """
+    order = array("I")
+    weighted = array("d")
+    totals = array("d")
+    medals = array("I")
+    for p in range(len(starts) - 1):
+        lo, hi = starts[p], starts[p + 1]
+        idx = sorted(range(lo, hi), key=pps.__getitem__, reverse=True)
+        sorted_pps = [pps[i] for i in idx]
+        order.extend(idx)
+        weighted.extend(pp * (WEIGHT_COEFFICIENT ** i) for i, pp in enumerate(sorted_pps))
+        totals.append(get_total_weighted_pp(sorted_pps))
+        medals.append(sum(medal_points(ranks[i]) for i in range(lo, hi)))
+    return order, weighted, totals, medals
+
+
+def player_totals_chunk(starts, pps):
+    """PP total (ponderado) de cada jogador; os scores de cada um podem vir fora de ordem."""
+    totals = array("d")
+    for p in range(len(starts) - 1):
+        totals.append(get_total_weighted_pp(sorted(pps[starts[p]:starts[p + 1]], reverse=True)))
+    return totals
+
+
+def player_totals(starts, pps, workers=None):
+    """Versão em blocos de player_totals_chunk (só o total, sem ordem nem medalhas)."""
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for lo, hi in _split(starts, workers * CHUNKS_PER_WORKER):
+        r0, r1 = starts[lo], starts[hi]
+        tasks.append((array("I", (s - r0 for s in starts[lo:hi + 1])), pps[r0:r1]))
+    totals = array("d")
+    for part in _run(player_totals_chunk, tasks, workers):
+        totals.extend(part)
+    return totals
+
+
+def best_in_ranges_chunk(offset, step, stars, pps):
+    """Maior PP por faixa de estrelas: {range_start: (pp, linha)} (empate fica com a primeira linha)."""
+    best = {}
+    for i in range(len(pps)):
+        range_start = math.floor(stars[i] / step) * step
+        current = best.get(range_start)
+        if current is None or pps[i] > current[0]:
+            best[range_start] = (pps[i], offset + i)
+    return best
+
+
+def best_in_ranges(stars, pps, step, workers=None):
+    """Versão em blocos de best_in_ranges_chunk, com merge no processo pai."""
+    workers = workers or os.cpu_count() or 1
+    size = max(1, math.ceil(len(pps) / (workers * CHUNKS_PER_WORKER)))
+    tasks = [
+        (lo, step, stars[lo:lo + size], pps[lo:lo + size])
+        for lo in range(0, len(pps), size)
+    ]
+    best = {}
+    for partial in _run(best_in_ranges_chunk, tasks, workers):
+        for range_start, candidate in partial.items():
+            current = best.get(range_start)
+            if current is None or candidate[0] > current[0]:
+                best[range_start] = candidate
+    return best
+
+
+def compute_ranking(maps, leaderboard_scores, workers=None):
+    """
+    Calcula o ranking BR a partir dos scores crus de cada leaderboard.
+
+    Args:
+        maps (list): [{"leaderboard_id", "stars", "max_score"}] na ordem do crawl.
+        leaderboard_scores (dict): {leaderboard_id: scores da API}.
+        workers (int): Processos usados (padrão: núcleos da máquina).
+
+    Returns:
+        dict: "ranking" e "map_scores" no formato de rank_calculator, e
+            "player_scores": {player_id: {"scores": [...], "total_medals"}} com os
+            scores de cada jogador já ordenados por PP e com weighted_pp.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    # 1. Empacota em colunas
+    player_index = {}
+    players = []
+    lb_ids = []
+    stars = array("d")
+    max_scores = array("q")
+    lb_start = array("I", [0])
+    map_col = array("I")
+    player_col = array("I")
+    score_col = array("q")
+    nf_col = array("B")
+    times = []
+
+    for map_obj in maps:
+        lb_ids.append(map_obj["leaderboard_id"])
+        stars.append(float(map_obj["stars"]))
+        max_scores.append(int(map_obj["max_score"] or 0))
+        for score in leaderboard_scores.get(map_obj["leaderboard_id"], []):
+            info = score["leaderboardPlayerInfo"]
+            idx = player_index.get(info["id"])
+            if idx is None:
+                idx = player_index[info["id"]] = len(players)
+                players.append({
+                    "id": info["id"],
+                    "profilePicture": info["profilePicture"],
+                    "name": info["name"],
+                    "country": info.get("country", "BR")
+                })
+            map_col.append(len(lb_ids) - 1)
+            player_col.append(idx)
+            score_col.append(score["modifiedScore"])
+            nf_col.append(1 if "NF" in score["modifiers"] else 0)
+            times.append(score["timeSet"])
+        lb_start.append(len(score_col))
+
+    # 2. PP/acc/posição por mapa, em blocos de mapas
+    tasks = []
+    for lo, hi in _split(lb_start, workers * CHUNKS_PER_WORKER):
+        r0, r1 = lb_start[lo], lb_start[hi]
+        starts = array("I", (s - r0 for s in lb_start[lo:hi + 1]))
+        tasks.append((stars[lo:hi], max_scores[lo:hi], starts, score_col[r0:r1], nf_col[r0:r1]))
+
+    acc_col = array("d")
+    pp_col = array("d")
+    rank_col = array("I")
+    for acc_part, pp_part, rank_part in _run(score_maps_chunk, tasks, workers):
+        acc_col.extend(acc_part)
+        pp_col.extend(pp_part)
+        rank_col.extend(rank_part)
+
+    map_scores = {}
+    for m, lb_id in enumerate(lb_ids):
+        map_scores[lb_id] = [
+            {
+                "player_name": players[player_col[r]]["name"],
+                "player_id": players[player_col[r]]["id"],
+                "score": score_col[r],
+                "timeSet": times[r],
+                "accuracy": round(acc_col[r], 2),
+                "pp": pp_col[r]
+            }
+            for r in range(lb_start[m], lb_start[m + 1]) if rank_col[r]
+        ]
+
+    # 3. Agrupa as linhas válidas por jogador (counting sort) e ordena/pondera em blocos
+    counts = [0] * len(players)
+    for r in range(len(rank_col)):
+        if rank_col[r]:
+            counts[player_col[r]] += 1
+    p_start = array("I", [0])
+    for c in counts:
+        p_start.append(p_start[-1] + c)
+    rows_by_player = array("I", bytes(4 * p_start[-1]))
+    cursor = array("I", p_start[:-1])
+    for r in range(len(rank_col)):
+        if rank_col[r]:
+            p = player_col[r]
+            rows_by_player[cursor[p]] = r
+            cursor[p] += 1
+
+    player_ranges = _split(p_start, workers * CHUNKS_PER_WORKER)
+    tasks = []
+    for lo, hi in player_ranges:
+        r0, r1 = p_start[lo], p_start[hi]
+        rows = rows_by_player[r0:r1]
+        starts = array("I", (s - r0 for s in p_start[lo:hi + 1]))
+        tasks.append((starts, array("I", (rank_col[r] for r in rows)), array("d", (pp_col[r] for r in rows))))
+
+    ranking = []
+    player_scores = {}
+    for (lo, hi), (order, weighted, totals, medals) in zip(player_ranges, _run(rank_players_chunk, tasks, workers)):
+        base = p_start[lo]
+        for p in range(lo, hi):
+            if counts[p] == 0:
+                continue
+            local = p - lo
+            player = players[p]
+            scores = []
+            for k in range(p_start[p] - base, p_start[p + 1] - base):
+                r = rows_by_player[base + order[k]]
+                scores.append({
+                    "leaderboard_id": lb_ids[map_col[r]],
+                    "acc": round(acc_col[r], 2),
+                    "pp": pp_col[r],
+                    "score": score_col[r],
+                    "map_rank": rank_col[r],
+                    "weighted_pp": weighted[k]
+                })
+            player_scores[player["id"]] = {"scores": scores, "total_medals": medals[local]}
+            ranking.append(dict(player, total_pp=totals[local], play_count=counts[p]))
+
+    # Ordena o ranking pelo PP total e adiciona a posição
+    ranking.sort(key=lambda x: x["total_pp"], reverse=True)
+    for i, player in enumerate(ranking):
+        player["rank"] = i + 1
+
+    return {
+        "ranking": ranking,
+        "map_scores": map_scores,
+        "player_scores": player_scores
+    }
+
@@ -0,0 +1,118 @@
+from app.config import AppConfig
+
+# Medalhas BR: cada posição do top do leaderboard BR de um mapa vale pontos
+# (tabela configurável em BSBR_MEDAL_POINTS, ex: "10,8,6,5,4,3,2,1,1,1").
+#
+# O MedalTable guarda o pódio de cada mapa e, por jogador, quantas vezes ficou
+# em cada posição. A cada publicação só os mapas cujo pódio mudou alteram as
+# contagens, e a classificação geral só é reordenada se alguma mudou.
+
+
+def parse_points(text):
+    """Tabela de pontos por posição (1º, 2º, ...) a partir de "10,8,6,..."."""
+    points = tuple(int(p) for p in text.replace(" ", "").split(",") if p)
+    if not points or any(p < 0 for p in points):
+        raise ValueError(f"Tabela de medalhas inválida: {text!r}")
+    return points
+
+
+MEDAL_POINTS = parse_points(AppConfig.MEDAL_POINTS)
+
+
+def medal_points(rank, table=MEDAL_POINTS):
+    """Pontos da posição `rank` no mapa (0 fora da tabela)."""
+    if 1 <= rank <= len(table):
+        return table[rank - 1]
+    return 0
+
+
+def podiums_from_details(player_details, places=len(MEDAL_POINTS)):
+    """{leaderboard_id: [player_id da 1ª posição, da 2ª, ...]} a partir dos player_details."""
+    podiums = {}
+    for pid, detail in player_details.items():
+        for score in detail["scores"]:
+            rank = score["map_rank"]
+            if 1 <= rank <= places:
+                podium = podiums.get(score["leaderboard_id"])
+                if podium is None:
+                    podium = podiums[score["leaderboard_id"]] = [None] * places
+                podium[rank - 1] = pid
+    return podiums
+
+
+class MedalTable:
+    """Classificação geral de medalhas e pódio de cada mapa."""
+
+    def __init__(self, table=MEDAL_POINTS):
+        self.table = table
+        self.podiums = {}
+        self.counts = {} # player_id -> [vezes em 1º, em 2º, ...]
+        self.standings = [] # [(player_id, pontos, contagens)] ordenado
+
+    def updated(self, podiums):
+        """
+        Nova tabela com os pódios `podiums` ({leaderboard_id: [player_id]}).
+        Só os mapas cujo pódio mudou alteram as contagens; a tabela atual
+        continua válida para quem já a leu.
+        """
+        new = MedalTable(self.table)
+        new.podiums = podiums
+        new.counts = dict(self.counts)
+        touched = set()
+
+        def apply(podium, step):
+            for place, pid in enumerate(podium):
+                if pid is None:
+                    continue
+                if pid not in touched:
+                    new.counts[pid] = list(new.counts.get(pid) or [0] * len(self.table))
+                    touched.add(pid)
+                new.counts[pid][place] += step
+
+        for lb_id in self.podiums.keys() | podiums.keys():
+            old, current = self.podiums.get(lb_id), podiums.get(lb_id)
+            if old == current:
+                continue
+            if old:
+                apply(old, -1)
+            if current:
+                apply(current, 1)
+
+        if not touched:
+            new.standings = self.standings
+            return new
+
+        for pid in touched:
+            if not any(new.counts[pid]):
+                del new.counts[pid]
+        # Pontos, depois número de 1º lugares, 2º lugares, ...
+        new.standings = sorted(
+            ((pid, sum(c * p for c, p in zip(counts, self.table)), tuple(counts)) for pid, counts in new.counts.items()),
+            key=lambda row: (-row[1], tuple(-c for c in row[2]), row[0])
+        )
+        return new
+
+    def podium(self, leaderboard_id):
+        """[{"rank", "player_id", "points"}] do mapa (posições vagas são omitidas)."""
+        podium = self.podiums.get(str(leaderboard_id)) or []
+        return [
+            {"rank": place + 1, "player_id": pid, "points": self.table[place]}
+            for place, pid in enumerate(podium) if pid is not None
+        ]
+
+    def rows(self, bsbr_data):
+        """Classificação para exibição: [{"pos", "id", "name", "profilePicture", "medals", "first_places", "top_places"}]."""
+        players = {p["id"]: p for p in bsbr_data}
+        rows = []
+        for pos, (pid, points, counts) in enumerate(self.standings, start=1):
+            player = players.get(pid, {})
+            rows.append({
+                "pos": pos,
+                "id": pid,
+                "name": player.get("name", pid),
+                "profilePicture": player.get("profilePicture"),
+                "medals": points,
+                "first_places": counts[0],
+                "top_places": sum(counts)
+            })
+        return rows
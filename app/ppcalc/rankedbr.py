@@ -1,9 +1,15 @@
 import requests
 import math
+import random
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from threading import Lock
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Callable
+from app import metrics
+from app.config import AppConfig
 
 class RateLimiter:
     def __init__(self, max_calls, period):
@@ -30,10 +36,208 @@ class RateLimiter:
             self.calls.append(now)
 
 # Global rate limiter: 350 calls per 60 seconds
-rate_limiter = RateLimiter(350, 60)
+rate_limiter = RateLimiter(AppConfig.SCORESABER_RATE_LIMIT, 60)
+
+class ApiCallCounter:
+    """Contador de chamadas HTTP por endpoint (zerado a cada ciclo de atualização)."""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.lock = Lock()
+
+    def incr(self, endpoint):
+        with self.lock:
+            self.counts[endpoint] += 1
+
+    def reset(self):
+        with self.lock:
+            self.counts = defaultdict(int)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+    @property
+    def total(self) -> int:
+        with self.lock:
+            return sum(self.counts.values())
+
+api_counter = ApiCallCounter()
+
+class RetryPolicy:
+    """
+    Backoff exponencial com jitter ("full jitter"), respeitando o Retry-After
+    do servidor quando presente.
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, response: Optional[requests.Response]) -> bool:
+        # Sem resposta = erro de conexão/timeout
+        return response is None or response.status_code in self.RETRY_STATUS
+
+    def delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        retry_after = self._retry_after(response)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(response: Optional[requests.Response]) -> Optional[float]:
+        value = response.headers.get("Retry-After") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Endpoint com falhas seguidas: chamadas recusadas sem tocar a rede."""
+
+class CircuitBreaker:
+    """
+    Circuit breaker por endpoint: depois de `failure_threshold` falhas seguidas
+    (já contando os retries) o endpoint fica aberto por `reset_timeout`
+    segundos; depois disso uma chamada de teste decide se fecha de novo.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = defaultdict(int)
+        self.opened_at: Dict[str, float] = {}
+        self.lock = Lock()
+
+    def allow(self, endpoint: str) -> bool:
+        with self.lock:
+            opened = self.opened_at.get(endpoint)
+            if opened is None:
+                return True
+            if time.monotonic() - opened >= self.reset_timeout:
+                # Meio-aberto: deixa uma chamada passar e reabre se falhar
+                self.opened_at[endpoint] = time.monotonic()
+                return True
+            return False
+
+    def record_success(self, endpoint: str):
+        with self.lock:
+            self.failures[endpoint] = 0
+            self.opened_at.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str):
+        with self.lock:
+            self.failures[endpoint] += 1
+            if self.failures[endpoint] >= self.failure_threshold and endpoint not in self.opened_at:
+                print(f"ScoreSaberAPI: Circuito aberto para '{endpoint}' após {self.failures[endpoint]} falhas seguidas.")
+                self.opened_at[endpoint] = time.monotonic()
+
+class PartialDataTracker:
+    """
+    Registra páginas que não puderam ser obtidas no ciclo atual. Um ciclo
+    com dados parciais não deve substituir um snapshot bom.
+    """
+
+    def __init__(self):
+        self.failures = defaultdict(int)
+        self.failed_keys = defaultdict(set)
+        self.lock = Lock()
+
+    def mark(self, endpoint: str, detail: str = "", key=None):
+        with self.lock:
+            self.failures[endpoint] += 1
+            if key is not None:
+                self.failed_keys[endpoint].add(str(key))
+        print(f"ScoreSaberAPI: Dados parciais em '{endpoint}' {detail}".rstrip())
+
+    def reset(self):
+        with self.lock:
+            self.failures = defaultdict(int)
+            self.failed_keys = defaultdict(set)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.failures)
+
+    def failed(self, endpoint: str) -> set:
+        """Chaves (ex: leaderboard_id) com alguma página perdida no endpoint."""
+        with self.lock:
+            return set(self.failed_keys.get(endpoint, ()))
+
+    def has_failures(self, endpoints=None) -> bool:
+        with self.lock:
+            return any(count for ep, count in self.failures.items() if endpoints is None or ep in endpoints)
+
+    def mark_error(self, endpoint: str, error: Exception, detail: str = "", key=None):
+        """Marca falha de página, exceto 404 (recurso removido não é falha transitória)."""
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None and error.response.status_code == 404:
+            return
+        self.mark(endpoint, detail, key)
+
+retry_policy = RetryPolicy()
+circuit_breaker = CircuitBreaker()
+partial_data = PartialDataTracker()
 
 class ScoreSaberAPI:
-    BASE_URL = "https://scoresaber.com/api"
+    BASE_URL = AppConfig.SCORESABER_API_URL
+
+    # Cache de /leaderboard/by-id/{id}/info (não muda entre ciclos)
+    _leaderboard_info_cache: Dict[int, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _get(endpoint: str, url: str, params: Optional[Dict[str, Any]] = None, timeout: int = 10) -> requests.Response:
+        """
+        Ponto único de saída HTTP: respeita o rate limiter, contabiliza a chamada
+        (contador do ciclo e métricas) e aplica a política de retry e o circuit
+        breaker do endpoint.
+
+        Retorna a última resposta (o chamador decide com raise_for_status) ou
+        levanta RequestException se não houve resposta / o circuito está aberto.
+        """
+        if not circuit_breaker.allow(endpoint):
+            metrics.circuit_rejections.inc(endpoint=endpoint)
+            raise CircuitOpenError(f"Circuito aberto para {endpoint}: {url}")
+
+        for attempt in range(retry_policy.max_attempts):
+            wait_start = time.perf_counter()
+            rate_limiter.wait()
+            waited = time.perf_counter() - wait_start
+            api_counter.incr(endpoint)
+
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = requests.get(url, params=params, timeout=timeout)
+                metrics.record_http(endpoint, response.status_code, time.perf_counter() - start, waited)
+            except requests.exceptions.RequestException as e:
+                error = e
+                metrics.record_http(endpoint, "error", time.perf_counter() - start, waited)
+
+            if not retry_policy.should_retry(response):
+                circuit_breaker.record_success(endpoint)
+                return response
+
+            circuit_breaker.record_failure(endpoint)
+            if attempt + 1 >= retry_policy.max_attempts or not circuit_breaker.allow(endpoint):
+                break
+
+            delay = retry_policy.delay(attempt, response)
+            reason = str(response.status_code) if response is not None else type(error).__name__
+            metrics.record_retry(endpoint, reason)
+            time.sleep(delay)
+
+        if response is None:
+            raise error
+        return response
 
     @staticmethod
     def get_player_full(player_id: str) -> Optional[Dict[str, Any]]:
@@ -43,8 +247,7 @@ class ScoreSaberAPI:
         url = f"{ScoreSaberAPI.BASE_URL}/player/{player_id}/full"
         
         try:
-            rate_limiter.wait()
-            response = requests.get(url, timeout=10)
+            response = ScoreSaberAPI._get("player_full", url)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
@@ -74,8 +277,7 @@ class ScoreSaberAPI:
             }
             
             try:
-                rate_limiter.wait()
-                response = requests.get(url, params=params, timeout=10)
+                response = ScoreSaberAPI._get("players", url, params=params)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -96,6 +298,7 @@ class ScoreSaberAPI:
                 
             except requests.exceptions.RequestException as e:
                 print(f"Erro ao buscar jogadores página {page}: {e}")
+                partial_data.mark_error("players", e, f"(página {page})")
                 break
                 
         return all_players
@@ -111,13 +314,13 @@ class ScoreSaberAPI:
             "page": page
         }
         try:
-            rate_limiter.wait()
-            response = requests.get(url, params=params, timeout=10)
+            response = ScoreSaberAPI._get("leaderboard_scores", url, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get("scores", [])
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar página {page} do leaderboard {leaderboard_id}: {e}")
+            partial_data.mark_error("leaderboard_scores", e, f"(leaderboard {leaderboard_id} página {page})", key=leaderboard_id)
             return []
 
     @staticmethod
@@ -130,12 +333,12 @@ class ScoreSaberAPI:
         params = {"countries": country, "page": 1}
         
         try:
-            rate_limiter.wait()
-            response = requests.get(url, params=params, timeout=10)
+            response = ScoreSaberAPI._get("leaderboard_scores", url, params=params)
             response.raise_for_status()
             data = response.json()
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar dados iniciais do leaderboard {leaderboard_id}: {e}")
+            partial_data.mark_error("leaderboard_scores", e, f"(leaderboard {leaderboard_id} página 1)", key=leaderboard_id)
             return []
 
         all_scores = data.get("scores", [])
@@ -180,20 +383,13 @@ class ScoreSaberAPI:
             "page": page
         }
         try:
-            rate_limiter.wait()
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 429:
-                print(f"Rate limit atingido (429) para jogador {player_id} página {page}. Aguardando 5s...")
-                time.sleep(5)
-                rate_limiter.wait()
-                response = requests.get(url, params=params, timeout=10)
-
+            response = ScoreSaberAPI._get("player_scores", url, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get("playerScores", [])
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar scores do jogador {player_id} página {page}: {e}")
+            partial_data.mark_error("player_scores", e, f"(jogador {player_id} página {page})")
             return []
 
     @staticmethod
@@ -216,12 +412,12 @@ class ScoreSaberAPI:
         params = {"limit": limit, "sort": sort, "page": 1}
         
         try:
-            rate_limiter.wait()
-            response = requests.get(url, params=params, timeout=10)
+            response = ScoreSaberAPI._get("player_scores", url, params=params)
             response.raise_for_status()
             data = response.json()
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar scores iniciais do jogador {player_id}: {e}")
+            partial_data.mark_error("player_scores", e, f"(jogador {player_id} página 1)")
             return []
 
         all_scores = data.get("playerScores", [])
@@ -262,3 +458,46 @@ class ScoreSaberAPI:
         # Se for recent, não necessariamente precisamos ordenar aqui, mas a API já manda ordenado por página
         
         return all_scores
+
+    @staticmethod
+    def get_player_recent_scores(player_id: str, stop_when: Callable[[List[Dict[str, Any]]], bool], limit: int = 100, max_pages: int = 5) -> List[Dict[str, Any]]:
+        """
+        Busca os scores recentes de um jogador página a página (sort=recent),
+        parando assim que `stop_when(página)` indicar que o restante do histórico
+        já é conhecido. Evita baixar páginas que só repetiriam dados salvos.
+        """
+        all_scores = []
+
+        for page in range(1, max_pages + 1):
+            page_scores = ScoreSaberAPI._fetch_player_scores_page(player_id, page, limit, "recent")
+            if not page_scores:
+                break
+
+            all_scores.extend(page_scores)
+
+            if len(page_scores) < limit or stop_when(page_scores):
+                break
+
+        return all_scores
+
+    @staticmethod
+    def get_leaderboard_info(leaderboard_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Busca os detalhes de um leaderboard (com cache em memória).
+        """
+        leaderboard_id = int(leaderboard_id)
+        cached = ScoreSaberAPI._leaderboard_info_cache.get(leaderboard_id)
+        if cached is not None:
+            return cached
+
+        url = f"{ScoreSaberAPI.BASE_URL}/leaderboard/by-id/{leaderboard_id}/info"
+        try:
+            response = ScoreSaberAPI._get("leaderboard_info", url)
+            response.raise_for_status()
+            info = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Erro ao buscar info do leaderboard {leaderboard_id}: {e}")
+            return None
+
+        ScoreSaberAPI._leaderboard_info_cache[leaderboard_id] = info
+        return info
@@ -0,0 +1,158 @@
+import heapq
+import os
+from array import array
+
+from app.ppcalc.compute import CHUNKS_PER_WORKER, _run, _split
+from app.scorecalc import get_modifier, STAR_MULTIPLIER, WEIGHT_COEFFICIENT
+
+# Recomendações "PP a ganhar": para cada jogador, os mapas BR (não jogados ou
+# com score a melhorar) que mais aumentariam o PP total ponderado se ele
+# fizesse a acc alvo neles.
+#
+# A acc alvo é a média das accs dos melhores scores do jogador. O PP de todos
+# os mapas nessa acc sai de um único ponto da curva (modificador x estrelas),
+# e o ganho de inserir/substituir um score vem de somas de sufixo dos pesos,
+# sem remontar a lista do jogador:
+#
+#   novo mapa na posição k:          x·w^k − (1−w)·S[k]
+#   score da posição j vira x (k≤j): x·w^k − p_j·w^j − (1−w)·(S[k] − S[j])
+#
+# onde S[i] = Σ p_i·w^i a partir de i. Os mapas são percorridos em ordem
+# decrescente de estrelas, então a posição k só avança (merge, sem busca).
+
+FIELDS = ("leaderboard_id", "gain", "pp", "current_pp")
+LEADERBOARD_ID, GAIN, PP, CURRENT_PP = range(len(FIELDS))
+
+# Recomendações guardadas por jogador
+RECOMMENDATIONS_PER_PLAYER = 20
+# Scores (os de maior PP) usados na acc alvo
+TARGET_SCORES = 10
+
+
+def _parse_stars(value):
+    # maps_data guarda as estrelas formatadas ("9.50★")
+    try:
+        return float(str(value).rstrip("★"))
+    except ValueError:
+        return 0.0
+
+
+def recommend_chunk(limit, base_pps, starts, map_nos, accs, pps):
+    """
+    Melhores mapas de cada jogador do bloco.
+
+    Args:
+        base_pps: PP de cada mapa a 100% do modificador (estrelas x constante),
+            em ordem decrescente; o nº do mapa é a posição nessa lista.
+        starts: Offsets das linhas de cada jogador, len = jogadores + 1.
+        map_nos, accs, pps: Por linha, ordenadas por PP decrescente em cada jogador.
+
+    Returns:
+        tuple: (offsets das recomendações por jogador, nº do mapa, ganho, acc alvo por jogador)
+    """
+    out_starts = array("I", [0])
+    out_maps = array("I")
+    out_gains = array("d")
+    targets = array("d")
+    one_minus_w = 1 - WEIGHT_COEFFICIENT
+
+    for p in range(len(starts) - 1):
+        lo, hi = starts[p], starts[p + 1]
+        count = hi - lo
+        top = min(count, TARGET_SCORES)
+        target = sum(accs[lo:lo + top]) / top if top else 0.0
+        targets.append(target)
+
+        # Pesos e somas de sufixo do PP ponderado atual
+        weights = [WEIGHT_COEFFICIENT ** i for i in range(count + 1)]
+        suffix = [0.0] * (count + 1)
+        for i in range(count - 1, -1, -1):
+            suffix[i] = suffix[i + 1] + pps[lo + i] * weights[i]
+        played = {map_nos[lo + i]: i for i in range(count)}
+
+        modifier = get_modifier(target)
+        candidates = []
+        k = 0
+        for m, base_pp in enumerate(base_pps):
+            x = base_pp * modifier
+            # Primeira posição com PP menor que x (x só diminui ao longo dos mapas)
+            while k < count and pps[lo + k] >= x:
+                k += 1
+            j = played.get(m)
+            if j is None:
+                gain = x * weights[k] - one_minus_w * suffix[k]
+            elif k <= j:
+                gain = x * weights[k] - pps[lo + j] * weights[j] - one_minus_w * (suffix[k] - suffix[j])
+            else:
+                continue  # score atual já é melhor que a acc alvo
+            if gain > 0:
+                candidates.append((gain, m))
+
+        for gain, m in heapq.nlargest(limit, candidates):
+            out_maps.append(m)
+            out_gains.append(gain)
+        out_starts.append(len(out_maps))
+
+    return out_starts, out_maps, out_gains, targets
+
+
+def build_recommendations(maps_data, player_details, limit=RECOMMENDATIONS_PER_PLAYER, workers=None):
+    """
+    Recomendações de todos os jogadores.
+
+    Returns:
+        dict: {player_id: {"acc": acc alvo, "maps": [linhas na ordem de FIELDS]}},
+            com current_pp None para mapas não jogados.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    # Mapas em ordem decrescente de estrelas
+    maps = sorted(
+        ((str(m["leaderboard_id"]), _parse_stars(m["stars"])) for m in maps_data),
+        key=lambda m: -m[1]
+    )
+    maps = [m for m in maps if m[1] > 0]
+    map_no = {lb_id: i for i, (lb_id, _) in enumerate(maps)}
+    base_pps = array("d", (stars * STAR_MULTIPLIER for _, stars in maps))
+
+    # Scores em colunas, agrupados por jogador (player_details já vem ordenado por PP)
+    player_ids = []
+    starts = array("I", [0])
+    map_nos = array("I")
+    accs = array("d")
+    pps = array("d")
+    for pid, detail in player_details.items():
+        rows = [s for s in detail["scores"] if s["leaderboard_id"] in map_no]
+        if not rows:
+            continue
+        player_ids.append(pid)
+        for score in rows:
+            map_nos.append(map_no[score["leaderboard_id"]])
+            accs.append(score["acc"])
+            pps.append(score["pp"])
+        starts.append(len(pps))
+
+    ranges = _split(starts, workers * CHUNKS_PER_WORKER)
+    tasks = []
+    for lo, hi in ranges:
+        r0, r1 = starts[lo], starts[hi]
+        tasks.append((limit, base_pps, array("I", (s - r0 for s in starts[lo:hi + 1])), map_nos[r0:r1], accs[r0:r1], pps[r0:r1]))
+
+    recommendations = {}
+    for (lo, hi), (out_starts, out_maps, out_gains, targets) in zip(ranges, _run(recommend_chunk, tasks, workers)):
+        for p in range(lo, hi):
+            local = p - lo
+            current = {map_nos[r]: pps[r] for r in range(starts[p], starts[p + 1])}
+            modifier = get_modifier(targets[local])
+            rows = []
+            for i in range(out_starts[local], out_starts[local + 1]):
+                m = out_maps[i]
+                current_pp = current.get(m)
+                rows.append([
+                    maps[m][0],
+                    round(out_gains[i], 2),
+                    round(base_pps[m] * modifier, 2),
+                    round(current_pp, 2) if current_pp is not None else None
+                ])
+            recommendations[player_ids[p]] = {"acc": round(targets[local], 2), "maps": rows}
+    return recommendations
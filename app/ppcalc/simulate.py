@@ -0,0 +1,149 @@
+from array import array
+from collections import defaultdict
+
+from app.data.deltas import merge_changes
+from app.ppcalc.compute import player_totals, reprice_maps
+
+
+def _parse_stars(value):
+    # maps_data guarda as estrelas formatadas ("9.50★")
+    try:
+        return float(str(value).rstrip("★"))
+    except ValueError:
+        return None
+
+
+class RerankSimulator:
+    """
+    Ranking BR hipotético para estrelas propostas (ou mapas ainda não
+    rankeados), sem tocar no snapshot publicado.
+
+    Os scores publicados (player_details) são empacotados em colunas uma vez;
+    cada simulação recalcula só as linhas dos leaderboards alterados e o total
+    dos jogadores com scores neles, em lote com os mesmos cálculos em arrays
+    do compute (reprice_maps e player_totals). Os demais mantêm o total
+    publicado.
+    """
+
+    def __init__(self, bsbr_data, player_details, maps_data=(), workers=None):
+        self.workers = workers
+        self.players = [{"id": p["id"], "name": p["name"], "profilePicture": p["profilePicture"]} for p in bsbr_data]
+        self.player_no = {p["id"]: i for i, p in enumerate(self.players)}
+        self.base_positions = {p["id"]: p["pos"] for p in bsbr_data}
+        self.map_stars = {str(m["leaderboard_id"]): _parse_stars(m["stars"]) for m in maps_data}
+
+        # Colunas por linha (agrupadas por jogador, na ordem do ranking)
+        self.starts = array("I", [0])
+        self.pps = array("d")
+        self.accs = array("d")
+        self.rows_by_lb = defaultdict(list)
+        for p in self.players:
+            for score in player_details.get(p["id"], {}).get("scores", []):
+                row = len(self.pps)
+                self.pps.append(score["pp"])
+                self.accs.append(score["acc"])
+                self.rows_by_lb[str(score["leaderboard_id"])].append(row)
+            self.starts.append(len(self.pps))
+
+        self.row_player = array("I", bytes(4 * len(self.pps)))
+        for p_no in range(len(self.players)):
+            for row in range(self.starts[p_no], self.starts[p_no + 1]):
+                self.row_player[row] = p_no
+        self.totals = array("d", (
+            sum(s["weighted_pp"] for s in player_details.get(p["id"], {}).get("scores", []))
+            for p in self.players
+        ))
+
+    def simulate(self, changes, accuracies=None, new_scores=None):
+        """
+        Args:
+            changes (dict): {leaderboard_id: estrelas propostas}.
+            accuracies (dict): {(player_id, leaderboard_id): acc} sem arredondamento,
+                na conta do ranking (modifiedScore / max_score, ex: do leaderboard
+                BR do snapshot); sem ela usa a acc publicada (2 casas).
+            new_scores (dict): {leaderboard_id: [(player_id, acc)]} para mapas
+                ainda não rankeados, já sem os scores com No Fail.
+
+        Returns:
+            dict: "ranking" [{"pos", "id", "name", "profilePicture", "pp"}],
+                "players" (linhas de app.data.deltas.PLAYER_FIELDS contra o
+                ranking publicado) e "maps" {leaderboard_id: {"old_stars",
+                "new_stars", "scores"}}.
+        """
+        accuracies = accuracies or {}
+        new_scores = new_scores or {}
+        players = list(self.players)
+        player_no = dict(self.player_no)
+
+        # 1. Linhas dos leaderboards alterados (publicadas ou novas), por mapa
+        stars = array("d")
+        starts = array("I", [0])
+        accs = array("d")
+        line_rows = array("q")  # linha publicada, ou -1 para score de mapa novo
+        line_players = array("I")
+        maps = {}
+        for lb_id, map_stars in changes.items():
+            lb_id = str(lb_id)
+            rows = self.rows_by_lb.get(lb_id)
+            if rows:
+                for row in rows:
+                    p_no = self.row_player[row]
+                    accs.append(accuracies.get((players[p_no]["id"], lb_id), self.accs[row]))
+                    line_rows.append(row)
+                    line_players.append(p_no)
+            else:
+                for pid, acc in new_scores.get(lb_id, []):
+                    if pid not in player_no:
+                        player_no[pid] = len(players)
+                        players.append({"id": pid, "name": pid, "profilePicture": None})
+                    accs.append(acc)
+                    line_rows.append(-1)
+                    line_players.append(player_no[pid])
+            stars.append(map_stars)
+            starts.append(len(accs))
+            maps[lb_id] = {"old_stars": self.map_stars.get(lb_id), "new_stars": map_stars, "scores": starts[-1] - starts[-2]}
+        line_pps = reprice_maps(stars, starts, accs, workers=self.workers)
+
+        replaced = defaultdict(list)  # jogador -> [(linha, novo pp)]
+        added = defaultdict(list)  # jogador -> [pp] de mapas novos
+        for row, p_no, pp in zip(line_rows, line_players, line_pps):
+            if row >= 0:
+                replaced[p_no].append((row, pp))
+            else:
+                added[p_no].append(pp)
+
+        # 2. Total só dos jogadores afetados: linhas publicadas copiadas em bloco
+        # e corrigidas nas alteradas, mais os scores de mapas novos
+        totals = array("d", self.totals)
+        totals.extend(0.0 for _ in range(len(players) - len(self.players)))
+        affected = sorted(set(line_players))
+        player_starts = array("I", [0])
+        player_pps = array("d")
+        for p_no in affected:
+            if p_no < len(self.players):
+                lo = self.starts[p_no]
+                base = len(player_pps) - lo
+                player_pps.extend(self.pps[lo:self.starts[p_no + 1]])
+                for row, pp in replaced.get(p_no, ()):
+                    player_pps[base + row] = pp
+            player_pps.extend(added.get(p_no, ()))
+            player_starts.append(len(player_pps))
+        for p_no, total in zip(affected, player_totals(player_starts, player_pps, workers=self.workers)):
+            totals[p_no] = total
+
+        # 3. Reordena e compara com o ranking publicado
+        order = sorted(range(len(players)), key=totals.__getitem__, reverse=True)
+        ranking = []
+        for pos, p_no in enumerate(order, start=1):
+            if totals[p_no] <= 0:
+                continue
+            ranking.append(dict(players[p_no], pos=pos, pp=f"{totals[p_no]:.2f}pp"))
+
+        old_rows = sorted((p["id"], self.base_positions[p["id"]], round(self.totals[i], 2)) for i, p in enumerate(self.players))
+        new_rows = sorted((p["id"], p["pos"], round(totals[player_no[p["id"]]], 2)) for p in ranking)
+        changed = [
+            [pid, old[1] if old else None, new[1] if new else None, old[2] if old else None, new[2] if new else None]
+            for pid, old, new in merge_changes(old_rows, new_rows)
+        ]
+        changed.sort(key=lambda r: (r[2] is None, r[2] or 0))
+        return {"ranking": ranking, "players": changed, "maps": maps}
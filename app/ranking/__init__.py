@@ -1,37 +1,10 @@
-import requests
 import json
-import time
 import concurrent.futures
-from threading import Lock
 import sys
 import math
-
-class RateLimiter:
-    def __init__(self, max_calls, period):
-        self.max_calls = max_calls
-        self.period = period
-        self.calls = []
-        self.lock = Lock()
-
-    def wait(self):
-        with self.lock:
-            now = time.time()
-            # Remove chamadas antigas que já saíram da janela de tempo
-            self.calls = [t for t in self.calls if t > now - self.period]
-            
-            if len(self.calls) >= self.max_calls:
-                # Calcula quanto tempo precisa esperar até a chamada mais antiga expirar
-                sleep_time = self.calls[0] + self.period - now
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    # Atualiza o tempo atual após o sleep e limpa novamente
-                    now = time.time()
-                    self.calls = [t for t in self.calls if t > now - self.period]
-            
-            self.calls.append(now)
-
-# Limite de 350 requisições por 60 segundos (gap de segurança para o limite de 400)
-rate_limiter = RateLimiter(350, 60)
+import tempfile
+from app.ppcalc.rankedbr import ScoreSaberAPI, partial_data
+from app.ranking.export import write_sorted_run, merge_runs, JsonLinesWriter
 
 def get_scores_for_player(player):
     player_id = player["id"]
@@ -51,18 +24,12 @@ def get_scores_for_player(player):
     max_pages = (ranked_play_count // items_per_page) + 2 
     
     while fetched_count < ranked_play_count and current_page <= max_pages:
-        url = f"https://scoresaber.com/api/player/{player_id}/scores?limit={items_per_page}&sort=top&page={current_page}&withMetadata=false"
-        headers = {"accept": "application/json"}
+        url = f"{ScoreSaberAPI.BASE_URL}/player/{player_id}/scores"
+        params = {"limit": items_per_page, "sort": "top", "page": current_page, "withMetadata": "false"}
         
         try:
-            rate_limiter.wait()
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 429:
-                print(f"Rate limit atingido para {player_name}. Aguardando 5s...")
-                time.sleep(5)
-                continue
-                
+            # Rate limit, retry com backoff (429/5xx) e circuit breaker ficam no cliente compartilhado
+            response = ScoreSaberAPI._get("player_scores", url, params=params)
             response.raise_for_status()
             data = response.json()
             player_scores = data.get("playerScores", [])
@@ -101,6 +68,7 @@ def get_scores_for_player(player):
             
         except Exception as e:
             print(f"Erro ao coletar scores de {player_name} na página {current_page}: {e}")
+            partial_data.mark_error("player_scores", e, f"({player_name} página {current_page})")
             break
             
     print(f"Finalizado: {player_name} ({len(player_scores_list)} scores)")
@@ -159,14 +127,26 @@ def generate_star_ranking(all_scores, excluded_players=None):
         
     return output_lines
 
-def collect_ranking_players():
+def _print_line(line):
+    try:
+        print(line)
+    except UnicodeEncodeError:
+        print(line.encode('ascii', 'replace').decode('ascii'))
+
+def collect_ranking_players(quiet=False, compress=False):
+    """
+    Coleta os scores dos jogadores BR e gera os arquivos de exportação.
+
+    Args:
+        quiet (bool): Não imprime cada linha das listas no console.
+        compress (bool): Grava o ranking_scores.jsonl compactado com gzip.
+    """
     # Tenta configurar o stdout para utf-8 para evitar erros de print no console do Windows
     try:
         sys.stdout.reconfigure(encoding='utf-8')
     except AttributeError:
         pass # Python < 3.7 ou ambiente que não suporta reconfigure
 
-    headers = {"accept": "application/json"}
     simplified_players = []
     
     try:
@@ -174,11 +154,10 @@ def collect_ranking_players():
         print("Coletando top 200 jogadores do Brasil...")
         
         for page in range(1, 5): 
-            url = f"https://scoresaber.com/api/players?countries=BR&page={page}"
+            url = f"{ScoreSaberAPI.BASE_URL}/players"
             
             try:
-                rate_limiter.wait()
-                response = requests.get(url, headers=headers)
+                response = ScoreSaberAPI._get("players", url, params={"countries": "BR", "page": page})
                 response.raise_for_status()
 
                 players_data = response.json()
@@ -201,6 +180,7 @@ def collect_ranking_players():
                 
             except Exception as e:
                 print(f"Erro ao coletar página {page} de jogadores: {e}")
+                partial_data.mark_error("players", e, f"(página {page})")
                 break
 
         with open("ranking_br.json", "w", encoding="utf-8") as json_file:
@@ -208,78 +188,72 @@ def collect_ranking_players():
         
         print(f"Coletados {len(simplified_players)} jogadores no total. Iniciando coleta de scores com 10 threads...")
 
-        all_scores = []
-        
-        # Multi-threading com 10 workers
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_player = {executor.submit(get_scores_for_player, player): player for player in simplified_players}
-            
-            for future in concurrent.futures.as_completed(future_to_player):
-                try:
-                    scores = future.result()
-                    all_scores.extend(scores)
-                except Exception as exc:
-                    print(f"Exceção gerada: {exc}")
+        # Cada jogador vira um "run" ordenado em disco; o merge final é feito
+        # em streaming, sem materializar a lista completa de scores.
+        with tempfile.TemporaryDirectory(prefix="bsbr_runs_") as runs_dir:
+            run_paths = []
 
-        # Ordenar por PP decrescente
-        all_scores.sort(key=lambda x: x["pp"], reverse=True)
-        
-        with open("ranking_scores.json", "w", encoding="utf-8") as json_file:
-            json.dump({"scores": all_scores}, json_file, indent=4, ensure_ascii=False)
-            
-        print("Scores coletados e salvos em ranking_scores.json")
-        
-        # Lista 1: Top PP Geral
-        print("\nLista de Scores (Top PP):")
-        with open("ranking_scores_list.txt", "w", encoding="utf-8") as txt_file:
-            for i, s in enumerate(all_scores, 1):
-                line = f"{i}º {s['playerName']}: {s['pp']:.2f}pp com {s['accuracy']:.2f}% ACC ({s['songName']})"
-                try:
-                    print(line)
-                except UnicodeEncodeError:
-                    print(line.encode('ascii', 'replace').decode('ascii'))
-                txt_file.write(line + "\n")
-        
-        print("Lista salva em ranking_scores_list.txt")
-        
-        # Lista 2: Top PP por Estrelas (Todos)
-        print("\nGerando lista por estrelas (Geral)...")
-        star_ranking_lines = generate_star_ranking(all_scores)
-        
-        with open("ranking_stars_list.txt", "w", encoding="utf-8") as star_file:
-            for line in star_ranking_lines:
-                try:
-                    print(line)
-                except UnicodeEncodeError:
-                    print(line.encode('ascii', 'replace').decode('ascii'))
-                star_file.write(line + "\n")
-        print("Lista por estrelas salva em ranking_stars_list.txt")
-        
-        # Lista 3: Top PP por Estrelas (Excluindo Top 4)
-        print("\nGerando lista por estrelas (Excluindo Top 4)...")
-        
-        # Identificar Top 4 jogadores (baseado no countryRank)
-        # simplified_players já está na ordem que veio da API (que é por rank)
-        # Mas para garantir, vamos ordenar por countryRank
-        simplified_players.sort(key=lambda x: x["countryRank"])
-        top_4_players = [p["name"] for p in simplified_players[:5]]
-        
-        print(f"Excluindo jogadores: {top_4_players}")
-        
-        star_ranking_no_top4_lines = generate_star_ranking(all_scores, excluded_players=top_4_players)
-        
-        with open("ranking_stars_list_no_top4.txt", "w", encoding="utf-8") as star_file_no_top4:
-            for line in star_ranking_no_top4_lines:
-                try:
-                    print(line)
-                except UnicodeEncodeError:
-                    print(line.encode('ascii', 'replace').decode('ascii'))
-                star_file_no_top4.write(line + "\n")
-                
-        print("Lista por estrelas (sem top 4) salva em ranking_stars_list_no_top4.txt")
+            # Multi-threading com 10 workers
+            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+                future_to_player = {executor.submit(get_scores_for_player, player): player for player in simplified_players}
+
+                for future in concurrent.futures.as_completed(future_to_player):
+                    try:
+                        scores = future.result()
+                        if scores:
+                            run_paths.append(write_sorted_run(scores, runs_dir))
+                    except Exception as exc:
+                        print(f"Exceção gerada: {exc}")
+
+            # Lista 1: Top PP Geral (JSON Lines + lista em texto no mesmo passe)
+            if not quiet:
+                print("\nLista de Scores (Top PP):")
+            with JsonLinesWriter("ranking_scores.jsonl", compress=compress) as jsonl_writer, \
+                    open("ranking_scores_list.txt", "w", encoding="utf-8") as txt_file:
+                for i, s in enumerate(merge_runs(run_paths), 1):
+                    jsonl_writer.write(s)
+                    line = f"{i}º {s['playerName']}: {s['pp']:.2f}pp com {s['accuracy']:.2f}% ACC ({s['songName']})"
+                    if not quiet:
+                        _print_line(line)
+                    txt_file.write(line + "\n")
+
+            print(f"{jsonl_writer.count} scores coletados e salvos em {jsonl_writer.path}")
+            print("Lista salva em ranking_scores_list.txt")
+
+            # Lista 2: Top PP por Estrelas (Todos)
+            print("\nGerando lista por estrelas (Geral)...")
+            star_ranking_lines = generate_star_ranking(merge_runs(run_paths))
+
+            with open("ranking_stars_list.txt", "w", encoding="utf-8") as star_file:
+                for line in star_ranking_lines:
+                    if not quiet:
+                        _print_line(line)
+                    star_file.write(line + "\n")
+            print("Lista por estrelas salva em ranking_stars_list.txt")
+
+            # Lista 3: Top PP por Estrelas (Excluindo Top 4)
+            print("\nGerando lista por estrelas (Excluindo Top 4)...")
+
+            # Identificar Top 4 jogadores (baseado no countryRank)
+            # simplified_players já está na ordem que veio da API (que é por rank)
+            # Mas para garantir, vamos ordenar por countryRank
+            simplified_players.sort(key=lambda x: x["countryRank"])
+            top_4_players = [p["name"] for p in simplified_players[:5]]
+
+            print(f"Excluindo jogadores: {top_4_players}")
+
+            star_ranking_no_top4_lines = generate_star_ranking(merge_runs(run_paths), excluded_players=top_4_players)
+
+            with open("ranking_stars_list_no_top4.txt", "w", encoding="utf-8") as star_file_no_top4:
+                for line in star_ranking_no_top4_lines:
+                    if not quiet:
+                        _print_line(line)
+                    star_file_no_top4.write(line + "\n")
+
+            print("Lista por estrelas (sem top 4) salva em ranking_stars_list_no_top4.txt")
+
+        if partial_data.has_failures():
+            print(f"Atenção: páginas não coletadas mesmo após novas tentativas {partial_data.snapshot()}; as listas estão incompletas.")
 
     except Exception as e:
         print(f"Erro geral: {e}")
-
-if __name__ == "__main__":
-    collect_ranking_players()
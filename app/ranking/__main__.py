@@ -0,0 +1,10 @@
+import argparse
+from app.ranking import collect_ranking_players
+
+# Uso: python -m app.ranking [--quiet] [--gzip]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta os rankings de scores BR.")
+    parser.add_argument("--quiet", action="store_true", help="Não imprime cada linha no console")
+    parser.add_argument("--gzip", action="store_true", help="Compacta o ranking_scores.jsonl com gzip")
+    args = parser.parse_args()
+    collect_ranking_players(quiet=args.quiet, compress=args.gzip)
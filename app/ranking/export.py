@@ -0,0 +1,69 @@
+import gzip
+import heapq
+import json
+import os
+import tempfile
+
+
+def _dumps(obj):
+    # JSON compacto (sem indentação) e preservando acentos
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_sorted_run(scores, directory, key="pp"):
+    """
+    Ordena os scores de um jogador (maior -> menor) e grava em disco como um
+    "run" em JSON Lines. Retorna o caminho do arquivo criado.
+    """
+    scores = sorted(scores, key=lambda s: s[key], reverse=True)
+
+    fd, path = tempfile.mkstemp(prefix="run_", suffix=".jsonl", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as run_file:
+        for s in scores:
+            run_file.write(_dumps(s) + "\n")
+    return path
+
+
+def iter_run(path):
+    """Lê um run do disco linha a linha, sem carregar tudo na memória."""
+    with open(path, "r", encoding="utf-8") as run_file:
+        for line in run_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def merge_runs(paths, key="pp"):
+    """
+    Faz o merge (k-way) dos runs já ordenados, produzindo um único fluxo
+    ordenado por `key` decrescente. Apenas uma linha por run fica em memória.
+    """
+    return heapq.merge(*(iter_run(p) for p in paths), key=lambda s: s[key], reverse=True)
+
+
+def open_output(path, compress=False):
+    """Abre o arquivo de saída em modo texto, opcionalmente com gzip."""
+    if compress:
+        return gzip.open(path + ".gz", "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+class JsonLinesWriter:
+    """Escritor incremental de JSON Lines (um objeto por linha)."""
+
+    def __init__(self, path, compress=False):
+        self.path = path + ".gz" if compress else path
+        self._file = open_output(path, compress)
+        self.count = 0
+
+    def write(self, obj):
+        self._file.write(_dumps(obj) + "\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
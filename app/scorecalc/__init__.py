@@ -1,3 +1,4 @@
+from bisect import bisect_left
 from dataclasses import dataclass
 from typing import List
 import math
@@ -66,6 +67,8 @@ curve_points = [
     CurvePoint(1, 5.367394282890631),
 ]
 
+curve_accs = [p.getAcc() for p in curve_points]
+
 def get_modifier(accuracy: float) -> float:
     accuracy = clamp(accuracy, 0, 100) / 100
 
@@ -75,15 +78,12 @@ def get_modifier(accuracy: float) -> float:
     if accuracy >= 1:
         return curve_points[-1].getMultiplier()
 
-    for i in range(len(curve_points) - 1):
-        p = curve_points[i]
-        n = curve_points[i + 1]
-
-        if p.getAcc() <= accuracy <= n.getAcc():
-            t = (accuracy - p.getAcc()) / (n.getAcc() - p.getAcc())
-            return lerp(p.getMultiplier(), n.getMultiplier(), t)
-
-    return 0
+    # Busca binária do trecho da curva (mesmo trecho que a busca linear escolhia)
+    i = bisect_left(curve_accs, accuracy)
+    p = curve_points[i - 1]
+    n = curve_points[i]
+    t = (accuracy - p.getAcc()) / (n.getAcc() - p.getAcc())
+    return lerp(p.getMultiplier(), n.getMultiplier(), t)
 
 
 def get_pp(stars: float, accuracy: float) -> float:
@@ -0,0 +1,149 @@
+import flet as ft
+from app.colors import AppColors
+from app.data.data_manager import DataManager
+from app.data.map_leaderboards import PLAYER_ID, PLAYER_NAME, ACC, PP
+from app.api.images import thumbnail_url
+from app.components.virtual_list import VirtualList, RecycledRow
+
+def MapView(page: ft.Page, leaderboard_id: str):
+    # Leaderboard BR do mapa, servido do snapshot (sem acessar a rede)
+    found = DataManager.get_map_leaderboard(leaderboard_id)
+
+    if found is None:
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Icon(ft.Icons.ERROR_OUTLINE, size=50, color=AppColors.SECONDARY),
+                    ft.Text("Mapa não encontrado.", color=AppColors.TEXT_SECONDARY)
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                alignment=ft.MainAxisAlignment.CENTER
+            ),
+            alignment=ft.alignment.center,
+            expand=True
+        )
+
+    map_meta, rows, boards = found
+    # Linhas com a posição (a lista do snapshot já está na ordem do leaderboard)
+    ranked_rows = [(pos, row) for pos, row in enumerate(rows, start=1)]
+
+    # --- Componente de linha do leaderboard (linha reciclada) ---
+    class LeaderboardRow(RecycledRow):
+        def open_player(self, e):
+            if self.item:
+                page.go(f"/player/{self.item[1][PLAYER_ID]}")
+
+        def build(self):
+            self.rank_text = ft.Text("", width=40, size=16, weight=ft.FontWeight.BOLD, color=AppColors.SECONDARY)
+            self.name_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.TEXT, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+            self.acc_text = ft.Text("", color=AppColors.TEXT_SECONDARY, size=12)
+            self.pp_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.PRIMARY, size=16)
+
+            return ft.Container(
+                content=ft.Row(
+                    [
+                        self.rank_text,
+                        ft.Container(content=self.name_text, expand=True),
+                        ft.Column(
+                            [self.pp_text, self.acc_text],
+                            horizontal_alignment=ft.CrossAxisAlignment.END, spacing=0
+                        )
+                    ],
+                    vertical_alignment=ft.CrossAxisAlignment.CENTER
+                ),
+                padding=10, bgcolor=AppColors.SURFACE, border_radius=8,
+                on_click=self.open_player
+            )
+
+        def bind(self, item):
+            pos, row = item
+            self.set(self.rank_text, "value", f"#{pos}")
+            self.set(self.name_text, "value", row[PLAYER_NAME])
+            self.set(self.pp_text, "value", f"{row[PP]:.2f}pp")
+            self.set(self.acc_text, "value", f"{row[ACC]:.2f}%")
+
+    # --- Simulação de posição para uma acc ---
+    placement_text = ft.Text("", color=AppColors.PRIMARY, weight=ft.FontWeight.BOLD)
+
+    def on_acc_change(e):
+        try:
+            acc = float(e.control.value.replace(",", ".").rstrip("%"))
+        except ValueError:
+            acc = None
+
+        max_score = map_meta.get("max_score") or 0
+        if acc is None or not 0 <= acc <= 100 or max_score <= 0:
+            placement_text.value = ""
+        else:
+            rank = boards.placement(leaderboard_id, int(max_score * acc / 100))
+            placement_text.value = f"Ficaria em #{rank} de {len(rows) + 1}"
+        placement_text.update()
+
+    acc_field = ft.TextField(
+        label="Acc (%)",
+        width=140,
+        dense=True,
+        keyboard_type=ft.KeyboardType.NUMBER,
+        on_change=on_acc_change,
+        color=AppColors.TEXT,
+        border_color=AppColors.SURFACE,
+        focused_border_color=AppColors.PRIMARY
+    )
+
+    # --- Cabeçalho do Mapa ---
+    map_header = ft.Row(
+        [
+            ft.Container(
+                content=ft.Image(
+                    src=thumbnail_url(map_meta.get("cover_image"), 100),
+                    width=100, height=100, fit=ft.ImageFit.COVER,
+                    error_content=ft.Icon(ft.Icons.MUSIC_NOTE, size=40, color=AppColors.TEXT_SECONDARY)
+                ),
+                width=100, height=100, border_radius=8, clip_behavior=ft.ClipBehavior.HARD_EDGE
+            ),
+            ft.Column(
+                [
+                    ft.Text(map_meta["name"], size=24, weight=ft.FontWeight.BOLD, color=AppColors.TEXT),
+                    ft.Row(
+                        [
+                            ft.Text(map_meta["diff"], color=AppColors.SECONDARY),
+                            ft.Text("•", color=AppColors.TEXT_SECONDARY),
+                            ft.Text(map_meta["stars"], color=AppColors.SECONDARY, weight=ft.FontWeight.BOLD),
+                            ft.Text("•", color=AppColors.TEXT_SECONDARY),
+                            ft.Text(f"{len(rows)} scores BR", color=AppColors.TEXT_SECONDARY)
+                        ],
+                        spacing=5,
+                        wrap=True
+                    ),
+                    ft.Row([acc_field, placement_text], vertical_alignment=ft.CrossAxisAlignment.CENTER, wrap=True)
+                ],
+                expand=True, spacing=5
+            )
+        ],
+        spacing=20,
+        vertical_alignment=ft.CrossAxisAlignment.CENTER
+    )
+
+    # --- Layout Final da Página ---
+    return ft.Container(
+        content=ft.Column(
+            [
+                ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda e: page.go("/ranking"), icon_color=AppColors.TEXT),
+                map_header,
+                ft.Divider(color=AppColors.SURFACE),
+                ft.Text("Leaderboard BR", size=20, weight=ft.FontWeight.BOLD, color=AppColors.TEXT),
+                ft.Container(height=10),
+                VirtualList(
+                    row_factory=LeaderboardRow,
+                    source=ranked_rows,
+                    page_size=10,
+                    empty_content=lambda: ft.Text("Nenhum score brasileiro neste mapa.", color=AppColors.TEXT_SECONDARY),
+                    spacing=5,
+                    expand=True
+                )
+            ],
+            expand=True,
+            scroll=ft.ScrollMode.AUTO
+        ),
+        padding=20
+    )
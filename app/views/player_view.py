@@ -1,13 +1,11 @@
 import flet as ft
 from app.colors import AppColors
 from app.data.data_manager import DataManager
-import math
+from app.api.images import thumbnail_url
+from app.components.virtual_list import VirtualList, RecycledRow
 
 def PlayerView(page: ft.Page, player_id: str):
-    # Busca dados do jogador no DataManager
-    player_data = DataManager.get_player_detail(player_id)
-    
-    if not player_data:
+    def not_found_content():
         return ft.Container(
             content=ft.Column(
                 [
@@ -21,200 +19,317 @@ def PlayerView(page: ft.Page, player_id: str):
             expand=True
         )
 
-    info = player_data["info"]
-    scores = player_data["scores"]
-    
-    # --- Cabeçalho do Perfil ---
-    profile_header = ft.Container(
-        content=ft.Column(
-            [
-                # Avatar Grande
-                ft.Container(
-                    content=ft.Image(
-                        src=player_data["profile_picture"] or "",
-                        width=120, height=120, border_radius=60, fit=ft.ImageFit.COVER,
-                        error_content=ft.Icon(ft.Icons.PERSON, size=60, color=AppColors.TEXT_SECONDARY)
-                    ),
-                    border=ft.border.all(3, AppColors.PRIMARY), border_radius=65, padding=5
+    # --- Componente de Item de Score (linha reciclada) ---
+    class ScoreRow(RecycledRow):
+        def open_leaderboard(self, e):
+            if self.item and self.item.get("leaderboard_id"):
+                page.go(f"/map/{self.item['leaderboard_id']}")
+
+        def build(self):
+            self.cover_image = ft.Image(
+                src="",
+                width=50, height=50, border_radius=5, fit=ft.ImageFit.COVER,
+                error_content=ft.Icon(ft.Icons.MUSIC_NOTE, color=AppColors.TEXT_SECONDARY)
+            )
+            cover = ft.Container(
+                content=self.cover_image,
+                width=50, height=50, border_radius=5, clip_behavior=ft.ClipBehavior.HARD_EDGE
+            )
+
+            self.rank_text = ft.Text("", width=30, size=16, weight=ft.FontWeight.BOLD, color=AppColors.SECONDARY)
+            self.map_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.TEXT, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+            self.diff_text = ft.Text("", color=AppColors.SECONDARY, size=12)
+            self.stars_text = ft.Text("", color=AppColors.SECONDARY, size=12, weight=ft.FontWeight.BOLD)
+            self.pp_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.PRIMARY, size=16)
+            self.weighted_text = ft.Text("", color=AppColors.TEXT_SECONDARY, size=12)
+            self.acc_text = ft.Text("", color=AppColors.TEXT_SECONDARY, size=12)
+            
+            map_info = ft.Container(
+                content=ft.Column(
+                    [
+                        self.map_text,
+                        ft.Row(
+                            [
+                                self.diff_text,
+                                ft.Text("•", color=AppColors.TEXT_SECONDARY),
+                                self.stars_text
+                            ],
+                            spacing=5,
+                            wrap=True
+                        )
+                    ],
+                    spacing=2
                 ),
-                ft.Text(info["name"], size=32, weight=ft.FontWeight.BOLD, color=AppColors.TEXT),
-                
-                # Badges de Ranking e Medalhas
-                ft.Container(
-                    content=ft.Row(
-                        [
-                            # Ranking BR
-                            ft.Container(
-                                content=ft.Row([
-                                    ft.Image(src="/br.png", width=20, height=20, fit=ft.ImageFit.CONTAIN),
-                                    ft.Text("BSBR Rank:", color=AppColors.TEXT_SECONDARY, size=14),
-                                    ft.Text(f"#{player_data['bsbr_rank']}", color=AppColors.PRIMARY, weight=ft.FontWeight.BOLD, size=16),
-                                    ft.Text(f"({player_data['bsbr_pp']})", color=AppColors.TEXT_SECONDARY, size=12)
-                                ], spacing=5, vertical_alignment=ft.CrossAxisAlignment.CENTER),
-                                bgcolor=AppColors.SURFACE, padding=10, border_radius=8
-                            ),
-                            # Ranking SS
-                            ft.Container(
-                                content=ft.Row([
-                                    ft.Image(src="/scoresaber_logo.png", width=20, height=20, fit=ft.ImageFit.CONTAIN),
-                                    ft.Text("SS BR Rank:", color=AppColors.TEXT_SECONDARY, size=14),
-                                    ft.Text(f"#{player_data['ss_rank']}", color=AppColors.SECONDARY, weight=ft.FontWeight.BOLD, size=16),
-                                    ft.Text(f"({player_data['ss_pp']})", color=AppColors.TEXT_SECONDARY, size=12)
-                                ], spacing=5, vertical_alignment=ft.CrossAxisAlignment.CENTER),
-                                bgcolor=AppColors.SURFACE, padding=10, border_radius=8
+                expand=True,
+                on_click=self.open_leaderboard
+            )
+
+            score_info = ft.Column(
+                [
+                    self.pp_text,
+                    self.weighted_text,
+                    self.acc_text
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.END, spacing=0
+            )
+            
+            return ft.Container(
+                content=ft.ResponsiveRow(
+                    [
+                        ft.Container(
+                            content=ft.Row(
+                                [
+                                    # Posição no Mapa
+                                    self.rank_text,
+                                    cover,
+                                    ft.Container(width=10),
+                                    # Info do Mapa
+                                    map_info
+                                ],
+                                alignment=ft.MainAxisAlignment.START,
+                                vertical_alignment=ft.CrossAxisAlignment.CENTER
                             ),
-                            # Medalhas
-                            ft.Container(
-                                content=ft.Row([
-                                    ft.Icon(ft.Icons.MILITARY_TECH, color=AppColors.SECONDARY),
-                                    ft.Text("Medalhas:", color=AppColors.TEXT_SECONDARY, size=14),
-                                    ft.Text(f"{player_data['total_medals']}", color=AppColors.SECONDARY, weight=ft.FontWeight.BOLD, size=16),
-                                ], spacing=5, vertical_alignment=ft.CrossAxisAlignment.CENTER),
-                                bgcolor=AppColors.SURFACE, padding=10, border_radius=8
-                            )
-                        ],
-                        alignment=ft.MainAxisAlignment.CENTER, spacing=10, wrap=True, run_spacing=10
-                    ),
-                    width=600 # Limita a largura para forçar wrap apenas em telas pequenas
-                )
-            ],
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=15
-        ),
-        padding=30, alignment=ft.alignment.center
-    )
+                            col={"xs": 12, "md": 8}
+                        ),
+                        ft.Container(
+                            content=score_info,
+                            col={"xs": 12, "md": 4},
+                            alignment=ft.alignment.center_right
+                        )
+                    ],
+                    vertical_alignment=ft.CrossAxisAlignment.CENTER
+                ),
+                padding=10, bgcolor=AppColors.SURFACE, border_radius=8, margin=ft.margin.only(bottom=5)
+            )
+
+        def bind(self, score):
+            self.set(self.cover_image, "src", thumbnail_url(score["map_cover"], 50))
+            self.set(self.rank_text, "value", f"#{score['map_rank']}")
+            self.set(self.map_text, "value", score["map_name"])
+            self.set(self.diff_text, "value", score["diff"])
+            self.set(self.stars_text, "value", score["stars"])
+            self.set(self.pp_text, "value", f"{score['pp']:.2f}pp")
+            self.set(self.weighted_text, "value", f"({score['weighted_pp']:.2f}pp)")
+            self.set(self.acc_text, "value", f"{score['acc']:.2f}%")
 
-    # --- Componente de Item de Score ---
-    def create_score_item(score):
-        cover = ft.Container(
-            content=ft.Image(
-                src=score["map_cover"] or "",
+    # --- Componente de Recomendação (linha reciclada) ---
+    class RecommendationRow(RecycledRow):
+        def open_leaderboard(self, e):
+            if self.item:
+                page.go(f"/map/{self.item['leaderboard_id']}")
+
+        def build(self):
+            self.cover_image = ft.Image(
+                src="",
                 width=50, height=50, border_radius=5, fit=ft.ImageFit.COVER,
                 error_content=ft.Icon(ft.Icons.MUSIC_NOTE, color=AppColors.TEXT_SECONDARY)
-            ),
-            width=50, height=50, border_radius=5, clip_behavior=ft.ClipBehavior.HARD_EDGE
-        )
-        
-        map_info = ft.Column(
-            [
-                ft.Text(score["map_name"], weight=ft.FontWeight.BOLD, color=AppColors.TEXT, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
-                ft.Row(
+            )
+            cover = ft.Container(
+                content=self.cover_image,
+                width=50, height=50, border_radius=5, clip_behavior=ft.ClipBehavior.HARD_EDGE
+            )
+
+            self.map_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.TEXT, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+            self.diff_text = ft.Text("", color=AppColors.SECONDARY, size=12)
+            self.stars_text = ft.Text("", color=AppColors.SECONDARY, size=12, weight=ft.FontWeight.BOLD)
+            self.gain_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.PRIMARY, size=16)
+            self.pp_text = ft.Text("", color=AppColors.TEXT_SECONDARY, size=12)
+
+            return ft.Container(
+                content=ft.Row(
                     [
-                        ft.Text(score["diff"], color=AppColors.SECONDARY, size=12),
-                        ft.Text("•", color=AppColors.TEXT_SECONDARY),
-                        ft.Text(score["stars"], color=AppColors.SECONDARY, size=12, weight=ft.FontWeight.BOLD)
+                        cover,
+                        ft.Container(width=10),
+                        ft.Column(
+                            [
+                                self.map_text,
+                                ft.Row([self.diff_text, ft.Text("•", color=AppColors.TEXT_SECONDARY), self.stars_text], spacing=5, wrap=True)
+                            ],
+                            expand=True, spacing=2
+                        ),
+                        ft.Column(
+                            [self.gain_text, self.pp_text],
+                            horizontal_alignment=ft.CrossAxisAlignment.END, spacing=0
+                        )
                     ],
-                    spacing=5,
-                    wrap=True
-                )
-            ],
-            expand=True, spacing=2
+                    vertical_alignment=ft.CrossAxisAlignment.CENTER
+                ),
+                padding=10, bgcolor=AppColors.SURFACE, border_radius=8, margin=ft.margin.only(bottom=5),
+                on_click=self.open_leaderboard
+            )
+
+        def bind(self, rec):
+            self.set(self.cover_image, "src", thumbnail_url(rec["map_cover"], 50))
+            self.set(self.map_text, "value", rec["map_name"])
+            self.set(self.diff_text, "value", rec["diff"])
+            self.set(self.stars_text, "value", rec["stars"])
+            self.set(self.gain_text, "value", f"+{rec['gain']:.2f}pp")
+            if rec["current_pp"] is None:
+                self.set(self.pp_text, "value", f"Novo • {rec['pp']:.2f}pp")
+            else:
+                self.set(self.pp_text, "value", f"{rec['current_pp']:.2f} → {rec['pp']:.2f}pp")
+
+    # --- Lógica de Paginação para Scores ---
+    def PaginatedScores(all_scores, items_per_page=5):
+        return VirtualList(
+            row_factory=ScoreRow,
+            source=all_scores,
+            page_size=items_per_page,
+            empty_content=lambda: ft.Text("Nenhum mapa brasileiro jogado.", color=AppColors.TEXT_SECONDARY),
+            spacing=5,
+            expand=True
         )
 
-        score_info = ft.Column(
+    def recommendations_content(recommendations):
+        if not recommendations:
+            return ft.Text("Sem recomendações para este jogador.", color=AppColors.TEXT_SECONDARY)
+        return ft.Column(
             [
-                ft.Text(f"{score['pp']:.2f}pp", weight=ft.FontWeight.BOLD, color=AppColors.PRIMARY, size=16),
-                ft.Text(f"({score['weighted_pp']:.2f}pp)", color=AppColors.TEXT_SECONDARY, size=12),
-                ft.Text(f"{score['acc']:.2f}%", color=AppColors.TEXT_SECONDARY, size=12)
+                ft.Text(f"Ganho de PP BR fazendo {recommendations['acc']:.2f}% (média dos seus melhores scores)", color=AppColors.TEXT_SECONDARY, size=12),
+                VirtualList(
+                    row_factory=RecommendationRow,
+                    source=recommendations["maps"],
+                    page_size=5,
+                    empty_content=lambda: ft.Text("Nenhum mapa a recomendar.", color=AppColors.TEXT_SECONDARY),
+                    spacing=5,
+                    expand=True
+                )
             ],
-            horizontal_alignment=ft.CrossAxisAlignment.END, spacing=0
+            expand=True
         )
-        
-        return ft.Container(
-            content=ft.ResponsiveRow(
+
+    def build_profile_content(player_data):
+        info = player_data["info"]
+        scores = player_data["scores"]
+
+        # A aba de recomendações só é montada quando aberta pela primeira vez
+        recommendations_tab = ft.Container(padding=ft.padding.only(top=10))
+
+        def on_tab_change(e):
+            if e.control.selected_index == 1 and recommendations_tab.content is None:
+                recommendations_tab.content = recommendations_content(DataManager.get_recommendations(player_id))
+                recommendations_tab.update()
+    
+        # --- Cabeçalho do Perfil ---
+        profile_header = ft.Container(
+            content=ft.Column(
                 [
+                    # Avatar Grande
+                    ft.Container(
+                        content=ft.Image(
+                            src=thumbnail_url(player_data["profile_picture"], 120),
+                            width=120, height=120, border_radius=60, fit=ft.ImageFit.COVER,
+                            error_content=ft.Icon(ft.Icons.PERSON, size=60, color=AppColors.TEXT_SECONDARY)
+                        ),
+                        border=ft.border.all(3, AppColors.PRIMARY), border_radius=65, padding=5
+                    ),
+                    ft.Text(info["name"], size=32, weight=ft.FontWeight.BOLD, color=AppColors.TEXT),
+                
+                    # Badges de Ranking e Medalhas
                     ft.Container(
                         content=ft.Row(
                             [
-                                # Posição no Mapa
-                                ft.Text(f"#{score['map_rank']}", width=30, size=16, weight=ft.FontWeight.BOLD, color=AppColors.SECONDARY),
-                                cover,
-                                ft.Container(width=10),
-                                # Info do Mapa
-                                map_info
+                                # Ranking BR
+                                ft.Container(
+                                    content=ft.Row([
+                                        ft.Image(src="/br.png", width=20, height=20, fit=ft.ImageFit.CONTAIN),
+                                        ft.Text("BSBR Rank:", color=AppColors.TEXT_SECONDARY, size=14),
+                                        ft.Text(f"#{player_data['bsbr_rank']}", color=AppColors.PRIMARY, weight=ft.FontWeight.BOLD, size=16),
+                                        ft.Text(f"({player_data['bsbr_pp']})", color=AppColors.TEXT_SECONDARY, size=12)
+                                    ], spacing=5, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                                    bgcolor=AppColors.SURFACE, padding=10, border_radius=8
+                                ),
+                                # Ranking SS
+                                ft.Container(
+                                    content=ft.Row([
+                                        ft.Image(src="/scoresaber_logo.png", width=20, height=20, fit=ft.ImageFit.CONTAIN),
+                                        ft.Text("SS BR Rank:", color=AppColors.TEXT_SECONDARY, size=14),
+                                        ft.Text(f"#{player_data['ss_rank']}", color=AppColors.SECONDARY, weight=ft.FontWeight.BOLD, size=16),
+                                        ft.Text(f"({player_data['ss_pp']})", color=AppColors.TEXT_SECONDARY, size=12)
+                                    ], spacing=5, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                                    bgcolor=AppColors.SURFACE, padding=10, border_radius=8
+                                ),
+                                # Medalhas
+                                ft.Container(
+                                    content=ft.Row([
+                                        ft.Icon(ft.Icons.MILITARY_TECH, color=AppColors.SECONDARY),
+                                        ft.Text("Medalhas:", color=AppColors.TEXT_SECONDARY, size=14),
+                                        ft.Text(f"{player_data['total_medals']}", color=AppColors.SECONDARY, weight=ft.FontWeight.BOLD, size=16),
+                                    ], spacing=5, vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                                    bgcolor=AppColors.SURFACE, padding=10, border_radius=8
+                                )
                             ],
-                            alignment=ft.MainAxisAlignment.START,
-                            vertical_alignment=ft.CrossAxisAlignment.CENTER
+                            alignment=ft.MainAxisAlignment.CENTER, spacing=10, wrap=True, run_spacing=10
                         ),
-                        col={"xs": 12, "md": 8}
-                    ),
-                    ft.Container(
-                        content=score_info,
-                        col={"xs": 12, "md": 4},
-                        alignment=ft.alignment.center_right
+                        width=600 # Limita a largura para forçar wrap apenas em telas pequenas
                     )
                 ],
-                vertical_alignment=ft.CrossAxisAlignment.CENTER
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=15
             ),
-            padding=10, bgcolor=AppColors.SURFACE, border_radius=8, margin=ft.margin.only(bottom=5)
+            padding=30, alignment=ft.alignment.center
         )
 
-    # --- Lógica de Paginação para Scores ---
-    class PaginatedScores(ft.Column):
-        def __init__(self, all_scores, items_per_page=5):
-            super().__init__()
-            self.all_scores = all_scores
-            self.items_per_page = items_per_page
-            self.current_page = 1
-            self.total_pages = math.ceil(len(self.all_scores) / self.items_per_page) if self.all_scores else 1
-            
-            self.list_view = ft.Column(spacing=5)
-            self.page_info = ft.Text(f"Página 1/{self.total_pages}", size=12, color=AppColors.TEXT_SECONDARY)
-            self.btn_prev = ft.IconButton(ft.Icons.CHEVRON_LEFT, on_click=self.prev_page, disabled=True)
-            self.btn_next = ft.IconButton(ft.Icons.CHEVRON_RIGHT, on_click=self.next_page, disabled=self.total_pages <= 1)
-            
-            self.controls = [
-                ft.Container(content=self.list_view, expand=True),
-                ft.Row(
-                    [self.btn_prev, self.page_info, self.btn_next],
-                    alignment=ft.MainAxisAlignment.CENTER
-                )
-            ]
-            self.expand = True
-            self.update_view()
-
-        def update_view(self):
-            if not self.all_scores:
-                self.list_view.controls = [ft.Text("Nenhum mapa brasileiro jogado.", color=AppColors.TEXT_SECONDARY)]
-                self.page_info.visible = False
-                self.btn_prev.visible = False
-                self.btn_next.visible = False
-                return
-
-            start = (self.current_page - 1) * self.items_per_page
-            end = start + self.items_per_page
-            current_items = self.all_scores[start:end]
-            
-            self.list_view.controls = [create_score_item(s) for s in current_items]
-            
-            self.page_info.value = f"Página {self.current_page}/{self.total_pages}"
-            self.btn_prev.disabled = self.current_page == 1
-            self.btn_next.disabled = self.current_page == self.total_pages
-            
-        def prev_page(self, e):
-            if self.current_page > 1:
-                self.current_page -= 1
-                self.update_view()
-                self.update()
-
-        def next_page(self, e):
-            if self.current_page < self.total_pages:
-                self.current_page += 1
-                self.update_view()
-                self.update()
-
-    # --- Layout Final da Página ---
-    return ft.Container(
+        # --- Layout Final da Página ---
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda e: page.go("/ranking"), icon_color=AppColors.TEXT),
+                    profile_header,
+                    ft.Divider(color=AppColors.SURFACE),
+                    ft.Tabs(
+                        selected_index=0,
+                        animation_duration=200,
+                        label_color=AppColors.PRIMARY,
+                        unselected_label_color=AppColors.TEXT_SECONDARY,
+                        indicator_color=AppColors.PRIMARY,
+                        tabs=[
+                            ft.Tab(
+                                text="Mapas Brasileiros Jogados",
+                                content=ft.Container(content=PaginatedScores(scores), padding=ft.padding.only(top=10))
+                            ),
+                            ft.Tab(
+                                text="PP a Ganhar",
+                                content=recommendations_tab
+                            )
+                        ],
+                        on_change=on_tab_change,
+                        height=620
+                    )
+                ],
+                expand=True,
+                scroll=ft.ScrollMode.AUTO # Adiciona scroll à coluna principal
+            ),
+            padding=20
+        )
+
+    # Busca o perfil pré-calculado no DataManager (nunca acessa a rede aqui)
+    player_data = DataManager.get_player_detail(player_id)
+
+    if player_data:
+        return build_profile_content(player_data)
+
+    # Jogador fora da lista: mostra um placeholder e preenche quando a busca
+    # em background terminar
+    view = ft.Container(
         content=ft.Column(
             [
-                ft.IconButton(ft.Icons.ARROW_BACK, on_click=lambda e: page.go("/ranking"), icon_color=AppColors.TEXT),
-                profile_header,
-                ft.Divider(color=AppColors.SURFACE),
-                ft.Text("Mapas Brasileiros Jogados", size=20, weight=ft.FontWeight.BOLD, color=AppColors.TEXT),
-                ft.Container(height=10),
-                PaginatedScores(scores)
+                ft.ProgressRing(),
+                ft.Text("Carregando perfil...", color=AppColors.TEXT_SECONDARY)
             ],
-            expand=True,
-            scroll=ft.ScrollMode.AUTO # Adiciona scroll à coluna principal
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            alignment=ft.MainAxisAlignment.CENTER
         ),
-        padding=20
+        alignment=ft.alignment.center,
+        expand=True
     )
+
+    def on_profile_loaded(profile):
+        view.content = build_profile_content(profile) if profile else not_found_content()
+        try:
+            view.update()
+        except Exception:
+            # A view já saiu da página (usuário navegou para outra rota)
+            pass
+
+    DataManager.fetch_player_detail_async(player_id, on_profile_loaded)
+    return view
@@ -4,14 +4,11 @@ import time
 from app.colors import AppColors
 from app.data.data_manager import DataManager
 from app.playlist.generator import generate_bsbr_playlist
-import math
+from app.api.images import thumbnail_url
+from app.data.live import bind_live_refresh
+from app.components.virtual_list import VirtualList, RecycledRow
 
 def RankingView(page: ft.Page):
-    # --- Carregamento de Dados do Cache ---
-    scoresaber_data = DataManager.scoresaber_data
-    bsbr_data = DataManager.bsbr_data
-    maps_data = DataManager.maps_data
-
     def page_go_update(player_id):
         page.launch_url(f"https://scoresaber.com/u/{player_id}")
         page.update()
@@ -114,175 +111,263 @@ def RankingView(page: ft.Page):
                 page.snack_bar.open = True
                 page.update()
     
-    # --- Componentes de Item ---
-    def create_ranking_item(pos, name, pp, profile_picture=None, player_id=None, color=AppColors.TEXT):
-        # Cria o avatar (imagem ou ícone padrão)
-        avatar_content = ft.Icon(ft.Icons.PERSON, color=AppColors.TEXT_SECONDARY)
-        if profile_picture:
-            avatar_content = ft.Image(
-                src=profile_picture,
+    # --- Componentes de Item (linhas recicladas) ---
+    class RankingRow(RecycledRow):
+        def __init__(self, color=AppColors.TEXT, moves=None):
+            self.color = color
+            # Callable -> {player_id: posições ganhas} da última atualização (só ranking BR)
+            self.moves = moves
+            super().__init__()
+
+        def open_scoresaber(self, e):
+            if self.item and self.item.get("id"):
+                page.launch_url(f"https://scoresaber.com/u/{self.item['id']}")
+
+        def open_bsbr(self, e):
+            if self.item and self.item.get("id"):
+                page.go(f"/player/{self.item['id']}")
+
+        def build(self):
+            # Cria o avatar (imagem ou ícone padrão)
+            self.avatar_icon = ft.Icon(ft.Icons.PERSON, color=AppColors.TEXT_SECONDARY)
+            self.avatar_image = ft.Image(
+                src="",
                 width=30,
                 height=30,
                 border_radius=ft.border_radius.all(15), # Redondo
                 fit=ft.ImageFit.COVER,
-                error_content=ft.Icon(ft.Icons.PERSON, color=AppColors.TEXT_SECONDARY)
+                error_content=ft.Icon(ft.Icons.PERSON, color=AppColors.TEXT_SECONDARY),
+                visible=False
             )
-        
-        avatar_container = ft.Container(
-            content=avatar_content,
-            width=30,
-            height=30,
-            border_radius=15,
-            clip_behavior=ft.ClipBehavior.HARD_EDGE
-        )
 
-        # Botão ScoreSaber (Logo SVG Local)
-        ss_button = ft.Container(
-            content=ft.Image(
-                src="/scoresaber_logo.png",
-                width=15,
-                height=15,
-                fit=ft.ImageFit.CONTAIN,
-                color=AppColors.TEXT if page.theme_mode == ft.ThemeMode.LIGHT else None 
-            ),
-            on_click=lambda e: page.launch_url(f"https://scoresaber.com/u/{player_id}") if player_id else None,
-            tooltip="Ver perfil no ScoreSaber",
-            padding=5,
-            border_radius=5,
-            ink=True, 
-        )
+            avatar_container = ft.Container(
+                content=ft.Stack([self.avatar_icon, self.avatar_image]),
+                width=30,
+                height=30,
+                border_radius=15,
+                clip_behavior=ft.ClipBehavior.HARD_EDGE
+            )
 
-        # Botão Brasil (Perfil Local - Futuro)
-        br_button = ft.Container(
-            content=ft.Image(
-                src="/br.png",
-                width=15,
-                height=15,
-                fit=ft.ImageFit.CONTAIN,
-                color=AppColors.TEXT if page.theme_mode == ft.ThemeMode.LIGHT else None
-            ),
-            on_click=lambda e: page.go(f"/player/{player_id}") if player_id else None,
-            tooltip="Ver perfil no BSBR",
-            padding=5,
-            border_radius=5,
-            ink=True,
-        )
+            # Botão ScoreSaber (Logo SVG Local)
+            ss_button = ft.Container(
+                content=ft.Image(
+                    src="/scoresaber_logo.png",
+                    width=15,
+                    height=15,
+                    fit=ft.ImageFit.CONTAIN,
+                    color=AppColors.TEXT if page.theme_mode == ft.ThemeMode.LIGHT else None 
+                ),
+                on_click=self.open_scoresaber,
+                tooltip="Ver perfil no ScoreSaber",
+                padding=5,
+                border_radius=5,
+                ink=True, 
+            )
 
-        return ft.Container(
-            content=ft.Row(
-                [
-                    # Posição
-                    ft.Text(f"#{pos}", weight=ft.FontWeight.BOLD, color=AppColors.SECONDARY, width=35),
-                    
-                    # Avatar + Nome + Botões
-                    ft.Row(
-                        [
-                            avatar_container,
-                            ft.Container(width=10), 
-                            ft.Text(name, weight=ft.FontWeight.BOLD, color=color, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
-                            ft.Container(width=10), 
-                            br_button,
-                            ss_button,
-                        ],
-                        expand=True,
-                        spacing=0, 
-                        vertical_alignment=ft.CrossAxisAlignment.CENTER
-                    ),
-                    
-                    # PP
-                    ft.Text(pp, color=AppColors.TEXT_SECONDARY, size=12),
-                ],
-                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                vertical_alignment=ft.CrossAxisAlignment.CENTER
-            ),
-            padding=ft.padding.symmetric(vertical=5),
-            border=ft.border.only(bottom=ft.BorderSide(1, AppColors.SURFACE))
-        )
+            # Botão Brasil (Perfil Local)
+            br_button = ft.Container(
+                content=ft.Image(
+                    src="/br.png",
+                    width=15,
+                    height=15,
+                    fit=ft.ImageFit.CONTAIN,
+                    color=AppColors.TEXT if page.theme_mode == ft.ThemeMode.LIGHT else None
+                ),
+                on_click=self.open_bsbr,
+                tooltip="Ver perfil no BSBR",
+                padding=5,
+                border_radius=5,
+                ink=True,
+            )
+
+            self.pos_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.SECONDARY, width=35)
+            self.name_text = ft.Text("", weight=ft.FontWeight.BOLD, color=self.color, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+            self.pp_text = ft.Text("", color=AppColors.TEXT_SECONDARY, size=12)
+            self.move_text = ft.Text("", size=11, weight=ft.FontWeight.BOLD, visible=False)
+
+            return ft.Container(
+                content=ft.Row(
+                    [
+                        # Posição
+                        self.pos_text,
+                        
+                        # Avatar + Nome + Botões
+                        ft.Row(
+                            [
+                                avatar_container,
+                                ft.Container(width=10), 
+                                self.name_text,
+                                ft.Container(width=10), 
+                                br_button,
+                                ss_button,
+                            ],
+                            expand=True,
+                            spacing=0, 
+                            vertical_alignment=ft.CrossAxisAlignment.CENTER
+                        ),
+                        
+                        # Variação desde a última atualização + PP
+                        ft.Row([self.move_text, self.pp_text], spacing=8),
+                    ],
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    vertical_alignment=ft.CrossAxisAlignment.CENTER
+                ),
+                padding=ft.padding.symmetric(vertical=5),
+                border=ft.border.only(bottom=ft.BorderSide(1, AppColors.SURFACE))
+            )
+
+        def bind(self, item):
+            profile_picture = item.get("profilePicture")
+            self.set(self.pos_text, "value", f"#{item['pos']}")
+            self.set(self.name_text, "value", item["name"])
+            if "medals" in item:
+                # Classificação de medalhas (app.ppcalc.medals.MedalTable.rows)
+                self.set(self.pp_text, "value", f"{item['medals']} medalhas")
+                self.set(self.move_text, "visible", False)
+            else:
+                self.set(self.pp_text, "value", item["pp"])
+                self.bind_move(item["id"])
+            self.set(self.avatar_image, "src", thumbnail_url(profile_picture, 30))
+            self.set(self.avatar_image, "visible", bool(profile_picture))
+            self.set(self.avatar_icon, "visible", not profile_picture)
 
-    def create_map_item(data):
-        # Cria a imagem de capa (quadrada com bordas arredondadas)
-        cover_content = ft.Icon(ft.Icons.MUSIC_NOTE, color=AppColors.TEXT_SECONDARY)
-        if data.get('cover_image'):
-            cover_content = ft.Image(
-                src=data['cover_image'],
+        def bind_move(self, player_id):
+            moves = self.moves() if self.moves else {}
+            if player_id not in moves:
+                self.set(self.move_text, "visible", False)
+                return
+            move = moves[player_id]
+            if move is None:
+                text, color = "NOVO", AppColors.PRIMARY
+            elif move > 0:
+                text, color = f"▲{move}", AppColors.PRIMARY
+            elif move < 0:
+                text, color = f"▼{-move}", AppColors.ERROR
+            else:
+                self.set(self.move_text, "visible", False)
+                return
+            self.set(self.move_text, "value", text)
+            self.set(self.move_text, "color", color)
+            self.set(self.move_text, "visible", True)
+
+    class MapRow(RecycledRow):
+        def open_beatsaver(self, e):
+            if self.item and self.item.get("map_id"):
+                page.launch_url(f"https://beatsaver.com/maps/{self.item['map_id']}")
+
+        def open_leaderboard(self, e):
+            if self.item:
+                page.go(f"/map/{self.item['leaderboard_id']}")
+
+        def build(self):
+            # Capa quadrada com bordas arredondadas (ícone enquanto não há imagem)
+            self.cover_icon = ft.Icon(ft.Icons.MUSIC_NOTE, color=AppColors.TEXT_SECONDARY)
+            self.cover_image = ft.Image(
+                src="",
                 width=40,
                 height=40,
                 border_radius=ft.border_radius.all(5),
                 fit=ft.ImageFit.COVER,
-                error_content=ft.Icon(ft.Icons.MUSIC_NOTE, color=AppColors.TEXT_SECONDARY)
+                error_content=ft.Icon(ft.Icons.MUSIC_NOTE, color=AppColors.TEXT_SECONDARY),
+                visible=False
+            )
+                
+            cover_container = ft.Container(
+                content=ft.Stack([self.cover_icon, self.cover_image]),
+                width=40,
+                height=40,
+                border_radius=5,
+                clip_behavior=ft.ClipBehavior.HARD_EDGE,
+                on_click=self.open_beatsaver,
+                tooltip="Ver no BeatSaver"
             )
-            
-        cover_container = ft.Container(
-            content=cover_content,
-            width=40,
-            height=40,
-            border_radius=5,
-            clip_behavior=ft.ClipBehavior.HARD_EDGE,
-            on_click=lambda e: page.launch_url(f"https://beatsaver.com/maps/{data['id']}"),
-            tooltip="Ver no BeatSaver"
-        )
 
-        return ft.Container(
-            content=ft.Row(
-                [
-                    # Capa
-                    cover_container,
-                    
-                    # Espaçamento
-                    ft.Container(width=10),
-                    
-                    # Informações do Mapa
-                    ft.Column(
-                        [
-                            ft.Text(f"{data['name']}", weight=ft.FontWeight.BOLD, color=AppColors.TEXT, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS),
-                            ft.Row(
+            self.name_text = ft.Text("", weight=ft.FontWeight.BOLD, color=AppColors.TEXT, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+            self.diff_text = ft.Text("", color=AppColors.SECONDARY, size=12)
+            self.stars_text = ft.Text("", color=AppColors.SECONDARY, size=12, weight=ft.FontWeight.BOLD)
+
+            return ft.Container(
+                content=ft.Row(
+                    [
+                        # Capa
+                        cover_container,
+                        
+                        # Espaçamento
+                        ft.Container(width=10),
+                        
+                        # Informações do Mapa (abre o leaderboard BR do mapa)
+                        ft.Container(
+                            content=ft.Column(
                                 [
-                                    ft.Text(f"{data['diff']}", color=AppColors.SECONDARY, size=12),
-                                    ft.Text("•", color=AppColors.TEXT_SECONDARY, size=12),
-                                    ft.Text(f"{data['stars']}", color=AppColors.SECONDARY, size=12, weight=ft.FontWeight.BOLD),
+                                    self.name_text,
+                                    ft.Row(
+                                        [
+                                            self.diff_text,
+                                            ft.Text("•", color=AppColors.TEXT_SECONDARY, size=12),
+                                            self.stars_text,
+                                        ],
+                                        spacing=5
+                                    )
                                 ],
-                                spacing=5
-                            )
-                        ],
-                        spacing=2,
-                        expand=True,
-                        alignment=ft.MainAxisAlignment.CENTER
-                    ),
-                ],
-                vertical_alignment=ft.CrossAxisAlignment.CENTER
-            ),
-            padding=ft.padding.symmetric(vertical=5),
-            border=ft.border.only(bottom=ft.BorderSide(1, AppColors.SURFACE))
-        )
+                                spacing=2,
+                                alignment=ft.MainAxisAlignment.CENTER
+                            ),
+                            expand=True,
+                            on_click=self.open_leaderboard,
+                            tooltip="Ver leaderboard BR"
+                        ),
+                    ],
+                    vertical_alignment=ft.CrossAxisAlignment.CENTER
+                ),
+                padding=ft.padding.symmetric(vertical=5),
+                border=ft.border.only(bottom=ft.BorderSide(1, AppColors.SURFACE))
+            )
+
+        def bind(self, item):
+            cover = item.get("cover_image")
+            self.set(self.name_text, "value", f"{item['name']}")
+            self.set(self.diff_text, "value", f"{item['diff']}")
+            self.set(self.stars_text, "value", f"{item['stars']}")
+            self.set(self.cover_image, "src", thumbnail_url(cover, 40))
+            self.set(self.cover_image, "visible", bool(cover))
+            self.set(self.cover_icon, "visible", not cover)
+
+    def loading_content():
+        msg = "Carregando dados..." if DataManager.is_loading else "Nenhum dado encontrado."
+        return ft.Column([
+            ft.ProgressRing() if DataManager.is_loading else ft.Icon(ft.Icons.WARNING_AMBER, color=AppColors.TEXT_SECONDARY),
+            ft.Text(msg, color=AppColors.TEXT_SECONDARY)
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
 
-    # --- Lógica de Paginação ---
+    # --- Seção Paginada ---
     class PaginatedSection(ft.Container):
-        def __init__(self, title, icon, data, item_creator_func, items_per_page=10, title_color=AppColors.TEXT, is_ranking=True, extra_action=None):
+        def __init__(self, title, icon, source, row_factory, items_per_page=10, title_color=AppColors.TEXT, extra_action=None):
             super().__init__()
             self.title = title
             self.icon = icon
-            self.all_data = data
-            self.item_creator = item_creator_func
-            self.items_per_page = items_per_page
-            self.current_page = 1
             self.title_color = title_color
-            self.is_ranking = is_ranking
             self.extra_action = extra_action
-            
-            self.total_pages = math.ceil(len(self.all_data) / self.items_per_page) if self.all_data else 1
-            
-            self.list_column = ft.Column(spacing=5, scroll=ft.ScrollMode.AUTO)
-            self.page_info = ft.Text(f"Página 1/{self.total_pages}", size=12, color=AppColors.TEXT_SECONDARY)
-            self.btn_prev = ft.IconButton(ft.Icons.CHEVRON_LEFT, on_click=self.prev_page, disabled=True, icon_color=AppColors.TEXT)
-            self.btn_next = ft.IconButton(ft.Icons.CHEVRON_RIGHT, on_click=self.next_page, disabled=self.total_pages <= 1, icon_color=AppColors.TEXT)
+
+            # Linhas recicladas: a troca de página só altera os campos que mudaram
+            self.list_view = VirtualList(
+                row_factory=row_factory,
+                source=source,
+                page_size=items_per_page,
+                empty_content=lambda: ft.Container(
+                    content=loading_content(),
+                    alignment=ft.alignment.center,
+                    padding=20
+                ),
+                scroll=ft.ScrollMode.AUTO,
+                icon_color=AppColors.TEXT,
+                expand=True
+            )
 
             self.bgcolor = AppColors.SURFACE
             self.padding = 20
             self.border_radius = 10
             self.col = {"sm": 12, "md": 4}
             self.height = 600
-
-            self.update_list_view()
             
             header_controls = [
                 ft.Icon(self.icon, color=self.title_color),
@@ -297,85 +382,44 @@ def RankingView(page: ft.Page):
                 [
                     ft.Row(header_controls, alignment=ft.MainAxisAlignment.START, vertical_alignment=ft.CrossAxisAlignment.CENTER),
                     ft.Divider(color=self.title_color if self.title_color != AppColors.TEXT else AppColors.TEXT_SECONDARY),
-                    
-                    ft.Container(content=self.list_column, expand=True),
-                    
-                    ft.Divider(color=AppColors.SURFACE),
-                    
-                    ft.Row(
-                        [
-                            self.btn_prev,
-                            self.page_info,
-                            self.btn_next
-                        ],
-                        alignment=ft.MainAxisAlignment.CENTER
-                    )
+                    self.list_view
                 ]
             )
 
-        def update_list_view(self):
-            if not self.all_data:
-                msg = "Carregando dados..." if DataManager.is_loading else "Nenhum dado encontrado."
-                self.list_column.controls = [
-                    ft.Container(
-                        content=ft.Column([
-                            ft.ProgressRing() if DataManager.is_loading else ft.Icon(ft.Icons.WARNING_AMBER, color=AppColors.TEXT_SECONDARY),
-                            ft.Text(msg, color=AppColors.TEXT_SECONDARY)
-                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                        alignment=ft.alignment.center,
-                        padding=20
-                    )
-                ]
-                return
+    # --- Instanciação das Colunas ---
 
-            start = (self.current_page - 1) * self.items_per_page
-            end = start + self.items_per_page
-            current_items = self.all_data[start:end]
-            
-            self.list_column.controls.clear()
-            for item in current_items:
-                if self.is_ranking:
-                    pfp = item.get("profilePicture")
-                    pid = item.get("id")
-                    control = self.item_creator(item["pos"], item["name"], item["pp"], pfp, pid, self.title_color)
-                else:
-                    control = self.item_creator(item)
-                self.list_column.controls.append(control)
-            
-            self.page_info.value = f"Página {self.current_page}/{self.total_pages}"
-            self.btn_prev.disabled = self.current_page == 1
-            self.btn_next.disabled = self.current_page == self.total_pages
-
-        def prev_page(self, e):
-            if self.current_page > 1:
-                self.current_page -= 1
-                self.update_list_view()
-                self.content.update()
-
-        def next_page(self, e):
-            if self.current_page < self.total_pages:
-                self.current_page += 1
-                self.update_list_view()
-                self.content.update()
+    # Fonte atual das colunas de jogadores (trocada pela busca e pelas medalhas)
+    sources = {
+        "ss": lambda: DataManager.scoresaber_data,
+        "br": lambda: DataManager.bsbr_data
+    }
+    sections = {} # Colunas já montadas: {"ss" | "br" | "maps": PaginatedSection}
 
-    # --- Instanciação das Colunas ---
-    
-    score_saber_col = PaginatedSection(
-        title="ScoreSaber",
-        icon=ft.Icons.PUBLIC,
-        data=scoresaber_data,
-        item_creator_func=create_ranking_item,
-        items_per_page=8,
-        title_color=AppColors.TEXT
-    )
+    def set_source(key, source, keep_page=False):
+        sources[key] = source
+        if key in sections:
+            list_view = sections[key].list_view
+            if keep_page:
+                # Atualização ao vivo: continua na mesma página; o refresh_changed faz o rebind
+                list_view.source = source
+            else:
+                list_view.set_source(source)
+
+    # Alterna a coluna BR entre o ranking por PP e a classificação de medalhas
+    def toggle_medals(e):
+        show_medals = medals_btn.icon == ft.Icons.MILITARY_TECH
+        medals_btn.icon = ft.Icons.FLAG if show_medals else ft.Icons.MILITARY_TECH
+        medals_btn.tooltip = "Ver ranking por PP" if show_medals else "Ver classificação de medalhas"
+        search_field.value = ""
+        set_source("br", (lambda: DataManager.medal_standings) if show_medals else (lambda: DataManager.bsbr_data))
+        set_source("ss", lambda: DataManager.scoresaber_data)
+        page.update()
 
-    bsbr_col = PaginatedSection(
-        title="Ranking BR",
-        icon=ft.Icons.FLAG,
-        data=bsbr_data,
-        item_creator_func=create_ranking_item,
-        items_per_page=8,
-        title_color=AppColors.PRIMARY
+    medals_btn = ft.IconButton(
+        icon=ft.Icons.MILITARY_TECH,
+        tooltip="Ver classificação de medalhas",
+        icon_color=AppColors.PRIMARY,
+        on_click=toggle_medals,
     )
 
     # Botão de Download da Playlist
@@ -386,41 +430,140 @@ def RankingView(page: ft.Page):
         on_click=download_playlist,
     )
 
-    maps_col = PaginatedSection(
-        title="Mapas Ranqueados",
-        icon=ft.Icons.MAP,
-        data=maps_data,
-        item_creator_func=create_map_item,
-        items_per_page=6,
-        title_color=AppColors.SECONDARY,
-        is_ranking=False,
-        extra_action=download_btn # Adiciona o botão aqui
+    def build_section(key):
+        if key == "ss":
+            return PaginatedSection(
+                title="ScoreSaber",
+                icon=ft.Icons.PUBLIC,
+                source=sources["ss"],
+                row_factory=lambda: RankingRow(AppColors.TEXT),
+                items_per_page=8,
+                title_color=AppColors.TEXT
+            )
+        if key == "br":
+            return PaginatedSection(
+                title="Ranking BR",
+                icon=ft.Icons.FLAG,
+                source=sources["br"],
+                row_factory=lambda: RankingRow(AppColors.PRIMARY, moves=lambda: DataManager.rank_moves),
+                items_per_page=8,
+                title_color=AppColors.PRIMARY,
+                extra_action=medals_btn
+            )
+        return PaginatedSection(
+            title="Mapas Ranqueados",
+            icon=ft.Icons.MAP,
+            source=lambda: DataManager.maps_data,
+            row_factory=MapRow,
+            items_per_page=6,
+            title_color=AppColors.SECONDARY,
+            extra_action=download_btn # Adiciona o botão aqui
+        )
+
+    def section(key):
+        if key not in sections:
+            sections[key] = build_section(key)
+        return sections[key]
+
+    # --- Busca de Jogadores ---
+    def on_search(e):
+        text = (e.control.value or "").strip()
+        # A busca é sobre o ranking por PP
+        medals_btn.icon = ft.Icons.MILITARY_TECH
+        medals_btn.tooltip = "Ver classificação de medalhas"
+        if text:
+            # Consulta o índice em memória do snapshot atual (sem acessar o banco)
+            set_source("br", DataManager.search_players(text, source="bsbr"))
+            set_source("ss", DataManager.search_players(text, source="ss"))
+        else:
+            set_source("br", lambda: DataManager.bsbr_data)
+            set_source("ss", lambda: DataManager.scoresaber_data)
+        for key in ("br", "ss"):
+            if key in sections:
+                sections[key].list_view.update()
+        if "br" in sections:
+            medals_btn.update()
+
+    search_field = ft.TextField(
+        hint_text="Buscar jogador (nome ou ID, ex: joao pp:300-500 medalhas:10)",
+        prefix_icon=ft.Icons.SEARCH,
+        on_change=on_search,
+        dense=True,
+        border_color=AppColors.SURFACE,
+        expand=True
     )
 
+    def sections_layout():
+        if (page.width or 0) >= 768:
+            return ft.ResponsiveRow(
+                [section("ss"), section("br"), section("maps")],
+                spacing=20,
+                run_spacing=20,
+            )
+
+        # No celular só uma coluna aparece por vez: as outras são montadas ao abrir a aba
+        tab_keys = ["ss", "br", "maps"]
+
+        def on_tab_change(e):
+            key = tab_keys[tabs.selected_index]
+            if key not in sections:
+                tabs.tabs[tabs.selected_index].content = section(key)
+                tabs.update()
+
+        tabs = ft.Tabs(
+            selected_index=1,
+            animation_duration=200,
+            tabs=[
+                ft.Tab(text="ScoreSaber", content=ft.Container()),
+                ft.Tab(text="Ranking BR", content=section("br")),
+                ft.Tab(text="Mapas", content=ft.Container())
+            ],
+            on_change=on_tab_change,
+            height=680,
+            indicator_color=AppColors.PRIMARY,
+            label_color=AppColors.PRIMARY,
+            unselected_label_color=AppColors.TEXT_SECONDARY,
+        )
+        return tabs
+
     # Adiciona um botão de refresh manual ou info de última atualização
-    last_update_text = "Atualizando..."
-    if DataManager.last_updated:
-        last_update_text = f"Última atualização: {DataManager.last_updated.strftime('%H:%M:%S')}"
-    
-    return ft.Column(
+    def last_update_label():
+        if DataManager.last_updated:
+            return f"Última atualização: {DataManager.last_updated.strftime('%H:%M:%S')}"
+        return "Atualizando..."
+
+    last_update_text = ft.Text(last_update_label(), size=12, color=AppColors.TEXT_SECONDARY)
+
+    # Nova geração com a view aberta: rebind das páginas visíveis, enviando só
+    # as linhas que mudaram
+    def live_refresh():
+        text = (search_field.value or "").strip()
+        if text:
+            set_source("br", DataManager.search_players(text, source="bsbr"), keep_page=True)
+            set_source("ss", DataManager.search_players(text, source="ss"), keep_page=True)
+        for built in sections.values():
+            built.list_view.refresh_changed()
+        last_update_text.value = last_update_label()
+        page.update(last_update_text)
+
+    view = ft.Column(
         [
             ft.Container(
-                content=ft.Text(last_update_text, size=12, color=AppColors.TEXT_SECONDARY),
-                alignment=ft.alignment.center_right,
-                padding=ft.padding.only(right=20, top=10)
+                content=ft.Row(
+                    [
+                        search_field,
+                        last_update_text
+                    ],
+                    spacing=20,
+                    vertical_alignment=ft.CrossAxisAlignment.CENTER
+                ),
+                padding=ft.padding.only(left=20, right=20, top=10)
             ),
             ft.Divider(color=AppColors.SURFACE),
-            ft.ResponsiveRow(
-                [
-                    score_saber_col,
-                    bsbr_col,
-                    maps_col
-                ],
-                spacing=20,
-                run_spacing=20,
-            )
+            sections_layout()
         ],
         scroll=ft.ScrollMode.AUTO,
         expand=True,
         alignment=ft.MainAxisAlignment.START,
     )
+    return bind_live_refresh(view, live_refresh)
@@ -0,0 +1,83 @@
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ppcalc.compute import compute_ranking, best_in_ranges, get_pool
+from app.data.stars import STAR_STEP
+
+# Benchmark da fase de cálculo do ranking BR com dados sintéticos.
+# Uso: python benchmarks/bench_rank_compute.py [--maps 1000] [--players 5000] [--workers 1 2 4]
+
+
+def synthetic_data(maps_count, players_count, scores_per_map, seed):
+    rng = random.Random(seed)
+    players = [
+        {"id": str(76561198000000000 + i), "name": f"Jogador {i}", "profilePicture": "", "country": "BR"}
+        for i in range(players_count)
+    ]
+    maps = []
+    leaderboard_scores = {}
+    for i in range(maps_count):
+        max_score = rng.randint(300_000, 2_000_000)
+        lb_id = str(100_000 + i)
+        maps.append({"leaderboard_id": lb_id, "stars": round(rng.uniform(1, 13), 2), "max_score": max_score})
+        scores = []
+        for player in rng.sample(players, min(players_count, scores_per_map)):
+            scores.append({
+                "leaderboardPlayerInfo": player,
+                "modifiedScore": int(max_score * rng.uniform(0.80, 0.99)),
+                "modifiers": "NF" if rng.random() < 0.02 else "",
+                "timeSet": "2024-01-01T00:00:00.000Z"
+            })
+        scores.sort(key=lambda s: s["modifiedScore"], reverse=True)
+        leaderboard_scores[lb_id] = scores
+    return maps, leaderboard_scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalonamento do cálculo do ranking por número de processos.")
+    parser.add_argument("--maps", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--scores-per-map", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Gerando {args.maps} mapas x {args.players} jogadores ({args.scores_per_map} scores/mapa)...")
+    maps, leaderboard_scores = synthetic_data(args.maps, args.players, args.scores_per_map, args.seed)
+    rows = sum(len(s) for s in leaderboard_scores.values())
+    print(f"{rows} scores, {os.cpu_count()} núcleos disponíveis\n")
+
+    baseline = None
+    print(f"{'processos':>9} {'ranking':>10} {'estrelas':>10} {'total':>10} {'speedup':>8}")
+    for workers in args.workers:
+        if workers > 1:
+            # Sobe os processos antes de medir
+            get_pool(workers).submit(int).result()
+
+        start = time.perf_counter()
+        result = compute_ranking(maps, leaderboard_scores, workers=workers)
+        ranking_time = time.perf_counter() - start
+
+        stars = array("d")
+        pps = array("d")
+        for m in maps:
+            for score in result["map_scores"][m["leaderboard_id"]]:
+                stars.append(float(m["stars"]))
+                pps.append(score["pp"])
+        start = time.perf_counter()
+        best_in_ranges(stars, pps, STAR_STEP, workers=workers)
+        stars_time = time.perf_counter() - start
+
+        total = ranking_time + stars_time
+        baseline = baseline or total
+        print(f"{workers:>9} {ranking_time:>9.2f}s {stars_time:>9.2f}s {total:>9.2f}s {baseline / total:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
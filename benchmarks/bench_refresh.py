@@ -0,0 +1,213 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixture_server import FixtureDataset, FixtureServer
+
+# Ciclo completo de atualização (DataManager.update_all_data) contra o
+# fixture_server local, com tempo, requisições, bytes, pico de RSS e tempo
+# de escrita no banco por fase.
+#
+# Uso: python benchmarks/bench_refresh.py [--players 500] [--maps 200] [--latency 20] [--cycles 2]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PhaseRecorder:
+    """Linha do tempo de fases: cada `mark` fecha a fase atual e abre a próxima."""
+
+    def __init__(self, server):
+        self.server = server
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.phases = []
+        self.current = None
+
+    def mark(self, name):
+        with self.lock:
+            self._close()
+            stats = self.server.stats()
+            self.current = {
+                "name": name,
+                "start": time.perf_counter(),
+                "requests": stats["total_requests"],
+                "bytes": stats["bytes_sent"],
+                "throttled": stats["throttled"],
+                "db_write": 0.0
+            }
+
+    def finish(self):
+        with self.lock:
+            self._close()
+
+    def add_db_write(self, seconds):
+        with self.lock:
+            if self.current is not None:
+                self.current["db_write"] += seconds
+
+    def _close(self):
+        if self.current is None:
+            return
+        stats = self.server.stats()
+        phase = self.current
+        self.phases.append({
+            "name": phase["name"],
+            "wall": time.perf_counter() - phase["start"],
+            "requests": stats["total_requests"] - phase["requests"],
+            "bytes": stats["bytes_sent"] - phase["bytes"],
+            "throttled": stats["throttled"] - phase["throttled"],
+            "db_write": phase["db_write"],
+            "peak_rss": peak_rss_mb()
+        })
+        self.current = None
+
+
+def instrument(recorder):
+    """Envolve os passos do update_all_data para marcar as fases."""
+    import app.ppcalc as ppcalc
+    import app.data.data_manager as dm_module
+    from app.data.data_manager import DataManager
+    from app.ppcalc.rankedbr import ScoreSaberAPI
+
+    def phase(name, func, next_phase=None, db_write=False):
+        def wrapper(*args, **kwargs):
+            recorder.mark(name)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if db_write:
+                    recorder.add_db_write(time.perf_counter() - start)
+                if next_phase:
+                    recorder.mark(next_phase)
+        return wrapper
+
+    ScoreSaberAPI.get_players = staticmethod(phase("players", ScoreSaberAPI.get_players))
+    ppcalc.fetch_leaderboards = phase("leaderboards", ppcalc.fetch_leaderboards)
+    ppcalc.compute_ranking = phase("compute", ppcalc.compute_ranking)
+    dm_module.ingest_leaderboard_scores = phase(
+        "ingest", dm_module.ingest_leaderboard_scores, next_phase="player_scores", db_write=True
+    )
+    DataManager.load_from_db = classmethod(phase("load_from_db", DataManager.load_from_db.__func__))
+    DataManager._publish = classmethod(phase("publish", DataManager._publish.__func__))
+
+    # Escritas por jogador rodam em threads dentro da fase player_scores
+    save_scores = DataManager.save_scores_to_db.__func__
+
+    def timed_save(cls, player_id, scores):
+        start = time.perf_counter()
+        try:
+            return save_scores(cls, player_id, scores)
+        finally:
+            recorder.add_db_write(time.perf_counter() - start)
+
+    DataManager.save_scores_to_db = classmethod(timed_save)
+
+
+def seed_maps(dataset):
+    from app.data.database import SessionLocal
+    from app.data.models.ranked_br_maps import RankedBRMaps
+
+    db = SessionLocal()
+    try:
+        for row in dataset.ranked_maps():
+            db.add(RankedBRMaps(**row))
+        db.commit()
+    finally:
+        db.close()
+
+
+def print_report(cycle, phases, total):
+    print(f"\n--- Ciclo {cycle}: {total:.2f}s ---")
+    print(f"{'fase':<14} {'tempo':>9} {'reqs':>7} {'429':>5} {'KB':>10} {'DB write':>9} {'pico RSS':>9}")
+    for p in phases:
+        rss = f"{p['peak_rss']:.0f}MB" if p["peak_rss"] is not None else "-"
+        print(
+            f"{p['name']:<14} {p['wall']:>8.2f}s {p['requests']:>7} {p['throttled']:>5} "
+            f"{p['bytes'] / 1024:>10.1f} {p['db_write']:>8.2f}s {rss:>9}"
+        )
+    print(
+        f"{'total':<14} {total:>8.2f}s {sum(p['requests'] for p in phases):>7} "
+        f"{sum(p['throttled'] for p in phases):>5} {sum(p['bytes'] for p in phases) / 1024:>10.1f} "
+        f"{sum(p['db_write'] for p in phases):>8.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do ciclo de atualização contra o fixture_server.")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--maps", type=int, default=200)
+    parser.add_argument("--extra-maps", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0, help="Latência por requisição (ms)")
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="Limite do servidor por janela")
+    parser.add_argument("--rate-window", type=float, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--client-rate-limit", type=int, default=100000,
+                        help="Limite por minuto do cliente (produção usa 350)")
+    parser.add_argument("--cycles", type=int, default=2, help="Ciclos seguidos (o 2º mede o caminho incremental)")
+    args = parser.parse_args()
+
+    print(f"Gerando dados ({args.players} jogadores, {args.maps}+{args.extra_maps} leaderboards)...")
+    dataset = FixtureDataset(args.players, args.maps, args.extra_maps, args.seed)
+    server = FixtureServer(
+        dataset, latency_ms=args.latency, jitter_ms=args.jitter,
+        rate_limit=args.rate_limit, rate_window=args.rate_window,
+        error_rate=args.error_rate, seed=args.seed
+    ).start()
+
+    # Configuração lida na importação do app: URLs, rate limit e pasta do banco
+    os.environ["BSBR_SCORESABER_API_URL"] = server.scoresaber_url
+    os.environ["BSBR_BEATSAVER_API_URL"] = server.beatsaver_url
+    os.environ["BSBR_SCORESABER_RATE_LIMIT"] = str(args.client_rate_limit)
+    workdir = tempfile.mkdtemp(prefix="bsbr-bench-")
+    os.chdir(workdir)
+
+    from app.data.database import init_db
+    from app.data.data_manager import DataManager
+
+    init_db()
+    seed_maps(dataset)
+    print(f"Banco em {workdir}, fixture em {server.url}")
+
+    recorder = PhaseRecorder(server)
+    instrument(recorder)
+
+    for cycle in range(1, args.cycles + 1):
+        recorder.reset()
+        start = time.perf_counter()
+        ok = DataManager.update_all_data()
+        recorder.mark("snapshot")
+        DataManager._save_snapshot()
+        recorder.finish()
+        total = time.perf_counter() - start
+
+        if not ok:
+            print(f"Ciclo {cycle} falhou.")
+        print_report(cycle, recorder.phases, total)
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ppcalc.simulate import RerankSimulator
+from app.scorecalc import get_pp, WEIGHT_COEFFICIENT
+
+# Benchmark do simulador de rerank sobre uma base BR sintética.
+# Uso: python benchmarks/bench_simulate.py [--players 5000] [--maps 3000] [--changed 100]
+
+
+def synthetic_state(players_count, maps_count, scores_per_map, seed):
+    """bsbr_data, player_details e maps_data no formato publicado pelo DataManager."""
+    rng = random.Random(seed)
+    ids = [str(76561198000000000 + i) for i in range(players_count)]
+    maps_data = []
+    scores_by_player = {pid: [] for pid in ids}
+    for i in range(maps_count):
+        lb_id = str(100_000 + i)
+        stars = round(rng.uniform(1, 13), 2)
+        maps_data.append({"leaderboard_id": lb_id, "stars": f"{stars:.2f}★"})
+        for pid in rng.sample(ids, min(players_count, scores_per_map)):
+            acc = rng.uniform(80, 99)
+            scores_by_player[pid].append({"leaderboard_id": lb_id, "acc": acc, "pp": get_pp(stars, acc)})
+
+    player_details = {}
+    totals = {}
+    for pid, scores in scores_by_player.items():
+        scores.sort(key=lambda s: s["pp"], reverse=True)
+        for i, score in enumerate(scores):
+            score["weighted_pp"] = score["pp"] * (WEIGHT_COEFFICIENT ** i)
+        player_details[pid] = {"scores": scores, "total_medals": 0}
+        totals[pid] = sum(s["weighted_pp"] for s in scores)
+
+    ranked = sorted(ids, key=totals.__getitem__, reverse=True)
+    bsbr_data = [
+        {"pos": pos, "name": f"Jogador {pid[-4:]}", "id": pid, "profilePicture": "", "pp": f"{totals[pid]:.2f}pp"}
+        for pos, pid in enumerate(ranked, start=1)
+    ]
+    return bsbr_data, player_details, maps_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de uma simulação de estrelas sobre a base inteira.")
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--maps", type=int, default=3000)
+    parser.add_argument("--scores-per-map", type=int, default=150)
+    parser.add_argument("--changed", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Gerando {args.players} jogadores x {args.maps} mapas ({args.scores_per_map} scores/mapa)...")
+    bsbr_data, player_details, maps_data = synthetic_state(args.players, args.maps, args.scores_per_map, args.seed)
+
+    start = time.perf_counter()
+    simulator = RerankSimulator(bsbr_data, player_details, maps_data, workers=args.workers)
+    print(f"Colunas montadas em {time.perf_counter() - start:.2f}s ({len(simulator.pps)} scores)")
+
+    rng = random.Random(args.seed)
+    for changed in sorted({1, args.changed, args.maps}):
+        changes = {m["leaderboard_id"]: round(rng.uniform(1, 13), 2) for m in rng.sample(maps_data, changed)}
+        start = time.perf_counter()
+        result = simulator.simulate(changes)
+        elapsed = time.perf_counter() - start
+        print(f"{changed:>6} mapas alterados: {elapsed:.3f}s ({len(result['players'])} jogadores mudaram)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Servidor local que imita as rotas do ScoreSaber e do BeatSaver usadas pelo
+# app, com dados sintéticos determinísticos (seed). Permite medir o ciclo de
+# atualização sem acessar a internet.
+#
+# Uso:
+#   python benchmarks/fixture_server.py --port 8765 --players 500 --maps 200 --latency 30
+#   BSBR_SCORESABER_API_URL=http://127.0.0.1:8765/api \
+#   BSBR_BEATSAVER_API_URL=http://127.0.0.1:8765/beatsaver python worker.py
+#
+# Rotas: /api/players, /api/player/{id}/full, /api/player/{id}/scores,
+# /api/leaderboard/by-id/{id}/scores, /api/leaderboard/by-id/{id}/info,
+# /api/leaderboard/get-difficulties/{hash}, /beatsaver/maps/id/{key}
+# e /__stats (contadores do próprio servidor).
+
+PLAYERS_PER_PAGE = 50
+LEADERBOARD_SCORES_PER_PAGE = 12
+MAX_PLAYER_SCORES_LIMIT = 100
+STAR_MULTIPLIER = 42.117208413
+
+DIFFICULTIES = [(1, "Easy"), (3, "Normal"), (5, "Hard"), (7, "Expert"), (9, "ExpertPlus")]
+
+
+class FixtureDataset:
+    """
+    Dados sintéticos: jogadores BR, leaderboards rankeados BR (com scores de
+    boa parte dos jogadores) e leaderboards extras que só aparecem no
+    histórico de cada jogador.
+    """
+
+    def __init__(self, players=500, ranked_maps=200, extra_maps=600, seed=42):
+        rng = random.Random(seed)
+        now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        self.players = []
+        skills = []
+        for i in range(players):
+            skill = rng.betavariate(2, 5)
+            skills.append(skill)
+            self.players.append({
+                "id": str(76561198000000000 + i),
+                "name": f"Jogador {i}",
+                "profilePicture": f"https://cdn.scoresaber.com/avatars/{76561198000000000 + i}.jpg",
+                "country": "BR",
+                "pp": 0.0,
+                "rank": 0,
+                "countryRank": 0,
+                "role": None,
+                "badges": None,
+                "histories": "",
+                "permissions": 0,
+                "banned": False,
+                "inactive": False,
+                "scoreStats": {
+                    "totalScore": 0,
+                    "totalRankedScore": 0,
+                    "averageRankedAccuracy": 0.0,
+                    "totalPlayCount": 0,
+                    "rankedPlayCount": 0,
+                    "replaysWatched": 0
+                }
+            })
+
+        self.leaderboards = {}
+        self.leaderboard_scores = {}
+        self.player_scores = defaultdict(list)
+        self.by_hash = defaultdict(list)
+        self.beatsaver_maps = {}
+        self.ranked_ids = []
+
+        score_id = 1
+        for i in range(ranked_maps + extra_maps):
+            lb_id = 200000 + i
+            key = format(0x10000 + i, "x")
+            song_hash = f"{rng.getrandbits(160):040X}"
+            diff, diff_name = DIFFICULTIES[rng.choice([2, 3, 4, 4])]
+            stars = round(rng.uniform(1, 13), 2)
+            max_score = rng.randint(150, 1500) * 1000
+            info = {
+                "id": lb_id,
+                "songHash": song_hash,
+                "songName": f"Song {i}",
+                "songSubName": "",
+                "songAuthorName": f"Artist {i % 97}",
+                "levelAuthorName": f"Mapper {i % 53}",
+                "difficulty": {
+                    "leaderboardId": lb_id,
+                    "difficulty": diff,
+                    "gameMode": "SoloStandard",
+                    "difficultyRaw": f"_{diff_name}_SoloStandard"
+                },
+                "maxScore": max_score,
+                "createdDate": (now - timedelta(days=rng.randint(30, 900))).isoformat(),
+                "rankedDate": None,
+                "qualifiedDate": None,
+                "lovedDate": None,
+                "ranked": True,
+                "qualified": False,
+                "loved": False,
+                "maxPP": -1,
+                "stars": stars,
+                "plays": 0,
+                "dailyPlays": 0,
+                "positiveModifiers": False,
+                "playerScore": None,
+                "coverImage": f"https://cdn.scoresaber.com/covers/{song_hash}.png",
+                "difficulties": None
+            }
+            self.leaderboards[lb_id] = info
+            self.by_hash[song_hash].append({
+                "leaderboardId": lb_id,
+                "difficulty": diff,
+                "gameMode": "SoloStandard",
+                "difficultyRaw": info["difficulty"]["difficultyRaw"]
+            })
+            self.beatsaver_maps[key] = {
+                "id": key,
+                "name": info["songName"],
+                "uploader": {"name": info["levelAuthorName"]},
+                "metadata": {"songName": info["songName"], "levelAuthorName": info["levelAuthorName"]},
+                "versions": [{"hash": song_hash.lower(), "key": key}]
+            }
+            if i < ranked_maps:
+                self.ranked_ids.append(lb_id)
+                info["mapKey"] = key
+
+            # Quem jogou: jogadores melhores jogam mais mapas
+            scores = []
+            for p, skill in enumerate(skills):
+                if rng.random() > 0.15 + skill * 0.6:
+                    continue
+                acc = min(0.995, max(0.6, rng.gauss(0.82 + skill * 0.15 - stars * 0.004, 0.02)))
+                base_score = int(max_score * acc)
+                modifiers = "NF" if rng.random() < 0.02 else ""
+                scores.append({
+                    "id": score_id,
+                    "leaderboardPlayerInfo": {
+                        "id": self.players[p]["id"],
+                        "name": self.players[p]["name"],
+                        "profilePicture": self.players[p]["profilePicture"],
+                        "country": "BR",
+                        "permissions": 0,
+                        "role": None
+                    },
+                    "rank": 0,
+                    "baseScore": base_score,
+                    "modifiedScore": base_score,
+                    "pp": 0.0 if modifiers else round(stars * STAR_MULTIPLIER * acc ** 8, 4),
+                    "weight": 0,
+                    "modifiers": modifiers,
+                    "multiplier": 1,
+                    "badCuts": 0,
+                    "missedNotes": rng.randint(0, 5),
+                    "maxCombo": 0,
+                    "fullCombo": False,
+                    "hmd": 0,
+                    "timeSet": (now - timedelta(minutes=rng.randint(0, 525600))).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                    "hasReplay": False
+                })
+                score_id += 1
+
+            scores.sort(key=lambda s: s["modifiedScore"], reverse=True)
+            for rank, score in enumerate(scores, 1):
+                score["rank"] = rank
+                pid = score["leaderboardPlayerInfo"]["id"]
+                self.player_scores[pid].append((lb_id, score))
+            info["plays"] = len(scores)
+            self.leaderboard_scores[lb_id] = scores
+
+        # Totais dos jogadores e ranking do país
+        for player in self.players:
+            entries = self.player_scores.get(player["id"], [])
+            pps = sorted((s["pp"] for _, s in entries), reverse=True)
+            player["pp"] = round(sum(pp * 0.965 ** i for i, pp in enumerate(pps)), 2)
+            stats = player["scoreStats"]
+            stats["totalPlayCount"] = len(entries)
+            stats["rankedPlayCount"] = sum(1 for _, s in entries if s["pp"] > 0)
+            stats["totalScore"] = sum(s["baseScore"] for _, s in entries)
+            stats["totalRankedScore"] = stats["totalScore"]
+            if entries:
+                stats["averageRankedAccuracy"] = round(
+                    sum(s["baseScore"] / self.leaderboards[lb]["maxScore"] for lb, s in entries) / len(entries) * 100, 4
+                )
+        self.players.sort(key=lambda p: p["pp"], reverse=True)
+        for rank, player in enumerate(self.players, 1):
+            player["rank"] = rank
+            player["countryRank"] = rank
+        self.players_by_id = {p["id"]: p for p in self.players}
+
+    def ranked_maps(self):
+        """Linhas para a tabela RankedBRMaps (mapas rankeados BR do fixture)."""
+        rows = []
+        for lb_id in self.ranked_ids:
+            info = self.leaderboards[lb_id]
+            rows.append({
+                "leaderboard_id": str(lb_id),
+                "map_id": info["mapKey"],
+                "map_name": info["songName"],
+                "map_author": info["levelAuthorName"],
+                "difficulty": info["difficulty"]["difficultyRaw"].split("_")[1],
+                "stars": info["stars"],
+                "max_score": info["maxScore"],
+                "cover_image": info["coverImage"]
+            })
+        return rows
+
+
+def _page(items, page, per_page):
+    start = (page - 1) * per_page
+    return items[start:start + per_page]
+
+
+def _metadata(total, page, per_page):
+    return {"total": total, "page": page, "itemsPerPage": per_page}
+
+
+class FixtureServer:
+    """
+    Servidor HTTP do fixture (stdlib). Pode rodar em thread dentro do
+    benchmark (`start()`/`stop()`) ou pela linha de comando.
+
+    Args:
+        latency_ms, jitter_ms: Atraso artificial por requisição.
+        rate_limit, rate_window: Máximo de requisições por janela (s); acima
+            disso responde 429 com Retry-After, como o ScoreSaber.
+        error_rate: Probabilidade de um 429 espúrio em qualquer requisição.
+    """
+
+    def __init__(self, dataset, host="127.0.0.1", port=0, latency_ms=0, jitter_ms=0,
+                 rate_limit=None, rate_window=60, error_rate=0.0, seed=0):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.calls = []
+        self.reset_stats()
+
+        self.routes = [
+            (re.compile(r"^/api/players$"), self._players),
+            (re.compile(r"^/api/player/(\d+)/full$"), self._player_full),
+            (re.compile(r"^/api/player/(\d+)/scores$"), self._player_scores),
+            (re.compile(r"^/api/leaderboard/by-id/(\d+)/scores$"), self._leaderboard_scores),
+            (re.compile(r"^/api/leaderboard/by-id/(\d+)/info$"), self._leaderboard_info),
+            (re.compile(r"^/api/leaderboard/get-difficulties/(\w+)$"), self._difficulties),
+            (re.compile(r"^/beatsaver/maps/id/(\w+)$"), self._beatsaver_map),
+        ]
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def scoresaber_url(self):
+        return f"{self.url}/api"
+
+    @property
+    def beatsaver_url(self):
+        return f"{self.url}/beatsaver"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    # --- Estatísticas ---
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests = defaultdict(int)
+            self.bytes_sent = 0
+            self.throttled = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "bytes_sent": self.bytes_sent,
+                "throttled": self.throttled
+            }
+
+    # --- Tratamento das requisições ---
+
+    def _retry_after(self):
+        """Segundos até liberar a janela, ou None se ainda há cota."""
+        with self.lock:
+            now = time.monotonic()
+            self.calls = [t for t in self.calls if t > now - self.rate_window]
+            if self.rate_limit is not None and len(self.calls) >= self.rate_limit:
+                return max(1, math.ceil(self.calls[0] + self.rate_window - now))
+            self.calls.append(now)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                return 1
+            return None
+
+    def _handle(self, handler):
+        parsed = urlparse(handler.path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+
+        if parsed.path == "/__stats":
+            return self._send(handler, "stats", 200, self.stats())
+
+        for pattern, route in self.routes:
+            match = pattern.match(parsed.path)
+            if match:
+                break
+        else:
+            return self._send(handler, "not_found", 404, {"errorMessage": "Not found"})
+
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+
+        retry_after = self._retry_after()
+        if retry_after is not None:
+            with self.lock:
+                self.throttled += 1
+            return self._send(handler, route.__name__.lstrip("_"), 429, {"errorMessage": "Too Many Requests"},
+                              {"Retry-After": str(retry_after)})
+
+        status, payload = route(*match.groups(), query=query)
+        self._send(handler, route.__name__.lstrip("_"), status, payload)
+
+    def _send(self, handler, name, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        if self.rate_limit is not None:
+            handler.send_header("X-RateLimit-Limit", str(self.rate_limit))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self.lock:
+            self.requests[name] += 1
+            self.bytes_sent += len(body)
+
+    # --- Rotas ---
+
+    def _players(self, query):
+        page = int(query.get("page", 1))
+        players = self.dataset.players
+        if query.get("countries") and query["countries"].upper() != "BR":
+            players = []
+        payload = {"players": _page(players, page, PLAYERS_PER_PAGE)}
+        if query.get("withMetadata", "true") != "false":
+            payload["metadata"] = _metadata(len(players), page, PLAYERS_PER_PAGE)
+        return 200, payload
+
+    def _player_full(self, player_id, query):
+        player = self.dataset.players_by_id.get(player_id)
+        if player is None:
+            return 404, {"errorMessage": "Player not found"}
+        return 200, player
+
+    def _player_scores(self, player_id, query):
+        if player_id not in self.dataset.players_by_id:
+            return 404, {"errorMessage": "Player not found"}
+        page = int(query.get("page", 1))
+        limit = min(int(query.get("limit", 8)), MAX_PLAYER_SCORES_LIMIT)
+        entries = self.dataset.player_scores.get(player_id, [])
+        if query.get("sort", "top") == "recent":
+            entries = sorted(entries, key=lambda e: e[1]["timeSet"], reverse=True)
+        else:
+            entries = sorted(entries, key=lambda e: e[1]["pp"], reverse=True)
+        payload = {
+            "playerScores": [
+                {"score": score, "leaderboard": self.dataset.leaderboards[lb_id]}
+                for lb_id, score in _page(entries, page, limit)
+            ]
+        }
+        if query.get("withMetadata", "true") != "false":
+            payload["metadata"] = _metadata(len(entries), page, limit)
+        return 200, payload
+
+    def _leaderboard_scores(self, leaderboard_id, query):
+        scores = self.dataset.leaderboard_scores.get(int(leaderboard_id))
+        if scores is None:
+            return 404, {"errorMessage": "Leaderboard not found"}
+        page = int(query.get("page", 1))
+        return 200, {
+            "scores": _page(scores, page, LEADERBOARD_SCORES_PER_PAGE),
+            "metadata": _metadata(len(scores), page, LEADERBOARD_SCORES_PER_PAGE)
+        }
+
+    def _leaderboard_info(self, leaderboard_id, query):
+        info = self.dataset.leaderboards.get(int(leaderboard_id))
+        if info is None:
+            return 404, {"errorMessage": "Leaderboard not found"}
+        return 200, info
+
+    def _difficulties(self, song_hash, query):
+        return 200, self.dataset.by_hash.get(song_hash.upper(), [])
+
+    def _beatsaver_map(self, key, query):
+        data = self.dataset.beatsaver_maps.get(key.lower())
+        if data is None:
+            return 404, {"error": "Not Found"}
+        return 200, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local com dados sintéticos do ScoreSaber/BeatSaver.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--maps", type=int, default=200, help="Leaderboards rankeados BR")
+    parser.add_argument("--extra-maps", type=int, default=600, help="Leaderboards só no histórico dos jogadores")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0, help="Latência por requisição (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="Variação da latência (ms)")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requisições por janela antes do 429")
+    parser.add_argument("--rate-window", type=float, default=60, help="Janela do rate limit (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidade de 429 espúrio")
+    args = parser.parse_args()
+
+    print(f"Gerando dados ({args.players} jogadores, {args.maps}+{args.extra_maps} leaderboards, seed {args.seed})...")
+    dataset = FixtureDataset(args.players, args.maps, args.extra_maps, args.seed)
+    server = FixtureServer(
+        dataset, args.host, args.port,
+        latency_ms=args.latency, jitter_ms=args.jitter,
+        rate_limit=args.rate_limit, rate_window=args.rate_window,
+        error_rate=args.error_rate, seed=args.seed
+    )
+    print(f"ScoreSaber: {server.scoresaber_url}")
+    print(f"BeatSaver:  {server.beatsaver_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
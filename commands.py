@@ -1,15 +1,32 @@
+import argparse
+import csv
+import json
 import requests
 import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import Integer, cast, func, select
 from sqlalchemy.orm import Session
+from app.config import AppConfig
 from app.data.database import engine, SessionLocal
 from app.data.models.ranked_br_maps import RankedBRMaps
+from app.data.models.player_score import PlayerScore
+from app.data.map_leaderboards import PLAYER_ID, SCORE
+from app.data.snapshot import load_player_names, load_snapshot
+from app.data.update_requests import request_update
+from app.ppcalc.rankedbr import ScoreSaberAPI
+from app.ppcalc.simulate import RerankSimulator
+
+# Mapas resolvidos em paralelo na importação em lote (as chamadas passam
+# pelo rate limiter compartilhado do ScoreSaberAPI)
+IMPORT_WORKERS = 8
 
 def get_map_info(map_id):
     """Busca informações do mapa no BeatSaver."""
-    url = f"https://api.beatsaver.com/maps/id/{map_id}"
+    url = f"{AppConfig.BEATSAVER_API_URL}/maps/id/{map_id}"
     try:
-        response = requests.get(url)
+        response = ScoreSaberAPI._get("beatsaver_map", url)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -18,9 +35,9 @@ def get_map_info(map_id):
 
 def get_leaderboards_by_hash(map_hash):
     """Busca leaderboards no ScoreSaber pelo hash."""
-    url = f"https://scoresaber.com/api/leaderboard/get-difficulties/{map_hash}"
+    url = f"{AppConfig.SCORESABER_API_URL}/leaderboard/get-difficulties/{map_hash}"
     try:
-        response = requests.get(url)
+        response = ScoreSaberAPI._get("leaderboard_difficulties", url)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -29,14 +46,7 @@ def get_leaderboards_by_hash(map_hash):
 
 def get_leaderboard_info(leaderboard_id):
     """Busca detalhes do leaderboard no ScoreSaber."""
-    url = f"https://scoresaber.com/api/leaderboard/by-id/{leaderboard_id}/info"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Erro ao buscar info do leaderboard {leaderboard_id}: {e}")
-        return None
+    return ScoreSaberAPI.get_leaderboard_info(leaderboard_id)
 
 def difficulty_int_to_str(diff_int):
     """Converte o inteiro de dificuldade do ScoreSaber para string legível."""
@@ -49,50 +59,403 @@ def difficulty_int_to_str(diff_int):
     }
     return mapping.get(diff_int, str(diff_int))
 
-def list_current_ranked_maps():
-    """Lista todos os mapas rankeados atualmente no banco de dados."""
+def normalize_difficulty(value):
+    """Aceita "ExpertPlus", "Expert+", "expert plus" ou o inteiro do ScoreSaber (9)."""
+    text = str(value).strip().lower().replace(" ", "").replace("+", "plus")
+    for diff_int in (1, 3, 5, 7, 9):
+        name = difficulty_int_to_str(diff_int)
+        if text in (name.lower(), str(diff_int)):
+            return name
+    return None
+
+def load_import_file(path):
+    """
+    Lê as linhas map_key,difficulty,stars de um CSV (com cabeçalho) ou de um
+    JSON (lista de objetos com as mesmas chaves).
+
+    Returns:
+        tuple: ([{"map_key", "difficulty", "stars"}], [mensagens de erro])
+    """
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        first_line = 1
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        first_line = 2
+
+    entries = []
+    errors = []
+    seen = set()
+    for line, row in enumerate(rows, start=first_line):
+        map_key = str(row.get("map_key") or "").strip()
+        difficulty = normalize_difficulty(row.get("difficulty") or "")
+        try:
+            stars = float(str(row.get("stars")).replace(",", "."))
+        except ValueError:
+            stars = None
+
+        if not map_key or difficulty is None or stars is None or stars <= 0:
+            errors.append(f"Linha {line}: entrada inválida {dict(row)}")
+            continue
+        if (map_key, difficulty) in seen:
+            errors.append(f"Linha {line}: {map_key} {difficulty} repetido, usando a primeira ocorrência.")
+            continue
+        seen.add((map_key, difficulty))
+        entries.append({"map_key": map_key, "difficulty": difficulty, "stars": stars})
+    return entries, errors
+
+def resolve_map(map_key, entries):
+    """
+    Resolve as dificuldades pedidas de um mapa (BeatSaver -> hash -> leaderboards
+    SoloStandard do ScoreSaber -> detalhes). Roda em paralelo por mapa.
+
+    Returns:
+        tuple: ([entradas com "leaderboard_id", "info" e "map_author"], [mensagens de erro])
+    """
+    bs_data = get_map_info(map_key)
+    if not bs_data or not bs_data.get("versions"):
+        return [], [f"{map_key}: mapa não encontrado no BeatSaver."]
+
+    map_hash = bs_data["versions"][-1]["hash"]
+    leaderboards = {
+        difficulty_int_to_str(lb["difficulty"]): lb
+        for lb in get_leaderboards_by_hash(map_hash)
+        if lb.get("gameMode") == "SoloStandard"
+    }
+
+    resolved = []
+    errors = []
+    for entry in entries:
+        lb = leaderboards.get(entry["difficulty"])
+        if lb is None:
+            errors.append(f"{map_key}: dificuldade {entry['difficulty']} não encontrada no ScoreSaber.")
+            continue
+        info = get_leaderboard_info(lb["leaderboardId"])
+        if not info:
+            errors.append(f"{map_key}: falha ao obter detalhes do leaderboard {lb['leaderboardId']}.")
+            continue
+        resolved.append(dict(entry, leaderboard_id=str(lb["leaderboardId"]), info=info, map_author=info["levelAuthorName"]))
+    return resolved, errors
+
+def upsert_ranked_maps(resolved):
+    """
+    Grava todas as dificuldades em uma única transação.
+
+    Returns:
+        dict: "added" [entradas], "changed" [(entrada, estrelas antigas)],
+            "unchanged" [entradas]
+    """
+    report = {"added": [], "changed": [], "unchanged": []}
     db = SessionLocal()
     try:
-        maps = db.query(RankedBRMaps).all()
-        
-        if not maps:
-            print("Nenhum mapa rankeado encontrado no banco de dados.")
-            return
+        ids = [entry["leaderboard_id"] for entry in resolved]
+        existing = {m.leaderboard_id: m for m in db.query(RankedBRMaps).filter(RankedBRMaps.leaderboard_id.in_(ids))}
 
-        # Agrupa por map_id (BeatSaver Key)
-        grouped_maps = defaultdict(list)
-        map_details = {} # map_id -> {name, author}
+        for entry in resolved:
+            info = entry["info"]
+            row = existing.get(entry["leaderboard_id"])
+            if row is None:
+                db.add(RankedBRMaps(
+                    leaderboard_id=entry["leaderboard_id"],
+                    map_id=entry["map_key"],
+                    map_name=info["songName"],
+                    map_author=entry["map_author"],
+                    difficulty=entry["difficulty"],
+                    stars=entry["stars"],
+                    max_score=info["maxScore"],
+                    cover_image=info["coverImage"]
+                ))
+                report["added"].append(entry)
+                continue
 
-        for m in maps:
-            grouped_maps[m.map_id].append(m)
-            if m.map_id not in map_details:
-                map_details[m.map_id] = {
-                    "name": m.map_name,
-                    "author": m.map_author
-                }
+            old_stars = float(row.stars)
+            row.stars = entry["stars"]
+            row.map_name = info["songName"]
+            row.cover_image = info["coverImage"]
+            row.map_author = entry["map_author"]
+            row.max_score = info["maxScore"]
+            if abs(old_stars - entry["stars"]) > 1e-9:
+                report["changed"].append((entry, old_stars))
+            else:
+                report["unchanged"].append(entry)
 
-        print(f"\n--- Mapas Rankeados BR Atuais ({len(grouped_maps)} mapas, {len(maps)} dificuldades) ---\n")
+        db.commit()
+        return report
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
-        # Ordena por nome do mapa
-        sorted_keys = sorted(grouped_maps.keys(), key=lambda k: map_details[k]["name"].lower())
+def import_ranked_maps(path):
+    """Importação em lote (não interativa) de mapas rankeados a partir de CSV/JSON."""
+    try:
+        entries, errors = load_import_file(path)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler {path}: {e}")
+        return
 
-        for map_id in sorted_keys:
-            details = map_details[map_id]
-            diffs = grouped_maps[map_id]
-            
-            # Ordena dificuldades por estrelas (decrescente)
-            diffs.sort(key=lambda x: float(x.stars), reverse=True)
-            
-            print(f"[{map_id}] {details['name']} - {details['author']}")
-            for d in diffs:
-                print(f"  - {d.difficulty}: {d.stars:.2f}★ (ID: {d.leaderboard_id})")
-            print("") # Linha em branco entre mapas
+    by_map = defaultdict(list)
+    for entry in entries:
+        by_map[entry["map_key"]].append(entry)
+    print(f"--- Importando {len(entries)} dificuldades de {len(by_map)} mapas ---")
+
+    resolved = []
+    with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as executor:
+        for map_resolved, map_errors in executor.map(lambda item: resolve_map(*item), by_map.items()):
+            resolved.extend(map_resolved)
+            errors.extend(map_errors)
 
+    try:
+        report = upsert_ranked_maps(resolved)
     except Exception as e:
-        print(f"Erro ao listar mapas: {e}")
+        print(f"Erro ao salvar no banco (nada foi gravado): {e}")
+        return
+
+    print(f"\nAdicionados ({len(report['added'])}):")
+    for entry in report["added"]:
+        print(f"  + [{entry['map_key']}] {entry['info']['songName']} - {entry['difficulty']}: {entry['stars']:.2f}★ (ID: {entry['leaderboard_id']})")
+    print(f"Estrelas alteradas ({len(report['changed'])}):")
+    for entry, old_stars in report["changed"]:
+        print(f"  ~ [{entry['map_key']}] {entry['info']['songName']} - {entry['difficulty']}: {old_stars:.2f}★ -> {entry['stars']:.2f}★")
+    print(f"Sem alteração: {len(report['unchanged'])}")
+    if errors:
+        print(f"Erros ({len(errors)}):")
+        for message in errors:
+            print(f"  ! {message}")
+
+    if report["added"] or report["changed"]:
+        # O processo de atualização baixa só os leaderboards novos e recalcula
+        # o PP dos alterados a partir dos scores guardados
+        request_update(
+            leaderboards=[entry["leaderboard_id"] for entry in report["added"]],
+            reprice=[entry["leaderboard_id"] for entry, _ in report["changed"]]
+        )
+        print("\nAtualização do ranking solicitada.")
+
+def parse_star_changes(text):
+    """ "123=9.5 456=10.2" -> {"123": 9.5, "456": 10.2} """
+    changes = {}
+    for item in text.replace(",", " ").split():
+        lb_id, _, stars = item.partition("=")
+        changes[lb_id.strip()] = float(stars)
+    return changes
+
+def ranking_accuracies(state, leaderboard_ids):
+    """
+    Acc de cada score como o ranking calcula (modifiedScore / max_score, sem No
+    Fail, sem arredondamento): {lb_id: [(player_id, acc)]}. Mapas rankeados vêm
+    do leaderboard BR do snapshot; mapas novos consultam o leaderboard BR no
+    ScoreSaber, como o próximo ciclo de atualização fará.
+    """
+    max_scores = {str(m["leaderboard_id"]): m.get("max_score") or 0 for m in state["maps_data"]}
+    boards = state.get("map_leaderboards") or {}
+    result = {}
+    for lb_id in map(str, leaderboard_ids):
+        rows = boards.get(lb_id)
+        max_score = max_scores.get(lb_id)
+        if rows is not None and max_score:
+            result[lb_id] = [(row[PLAYER_ID], (row[SCORE] / max_score) * 100) for row in rows]
+            continue
+
+        info = ScoreSaberAPI.get_leaderboard_info(lb_id) if lb_id.isdigit() else None
+        max_score = (info or {}).get("maxScore") or 0
+        if max_score <= 0:
+            print(f"Leaderboard {lb_id} não encontrado; simulado sem scores.")
+            continue
+        result[lb_id] = [
+            (score["leaderboardPlayerInfo"]["id"], (score["modifiedScore"] / max_score) * 100)
+            for score in ScoreSaberAPI.get_leaderboard_scores(lb_id)
+            if "NF" not in score["modifiers"]
+        ]
+    return result
+
+def print_simulation(result, elapsed, top=15):
+    print(f"\nSimulação em {elapsed * 1000:.0f}ms")
+    for lb_id, info in result["maps"].items():
+        old = f"{info['old_stars']:.2f}★" if info["old_stars"] is not None else "não rankeado"
+        print(f"  {lb_id}: {old} -> {info['new_stars']:.2f}★ ({info['scores']} scores)")
+
+    moves = [r for r in result["players"] if r[1] != r[2]]
+    print(f"\n{len(moves)} jogadores mudam de posição. Maiores variações:")
+    names = {p["id"]: p["name"] for p in result["ranking"]}
+    moves.sort(key=lambda r: abs((r[1] or 0) - (r[2] or 0)), reverse=True)
+    for pid, old_pos, new_pos, old_pp, new_pp in moves[:top]:
+        old_text = f"#{old_pos}" if old_pos else "novo"
+        pp_text = f"{old_pp or 0:.2f} -> {new_pp or 0:.2f}pp"
+        print(f"  {old_text:>6} -> #{new_pos}  {names.get(pid, pid)} ({pp_text})")
+
+    print(f"\nTop {top} simulado:")
+    for player in result["ranking"][:top]:
+        print(f"  #{player['pos']} {player['name']} - {player['pp']}")
+
+def simulate_star_changes(argv):
+    """
+    Simula o ranking BR com estrelas propostas, a partir do snapshot em disco
+    (sem alterar o ranking publicado; só mapas ainda não rankeados consultam o
+    ScoreSaber). Sem argumentos, abre um prompt para testar várias propostas
+    sobre os mesmos dados carregados.
+    """
+    state = load_snapshot()
+    if not state or not state.get("bsbr_data"):
+        print("Nenhum snapshot disponível. Rode o servidor ou o worker.py primeiro.")
+        return
+    simulator = RerankSimulator(state["bsbr_data"], state["player_details"], state["maps_data"], workers=AppConfig.COMPUTE_WORKERS)
+    print(f"Snapshot da geração {state['generation']} carregado ({len(state['bsbr_data'])} jogadores).")
+
+    def run(text):
+        try:
+            changes = parse_star_changes(text)
+        except ValueError:
+            print("Formato inválido. Use leaderboard_id=estrelas, ex: 123456=9.5 654321=11")
+            return
+        start = time.perf_counter()
+        scores = ranking_accuracies(state, changes)
+        accuracies = {(pid, lb_id): acc for lb_id, rows in scores.items() for pid, acc in rows}
+        result = simulator.simulate(changes, accuracies=accuracies, new_scores=scores)
+        print_simulation(result, time.perf_counter() - start)
+
+    if argv:
+        run(" ".join(argv))
+        return
+    while True:
+        text = input("\nAlterações (ex: 123456=9.5 654321=11), vazio para sair: ").strip()
+        if not text:
+            break
+        run(text)
+
+REPORT_FIELDS = [
+    "map_id", "map_name", "map_author", "difficulty", "stars", "leaderboard_id",
+    "br_plays", "top_score", "top_acc", "top_player_id", "top_player_name"
+]
+
+def ranked_maps_report(min_stars=None, max_stars=None, difficulty=None, author=None):
+    """
+    Linhas do relatório de mapas rankeados em uma única consulta: mapa +
+    quantidade de scores BR guardados + melhor score (jogador e acc),
+    ordenadas por nome do mapa e estrelas (decrescente). Gerador: as linhas
+    são lidas do banco em blocos.
+    """
+    score_lb = PlayerScore.leaderboard_id
+    map_lb = cast(RankedBRMaps.leaderboard_id, Integer)
+
+    # Melhor score de cada leaderboard (window function, sem consulta por mapa)
+    ranked_scores = (
+        select(
+            score_lb.label("leaderboard_id"),
+            PlayerScore.player_id,
+            PlayerScore.score,
+            PlayerScore.acc,
+            func.row_number().over(partition_by=score_lb, order_by=PlayerScore.score.desc()).label("position"),
+            func.count().over(partition_by=score_lb).label("plays")
+        )
+        .where(score_lb.in_(select(map_lb)))
+        .subquery()
+    )
+    top = select(ranked_scores).where(ranked_scores.c.position == 1).subquery()
+
+    query = (
+        select(
+            RankedBRMaps.map_id,
+            RankedBRMaps.map_name,
+            RankedBRMaps.map_author,
+            RankedBRMaps.difficulty,
+            RankedBRMaps.stars,
+            RankedBRMaps.leaderboard_id,
+            func.coalesce(top.c.plays, 0),
+            top.c.score,
+            top.c.acc,
+            top.c.player_id
+        )
+        .outerjoin(top, top.c.leaderboard_id == map_lb)
+        .order_by(func.lower(RankedBRMaps.map_name), RankedBRMaps.map_id, RankedBRMaps.stars.desc())
+    )
+    if min_stars is not None:
+        query = query.where(RankedBRMaps.stars >= min_stars)
+    if max_stars is not None:
+        query = query.where(RankedBRMaps.stars <= max_stars)
+    if difficulty:
+        query = query.where(RankedBRMaps.difficulty == difficulty)
+    if author:
+        query = query.where(RankedBRMaps.map_author.ilike(f"%{author}%"))
+
+    # Nomes dos jogadores vêm do snapshot (o PlayerScore só guarda o id): só
+    # as colunas de id e nome dos rankings, lidas no primeiro mapa com score
+    names = None
+
+    db = SessionLocal()
+    try:
+        for row in db.execute(query.execution_options(yield_per=500)):
+            values = list(row)
+            values[4] = float(values[4])
+            if values[-1] and names is None:
+                names = load_player_names()
+            values.append(names.get(values[-1]) if values[-1] else None)
+            yield dict(zip(REPORT_FIELDS, values))
     finally:
         db.close()
 
+def list_current_ranked_maps(argv=()):
+    """Lista os mapas rankeados (texto agrupado por mapa, JSON ou CSV), com filtros."""
+    parser = argparse.ArgumentParser(prog="commands.py -atual", description="Lista os mapas rankeados BR.")
+    parser.add_argument("--min-estrelas", type=float, dest="min_stars")
+    parser.add_argument("--max-estrelas", type=float, dest="max_stars")
+    parser.add_argument("--dificuldade", dest="difficulty", help="Ex: ExpertPlus, Expert+, Hard")
+    parser.add_argument("--autor", dest="author", help="Trecho do nome do mapper")
+    parser.add_argument("--formato", choices=("texto", "json", "csv"), default="texto")
+    args = parser.parse_args(list(argv))
+
+    difficulty = None
+    if args.difficulty:
+        difficulty = normalize_difficulty(args.difficulty)
+        if difficulty is None:
+            print(f"Dificuldade inválida: {args.difficulty}")
+            return
+
+    rows = ranked_maps_report(args.min_stars, args.max_stars, difficulty, args.author)
+    out = sys.stdout
+
+    try:
+        if args.formato == "csv":
+            writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+            return
+
+        if args.formato == "json":
+            out.write("[")
+            for i, row in enumerate(rows):
+                out.write(("," if i else "") + "\n" + json.dumps(row, ensure_ascii=False))
+            out.write("\n]\n")
+            return
+
+        # Texto: linhas já vêm agrupadas por mapa
+        current_map = None
+        maps_count = diffs_count = 0
+        for row in rows:
+            if row["map_id"] != current_map:
+                if current_map is not None:
+                    out.write("\n")
+                current_map = row["map_id"]
+                maps_count += 1
+                out.write(f"[{row['map_id']}] {row['map_name']} - {row['map_author']}\n")
+            diffs_count += 1
+            top = ""
+            if row["top_score"] is not None:
+                player = row["top_player_name"] or row["top_player_id"]
+                top = f" | #1 {player} {row['top_acc']:.2f}%"
+            out.write(f"  - {row['difficulty']}: {row['stars']:.2f}★ (ID: {row['leaderboard_id']}) | {row['br_plays']} scores BR{top}\n")
+
+        if maps_count == 0:
+            print("Nenhum mapa rankeado encontrado no banco de dados.")
+        else:
+            print(f"\n--- {maps_count} mapas, {diffs_count} dificuldades ---")
+    except Exception as e:
+        print(f"Erro ao listar mapas: {e}")
+
 def add_ranked_map():
     print("--- Adicionar Mapa Rankeado BR ---")
     map_id_input = input("Digite o ID do mapa (BeatSaver Key): ").strip()
@@ -162,6 +525,8 @@ def add_ranked_map():
         db.close()
         return
 
+    added = []
+    repriced = []
     for idx in indices:
         if idx < 0 or idx >= len(valid_leaderboards):
             print(f"Índice {idx+1} inválido, pulando.")
@@ -194,6 +559,8 @@ def add_ranked_map():
             
             if existing:
                 print(f"Mapa {lb_id} já existe no banco. Atualizando dados...")
+                if float(existing.stars) != stars:
+                    repriced.append(lb_id)
                 existing.stars = stars
                 existing.map_name = lb_info["songName"]
                 existing.cover_image = lb_info["coverImage"]
@@ -213,6 +580,7 @@ def add_ranked_map():
                     # hash removido pois não existe no model RankedBRMaps
                 )
                 db.add(new_map)
+                added.append(lb_id)
                 print(f"Adicionado: {lb_info['songName']} - {diff_name} ({stars}★)")
             
             db.commit()
@@ -222,10 +590,18 @@ def add_ranked_map():
             db.rollback()
 
     db.close()
+    if added or repriced:
+        # Atualização parcial pelo processo que mantém o ranking (ver app.data.update_requests)
+        request_update(leaderboards=added, reprice=repriced)
+        print("Atualização do ranking solicitada.")
     print("\nProcesso finalizado.")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "-atual":
-        list_current_ranked_maps()
+        list_current_ranked_maps(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "-simular":
+        simulate_star_changes(sys.argv[2:])
+    elif len(sys.argv) > 2 and sys.argv[1] == "-importar":
+        import_ranked_maps(sys.argv[2])
     else:
         add_ranked_map()
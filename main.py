@@ -1,18 +1,40 @@
 import os
+import threading
+from collections import OrderedDict
 
 import flet as ft
+import flet.fastapi as flet_fastapi
 from app.colors import AppColors
 from app.views.home_view import HomeView
 from app.views.ranking_view import RankingView
 from app.views.player_view import PlayerView
 from app.views.stars_ranking_view import StarsRankingView
+from app.views.map_view import MapView
 from app.components.app_bar import NavBar
 from app.components.drawer import AppDrawer
 from app.data.database import init_db
 from app.data.data_manager import DataManager
+from app.data.live import live_hub
+from app.config import AppConfig
+from app.api.routes import router as api_router
+from app.api import images
+
+from fastapi.responses import FileResponse, PlainTextResponse
+from app import metrics
+
+def init_backend():
+    """
+    Inicialização do processo (uma vez, não por sessão): banco de dados e
+    atualização dos dados. No modo "worker" o crawl roda em worker.py e este
+    processo apenas carrega o snapshot mais recente e observa novas gerações.
+    """
+    init_db()
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+    if AppConfig.REFRESH_MODE == "worker":
+        DataManager.start_snapshot_watcher()
+    else:
+        # Gerenciador de dados em background (Cache + Auto Update)
+        DataManager.start_background_updater()
 
 def main(page: ft.Page):
     page.title = "BeatSaber Brasil"
@@ -20,12 +42,6 @@ def main(page: ft.Page):
     page.padding = 0
     page.bgcolor = AppColors.BACKGROUND
 
-    # Inicializa o Banco de Dados
-    init_db()
-
-    # Inicia o gerenciador de dados em background (Cache + Auto Update)
-    DataManager.start_background_updater()
-
     # Configura o Drawer (Menu lateral para mobile)
     page.drawer = AppDrawer(page)
 
@@ -52,24 +68,82 @@ def main(page: ft.Page):
     page.on_resized = page_resize
 
     # Sistema de Rotas
-    def route_change(e):
+    def build_view():
         troute = ft.TemplateRoute(page.route)
         
         if troute.match("/"):
-            content_area.content = HomeView(page)
+            return HomeView(page)
         elif troute.match("/ranking"):
-            content_area.content = RankingView(page)
+            return RankingView(page)
         elif troute.match("/stars"):
-            content_area.content = StarsRankingView(page)
+            return StarsRankingView(page)
         elif troute.match("/player/:player_id"):
             # Extrai o ID da rota e passa para a view
             player_id = troute.player_id
-            content_area.content = PlayerView(page, player_id)
+            return PlayerView(page, player_id)
+        elif troute.match("/map/:leaderboard_id"):
+            return MapView(page, troute.leaderboard_id)
         else:
-            content_area.content = HomeView(page)
-            
+            return HomeView(page)
+
+    # Views já montadas nesta sessão: {(rota, geração, mobile): controle}.
+    # Voltar para uma rota reaproveita a árvore de controles enquanto os dados
+    # não mudarem; views de gerações anteriores são descartadas.
+    view_cache = OrderedDict()
+    # Navegação e atualizações ao vivo rodam em threads diferentes do executor da sessão
+    view_lock = threading.Lock()
+
+    def route_change(e):
+        with view_lock:
+            generation = DataManager.generation
+            key = (page.route, generation, (page.width or 0) < 768)
+
+            view = view_cache.get(key)
+            if view is None:
+                for old_key in [k for k in view_cache if k[1] != generation]:
+                    del view_cache[old_key]
+                view = view_cache[key] = build_view()
+                while len(view_cache) > AppConfig.VIEW_CACHE_SIZE:
+                    view_cache.popitem(last=False)
+            else:
+                view_cache.move_to_end(key)
+
+            content_area.content = view
         page.update()
 
+    # Atualização ao vivo: nova geração publicada com a sessão aberta
+    def on_generation(generation):
+        with view_lock:
+            view = content_area.content
+            refresh = getattr(view, "live_refresh", None)
+            if refresh is None:
+                return
+            # A view visível passa a valer para a nova geração (continua no cache)
+            for key in [k for k, v in view_cache.items() if v is view and k[1] != generation]:
+                view_cache[(key[0], generation, key[2])] = view_cache.pop(key)
+        try:
+            refresh()
+        except Exception as e:
+            # A sessão pode ter saído da página durante a atualização
+            print(f"LiveHub: Erro ao atualizar a view: {e}")
+
+    live_token = live_hub.subscribe(page, on_generation)
+
+    def on_connect(e):
+        nonlocal live_token
+        if live_token is None:
+            live_token = live_hub.subscribe(page, on_generation)
+
+    def on_disconnect(e):
+        nonlocal live_token
+        if live_token is not None:
+            live_hub.unsubscribe(live_token)
+            live_token = None
+
+    page.on_connect = on_connect
+    page.on_disconnect = on_disconnect
+    page.on_close = on_disconnect
+
     page.on_route_change = route_change
 
     # Adiciona apenas a área de conteúdo à página
@@ -81,7 +155,30 @@ def main(page: ft.Page):
     # Chama o resize uma vez para ajustar o estado inicial
     page_resize(None)
 
-fastapi_app = FastAPI()
+# Modo servidor: o backend sobe com o uvicorn, não no import do módulo. O
+# FastAPI do Flet também inicia/encerra o app_manager, que descarta as sessões
+# expiradas (o lifespan do app montado em "/" não é executado).
+fastapi_app = flet_fastapi.FastAPI(on_startup=[init_backend])
+
+# API de leitura (JSON) servida direto dos snapshots do DataManager
+fastapi_app.include_router(api_router)
+# Proxy de avatares/capas com cache de miniaturas em disco
+fastapi_app.include_router(images.router)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@fastapi_app.get("/metrics")
+def get_metrics():
+    # Métricas deste processo (chamadas à API, fases do ciclo se o updater roda aqui)
+    return PlainTextResponse(metrics.registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@fastapi_app.get("/metrics/refresh")
+def get_refresh_metrics():
+    # Métricas do processo que executa a atualização (o worker, no modo worker)
+    text, _ = DataManager.refresh_metrics()
+    if text is None:
+        return PlainTextResponse("", status_code=404)
+    return PlainTextResponse(text, media_type=PROMETHEUS_CONTENT_TYPE)
 
 @fastapi_app.get("/download/bsbr-playlist")
 def download_bsbr_playlist():
@@ -92,4 +189,13 @@ def download_bsbr_playlist():
         filename="bsbr_ranked.bplist"
     )
 
-ft.app(target=main, assets_dir="assets")
+if __name__ == "__main__":
+    # Modo desktop/desenvolvimento: servidor próprio do Flet
+    init_backend()
+    ft.app(target=main, assets_dir="assets")
+else:
+    # Modo servidor (uvicorn main:fastapi_app): API e UI Flet no mesmo app.
+    # O mount do Flet fica por último para não encobrir as rotas acima.
+    # As views passam a apontar as imagens externas para /api/img
+    images.enable_proxy()
+    fastapi_app.mount("/", flet_fastapi.app(main, assets_dir=os.path.abspath("assets")))
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixture_server import FixtureDataset, FixtureServer  # noqa: E402
+
+# As APIs apontam para o fixture_server local e o banco (storage/bsbr.db) e os
+# caches em disco, resolvidos a partir do diretório atual no import do app,
+# ficam numa pasta temporária: os testes não acessam a rede nem o storage/ do
+# projeto. Precisa acontecer antes de qualquer import de app.*.
+DATASET = FixtureDataset(300, 60, 10, 3)
+SERVER = FixtureServer(DATASET).start()
+os.environ["BSBR_SCORESABER_API_URL"] = SERVER.scoresaber_url
+os.environ["BSBR_BEATSAVER_API_URL"] = SERVER.beatsaver_url
+os.environ["BSBR_SCORESABER_RATE_LIMIT"] = "100000"
+os.chdir(tempfile.mkdtemp(prefix="bsbr-tests-"))
+
+from app.data.database import init_db  # noqa: E402
+
+init_db()
+
+
+@pytest.fixture(scope="session")
+def refreshed():
+    """DataManager com um ciclo completo de atualização contra o fixture_server."""
+    from benchmarks.bench_refresh import seed_maps
+    from app.data.data_manager import DataManager
+
+    seed_maps(DATASET)
+    assert DataManager.update_all_data()
+    return DataManager
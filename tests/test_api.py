@@ -0,0 +1,42 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import etag_matches, router
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_etag_matches():
+    etag = 'W/"g7"'
+    assert etag_matches('W/"g7"', etag)
+    assert etag_matches('"g7"', etag)
+    assert etag_matches('"g5", W/"g7"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"g5", W/"g6"', etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches(None, etag)
+
+
+def test_encodings_share_a_weak_etag(refreshed):
+    http = _client()
+    raw = http.get("/api/ranking/br", headers={"Accept-Encoding": "identity"})
+    gzipped = http.get("/api/ranking/br", headers={"Accept-Encoding": "gzip"})
+    assert raw.status_code == gzipped.status_code == 200
+
+    etag = raw.headers["etag"]
+    assert etag == f'W/"g{refreshed.generation}"'
+    assert gzipped.headers["etag"] == etag
+    assert gzipped.headers.get("content-encoding") == "gzip"
+    assert raw.headers["vary"] == gzipped.headers["vary"] == "Accept-Encoding"
+
+
+def test_if_none_match_list(refreshed):
+    http = _client()
+    etag = http.get("/api/ranking/br").headers["etag"]
+    for header in (etag, f'"outra", {etag}', etag.removeprefix("W/"), "*"):
+        assert http.get("/api/ranking/br", headers={"If-None-Match": header}).status_code == 304, header
+    assert http.get("/api/ranking/br", headers={"If-None-Match": 'W/"g0"'}).status_code == 200
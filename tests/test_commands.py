@@ -0,0 +1,22 @@
+import commands
+from app.data import snapshot
+
+
+def test_report_names_come_from_ranking_columns(refreshed, tmp_path, monkeypatch):
+    snapshot.save_snapshot(refreshed.export_state(), folder=str(tmp_path))
+    calls = []
+
+    def load_names():
+        calls.append(1)
+        return snapshot.load_player_names(folder=str(tmp_path))
+
+    monkeypatch.setattr(commands, "load_player_names", load_names)
+    rows = list(commands.ranked_maps_report())
+
+    names = {p["id"]: p["name"] for p in refreshed.bsbr_data}
+    with_top = [row for row in rows if row["top_player_id"]]
+    assert with_top
+    assert all(row["top_player_name"] == names.get(row["top_player_id"], row["top_player_name"]) for row in with_top)
+    assert all(row["top_player_name"] for row in with_top)
+    # Uma leitura só dos nomes, e só quando algum mapa tem score
+    assert len(calls) == 1
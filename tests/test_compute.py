@@ -0,0 +1,21 @@
+import random
+from array import array
+
+from app.ppcalc import compute
+
+
+def test_process_pool_matches_serial(monkeypatch):
+    rng = random.Random(7)
+    maps = 40
+    stars = array("d", (rng.uniform(1, 13) for _ in range(maps)))
+    starts = array("I", [0])
+    accs = array("d")
+    for _ in range(maps):
+        accs.extend(rng.uniform(70, 99) for _ in range(rng.randint(0, 30)))
+        starts.append(len(accs))
+
+    serial = compute.reprice_maps(stars, starts, accs, workers=1)
+    # Força o caminho com processos mesmo com poucas linhas
+    monkeypatch.setattr(compute, "MIN_PARALLEL_ROWS", 0)
+    parallel = compute.reprice_maps(stars, starts, accs, workers=2)
+    assert parallel == serial
@@ -0,0 +1,34 @@
+def test_update_cycle_publishes_one_generation(refreshed):
+    before = refreshed.generation
+    notified = []
+    refreshed.subscribe(notified.append)
+    try:
+        assert refreshed.update_all_data()
+    finally:
+        refreshed._listeners.remove(notified.append)
+
+    assert refreshed.generation == before + 1
+    assert notified == [before + 1]
+
+
+def test_reprice_skips_unknown_leaderboards(refreshed):
+    lb_id = refreshed.maps_data[0]["leaderboard_id"]
+    before = refreshed.generation
+
+    assert refreshed.reprice_leaderboards(["999999999"]) is False
+    assert refreshed.generation == before and refreshed.is_loading is False
+
+    assert refreshed.reprice_leaderboards([lb_id, "999999999"]) is True
+    assert refreshed.generation == before + 1 and refreshed.is_loading is False
+
+
+def test_reprice_error_clears_loading(refreshed, monkeypatch):
+    from app.data import data_manager
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("falha no cálculo")
+
+    monkeypatch.setattr(data_manager, "reprice_maps", fail)
+    before = refreshed.generation
+    assert refreshed.reprice_leaderboards([refreshed.maps_data[0]["leaderboard_id"]]) is False
+    assert refreshed.generation == before and refreshed.is_loading is False
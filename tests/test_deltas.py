@@ -0,0 +1,54 @@
+from app.data.deltas import append_delta, changes_since, compute_delta
+
+
+def _ranking(*rows):
+    return [{"id": pid, "pos": pos, "pp": f"{pp:.2f}pp"} for pid, pos, pp in rows]
+
+
+def _history():
+    # Gerações 1 -> 2 -> 3 -> 4, uma publicação por geração
+    rankings = [
+        _ranking(("a", 1, 300), ("b", 2, 200)),
+        _ranking(("a", 1, 300), ("b", 2, 250)),
+        _ranking(("b", 1, 350), ("a", 2, 300)),
+        _ranking(("b", 1, 350), ("a", 2, 300), ("c", 3, 100))
+    ]
+    history = []
+    for generation in range(2, 5):
+        old, new = rankings[generation - 2], rankings[generation - 1]
+        history = append_delta(history, compute_delta(generation - 1, generation, old, new, {}, {}))
+    return history
+
+
+def test_changes_since_combines_consecutive_deltas():
+    history = _history()
+    changes = changes_since(history, 1, 4)
+    assert changes["base"] == 1 and changes["generation"] == 4
+    assert changes["players"] == [
+        ["b", 2, 1, 200.0, 350.0],
+        ["a", 1, 2, 300.0, 300.0],
+        ["c", None, 3, None, 100.0]
+    ]
+
+
+def test_changes_since_covers_every_kept_generation():
+    history = _history()
+    for since in range(1, 4):
+        assert changes_since(history, since, 4) is not None
+    assert changes_since(history, 4, 4)["players"] == []
+    assert changes_since(history, 3, 4)["players"] == [["c", None, 3, None, 100.0]]
+
+
+def test_changes_since_expired_history():
+    history = _history()[1:]
+    assert changes_since(history, 1, 4) is None
+    assert changes_since(history, 2, 4) is not None
+    assert changes_since([], 0, 1) is None
+
+
+def test_consecutive_cycles_never_expire_previous_generation(refreshed):
+    assert refreshed.update_all_data()
+    previous = refreshed.generation - 1
+    changes = refreshed.ranking_changes(previous)
+    assert changes is not None
+    assert changes["base"] == previous and changes["generation"] == refreshed.generation
@@ -0,0 +1,87 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from app.data import history
+from app.data.history import HistoryStore
+
+DAY = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _ts(delta):
+    return (DAY + delta).timestamp()
+
+
+def _record(store, when, pp, pos=1, ss_pos=50, player="p1"):
+    store.record([{"id": player, "pp": f"{pp:.2f}pp", "pos": pos}], [{"id": player, "pos": ss_pos}], timestamp=when)
+
+
+def _pps(points):
+    return [(p["time"], p["br_pp"]) for p in points]
+
+
+def test_rollup_raw_hourly_daily(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    _record(store, _ts(timedelta(minutes=10)), 100)
+    _record(store, _ts(timedelta(minutes=40)), 110)
+    _record(store, _ts(timedelta(hours=1, minutes=20)), 120, pos=2)
+
+    # Raw com mais de 7 dias: última amostra de cada hora
+    store.compact(now=DAY + timedelta(days=8))
+    assert not os.listdir(tmp_path / "raw")
+    assert _pps(store.player_history("p1")) == [(_ts(timedelta(0)), 110.0), (_ts(timedelta(hours=1)), 120.0)]
+
+    # Repetir a compactação não duplica blocos
+    store.compact(now=DAY + timedelta(days=8))
+    assert len(store.player_history("p1")) == 2
+
+    # Mês hourly encerrado há mais de 90 dias: última amostra de cada dia
+    store.compact(now=DAY + timedelta(days=125))
+    assert not os.listdir(tmp_path / "hourly")
+    points = store.player_history("p1")
+    assert _pps(points) == [(_ts(timedelta(0)), 120.0)]
+    assert points[0]["br_rank"] == 2 and points[0]["ss_rank"] == 50
+
+
+def test_range_queries(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    times = [_ts(timedelta(minutes=30 * i)) for i in range(5)]
+    for i, when in enumerate(times):
+        _record(store, when, 100 + i)
+    # Amostra de outro jogador, sem o p1 no bloco
+    _record(store, _ts(timedelta(hours=3)), 50, player="p2")
+
+    assert [p["br_pp"] for p in store.player_history("p1", times[1], times[3])] == [101.0, 102.0, 103.0]
+    assert [p["br_pp"] for p in store.player_history("p1", start=times[3])] == [103.0, 104.0]
+    assert [p["br_pp"] for p in store.player_history("p1", end=times[0])] == [100.0]
+    assert store.player_history("p1", _ts(timedelta(days=2))) == []
+    assert [p["br_pp"] for p in store.player_history("p2")] == [50.0]
+    assert store.player_history("desconhecido") == []
+
+    # Um novo leitor (ex: outro processo) enxerga os mesmos arquivos
+    assert len(HistoryStore(str(tmp_path)).player_history("p1")) == 5
+
+
+def test_ranges_across_tiers(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    _record(store, _ts(timedelta(hours=2)), 100)
+    _record(store, _ts(timedelta(days=10)), 200)
+    store.compact(now=DAY + timedelta(days=9))
+
+    # Hora condensada (hourly) + amostra recente (raw), em ordem cronológica
+    assert _pps(store.player_history("p1")) == [(_ts(timedelta(hours=2)), 100.0), (_ts(timedelta(days=10)), 200.0)]
+    assert _pps(store.player_history("p1", start=_ts(timedelta(days=1)))) == [(_ts(timedelta(days=10)), 200.0)]
+
+
+def test_compaction_in_progress_has_no_duplicates(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    _record(store, _ts(timedelta(minutes=10)), 100)
+    _record(store, _ts(timedelta(minutes=40)), 110)
+    _record(store, _ts(timedelta(days=1, hours=5)), 120)
+
+    # Leitura entre a gravação do bloco condensado e a remoção do arquivo raw
+    monkeypatch.setattr(history.os, "remove", lambda path: None)
+    store.compact(now=DAY + timedelta(days=9))
+    assert os.listdir(tmp_path / "hourly") and len(os.listdir(tmp_path / "raw")) == 2
+
+    expected = [(_ts(timedelta(minutes=10)), 100.0), (_ts(timedelta(minutes=40)), 110.0), (_ts(timedelta(days=1, hours=5)), 120.0)]
+    assert _pps(store.player_history("p1")) == expected
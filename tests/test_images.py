@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import images
+
+URL = "https://cdn.scoresaber.com/avatars/1.png"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    source = {"data": b"\x89PNG-primeira"}
+    cache = images.ImageCache(folder=str(tmp_path), max_bytes=1024 * 1024)
+    # Sem Pillow a miniatura é a imagem original: os bytes do teste não precisam ser um PNG real
+    monkeypatch.setattr(images, "Image", None)
+    monkeypatch.setattr(images, "image_cache", cache)
+    monkeypatch.setattr(images.ImageCache, "_download", staticmethod(lambda url: source["data"]))
+
+    app = FastAPI()
+    app.include_router(images.router)
+    return TestClient(app), cache, source
+
+
+def _get(http, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return http.get("/api/img", params={"url": URL, "s": 64}, headers=headers)
+
+
+def _expire(folder):
+    old = time.time() - images.MAX_AGE_SECONDS - 60
+    for name in os.listdir(folder):
+        os.utime(os.path.join(folder, name), (old, old))
+
+
+def test_revalidation_uses_stored_content(client, tmp_path):
+    http, cache, source = client
+    first = _get(http)
+    assert first.status_code == 200 and first.content == source["data"]
+    etag = first.headers["etag"]
+
+    # Entrada em cache e válida: 304
+    revalidated = _get(http, etag)
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == etag
+    assert cache.misses == 1
+
+    # A imagem mudou na origem e a entrada venceu: baixa de novo e responde com o novo conteúdo
+    source["data"] = b"\x89PNG-segunda"
+    _expire(str(tmp_path))
+    changed = _get(http, etag)
+    assert changed.status_code == 200 and changed.content == source["data"]
+    assert changed.headers["etag"] != etag
+    assert cache.misses == 2
+
+
+def test_expired_entry_with_same_content_is_not_modified(client, tmp_path):
+    http, cache, _ = client
+    etag = _get(http).headers["etag"]
+    _expire(str(tmp_path))
+
+    # Vencida, mas a origem devolve os mesmos bytes: o ETag continua válido
+    assert _get(http, etag).status_code == 304
+    assert cache.misses == 2
+
+
+def test_enable_proxy_warns_without_pillow(monkeypatch, capsys):
+    monkeypatch.setattr(images, "proxy_enabled", False)
+    monkeypatch.setattr(images, "Image", None)
+    images.enable_proxy()
+    assert images.proxy_enabled
+    assert "Pillow não está instalado" in capsys.readouterr().out
+    assert images.thumbnail_url(URL, 40).startswith("/api/img?")
@@ -0,0 +1,61 @@
+from app.data.database import SessionLocal
+from app.data.ingestion import ingest_leaderboard_scores
+from app.data.models.player_score import PlayerScore
+from app.ppcalc.rankedbr import ScoreSaberAPI, partial_data
+
+
+def _score(player_id, base_score, pp, modifiers="", rank=1):
+    return {
+        "leaderboardPlayerInfo": {"id": player_id},
+        "baseScore": base_score,
+        "modifiedScore": base_score,
+        "pp": pp,
+        "modifiers": modifiers,
+        "rank": rank
+    }
+
+
+def test_ingest_skips_zero_pp_and_no_fail(monkeypatch):
+    lb_id = 910001
+    monkeypatch.setattr(ScoreSaberAPI, "get_leaderboard_info", staticmethod(lambda lb: {
+        "songName": "Mapa", "coverImage": "", "difficulty": {"difficultyRaw": "_ExpertPlus_SoloStandard"},
+        "stars": 10.0, "maxScore": 1000
+    }))
+
+    page = {
+        str(lb_id): [
+            _score("p-ok", 950, 300.0, rank=1),
+            _score("p-nf", 940, 290.0, modifiers="NF,FS", rank=2),
+            _score("p-zero", 930, 0, rank=3)
+        ]
+    }
+    covered = ingest_leaderboard_scores(page, {str(lb_id): {"max_score": 1000}})
+    assert covered == {lb_id}
+
+    db = SessionLocal()
+    try:
+        rows = db.query(PlayerScore).filter(PlayerScore.leaderboard_id == lb_id).all()
+    finally:
+        db.close()
+    assert [(r.player_id, r.score) for r in rows] == [("p-ok", 950)]
+    assert rows[0].acc == 95.0
+
+
+def test_only_complete_crawls_are_covered(monkeypatch):
+    monkeypatch.setattr(ScoreSaberAPI, "get_leaderboard_info", staticmethod(lambda lb: {
+        "songName": "Mapa", "coverImage": "", "difficulty": {"difficultyRaw": "_Expert_SoloStandard"},
+        "stars": 8.0, "maxScore": 1000
+    }))
+    ok, partial, empty = 910101, 910102, 910103
+    partial_data.reset()
+    partial_data.mark("leaderboard_scores", "(teste)", key=partial)
+    try:
+        covered = ingest_leaderboard_scores(
+            {str(ok): [_score("p-a", 900, 200.0)], str(partial): [_score("p-b", 800, 150.0)], str(empty): []},
+            {}
+        )
+    finally:
+        partial_data.reset()
+
+    # Página perdida ou crawl vazio: esses mapas continuam vindo do histórico dos jogadores
+    assert covered == {ok}
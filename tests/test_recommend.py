@@ -0,0 +1,101 @@
+import random
+from array import array
+
+import pytest
+
+from app.ppcalc.recommend import recommend_chunk
+from app.scorecalc import STAR_MULTIPLIER, get_modifier, get_total_weighted_pp
+
+# Estrelas em ordem decrescente, com mapas repetidos (mesmo PP alvo)
+STARS = [13.0, 13.0, 11.0, 10.0, 9.5, 8.0, 8.0, 6.0, 4.0, 2.0]
+BASE_PPS = array("d", (s * STAR_MULTIPLIER for s in STARS))
+
+
+def _brute_force(rows):
+    """{nº do mapa: ganho} remontando a lista ordenada do jogador para cada mapa."""
+    top = sorted(rows, key=lambda r: -r[2])[:10]
+    target = sum(acc for _, acc, _ in top) / len(top)
+    modifier = get_modifier(target)
+    current = {m: pp for m, _, pp in rows}
+    old_pps = sorted(current.values(), reverse=True)
+    old_total = get_total_weighted_pp(old_pps)
+
+    gains = {}
+    for m, base_pp in enumerate(BASE_PPS):
+        x = base_pp * modifier
+        if m in current and current[m] >= x:
+            continue  # score atual já é igual ou melhor que a acc alvo
+        new = dict(current)
+        new[m] = x
+        gain = get_total_weighted_pp(sorted(new.values(), reverse=True)) - old_total
+        if gain > 0:
+            gains[m] = gain
+    return gains
+
+
+def _chunk(players, limit):
+    starts = array("I", [0])
+    map_nos = array("I")
+    accs = array("d")
+    pps = array("d")
+    for rows in players:
+        for m, acc, pp in sorted(rows, key=lambda r: -r[2]):
+            map_nos.append(m)
+            accs.append(acc)
+            pps.append(pp)
+        starts.append(len(pps))
+    return recommend_chunk(limit, BASE_PPS, starts, map_nos, accs, pps)
+
+
+def _tie_player():
+    # Acc alvo exata (todas as accs iguais) para fixar o PP alvo de cada mapa
+    x = [base_pp * get_modifier(95.0) for base_pp in BASE_PPS]
+    return [
+        (1, 95.0, x[1]),          # empate com a acc alvo: pulado (k > j)
+        (2, 95.0, x[2] * 1.05),   # melhor que a acc alvo: pulado
+        (4, 95.0, x[4] * 0.9),    # melhora
+        (6, 95.0, x[6]),          # empate, e o mapa 5 tem as mesmas estrelas
+        (8, 95.0, x[8] * 0.5)
+    ]
+
+
+def _random_player(rng):
+    rows = []
+    for m in rng.sample(range(len(STARS)), rng.randint(1, len(STARS))):
+        acc = rng.uniform(80, 99)
+        rows.append((m, acc, BASE_PPS[m] * get_modifier(acc)))
+    return rows
+
+
+def test_gains_match_brute_force():
+    rng = random.Random(3)
+    players = [_tie_player()] + [_random_player(rng) for _ in range(30)]
+    out_starts, out_maps, out_gains, _ = _chunk(players, limit=len(STARS))
+
+    for p, rows in enumerate(players):
+        got = {out_maps[i]: out_gains[i] for i in range(out_starts[p], out_starts[p + 1])}
+        expected = _brute_force(rows)
+        assert got.keys() == expected.keys(), p
+        for m, gain in expected.items():
+            assert got[m] == pytest.approx(gain, rel=1e-9, abs=1e-9)
+
+
+def test_ties_and_skipped_scores():
+    out_starts, out_maps, out_gains, targets = _chunk([_tie_player()], limit=len(STARS))
+    assert targets[0] == 95.0
+    gains = dict(zip(out_maps, out_gains))
+
+    # Scores iguais ou melhores que a acc alvo não são recomendados
+    assert 1 not in gains and 2 not in gains and 6 not in gains
+    assert {4, 8} <= gains.keys()
+    # Mapas com as mesmas estrelas dão o mesmo ganho quando nenhum foi jogado
+    assert 0 in gains and gains[0] > 0
+    assert gains[5] == pytest.approx(_brute_force(_tie_player())[5])
+
+
+def test_limit_keeps_largest_gains():
+    players = [_tie_player()]
+    _, all_maps, all_gains, _ = _chunk(players, limit=len(STARS))
+    out_starts, out_maps, out_gains, _ = _chunk(players, limit=3)
+    assert out_starts[-1] == 3
+    assert list(out_gains) == sorted(all_gains, reverse=True)[:3]
@@ -0,0 +1,88 @@
+import random
+import time
+
+from app.data.search import PlayerSearchIndex, parse_query
+
+
+def _index():
+    bsbr = [
+        {"id": "1", "name": "João Silva", "pos": 1, "pp": "900.50pp"},
+        {"id": "2", "name": "JOANA", "pos": 2, "pp": "450.00pp"},
+        {"id": "3", "name": "Pedro Joaquim", "pos": 3, "pp": "300.00pp"}
+    ]
+    scoresaber = [
+        {"id": "2", "name": "JOANA", "pos": 1},
+        {"id": "4", "name": "Jônatas", "pos": 2}
+    ]
+    details = {"1": {"total_medals": 25}, "2": {"total_medals": 10}, "3": {"total_medals": 0}}
+    return PlayerSearchIndex(bsbr, scoresaber, details)
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+def test_prefix_of_any_word_and_id():
+    index = _index()
+    assert _ids(index.search("jo")) == ["1", "2", "3"]
+    assert _ids(index.search("silva")) == ["1"]
+    assert _ids(index.search("jo silva")) == ["1"]
+    assert _ids(index.search("3")) == ["3"]
+    assert index.search("xyz") == []
+
+
+def test_accent_and_case_folding():
+    index = _index()
+    assert _ids(index.search("JOAO")) == ["1"]
+    assert _ids(index.search("joão")) == ["1"]
+    assert _ids(index.search("jonat", source="ss")) == ["4"]
+    # Sem linha na fonte pedida, o jogador não aparece
+    assert index.search("jonat", source="bsbr") == []
+
+
+def test_pp_and_medal_filters():
+    index = _index()
+    assert _ids(index.search(min_pp=300, max_pp=450)) == ["2", "3"]
+    assert _ids(index.search(min_pp=500)) == ["1"]
+    assert _ids(index.search("jo", min_medals=10)) == ["1", "2"]
+    assert _ids(index.search(min_medals=5, max_medals=20)) == ["2"]
+
+    query, filters = parse_query("joao PP:300-500 medalhas:10")
+    assert query == "joao"
+    assert filters == {"min_pp": 300.0, "max_pp": 500.0, "min_medals": 10.0}
+    assert parse_query("pp:100") == ("", {"min_pp": 100.0})
+
+
+def test_index_replaced_on_publish(refreshed):
+    old_index = refreshed.search_index
+    original_bsbr, original_ss = refreshed.bsbr_data, refreshed.scoresaber_data
+    # Jogador renomeado na nova geração (o nome vem das duas fontes)
+    bsbr = [dict(p) for p in original_bsbr]
+    bsbr[0]["name"] = "Ãlvaro Renomeado"
+    scoresaber = [dict(p, name=bsbr[0]["name"]) if p["id"] == bsbr[0]["id"] else p for p in original_ss]
+    try:
+        refreshed._publish(scoresaber, bsbr, refreshed.maps_data, refreshed.player_details)
+        assert refreshed.search_index is not old_index
+        assert _ids(refreshed.search_players("alvaro renom")) == [bsbr[0]["id"]]
+        assert old_index.search("alvaro renom") == []
+    finally:
+        refreshed._publish(original_ss, original_bsbr, refreshed.maps_data, refreshed.player_details)
+    assert refreshed.search_players("alvaro renom") == []
+
+
+def test_search_speed_on_large_base():
+    rng = random.Random(5)
+    syllables = ["jo", "ão", "ma", "ri", "ana", "pe", "dro", "lu", "cas", "bea", "tri", "z"]
+    bsbr = [
+        {"id": str(10 ** 6 + i), "name": " ".join("".join(rng.choices(syllables, k=3)) for _ in range(2)), "pos": i + 1, "pp": f"{rng.uniform(0, 15000):.2f}pp"}
+        for i in range(50000)
+    ]
+    index = PlayerSearchIndex(bsbr, [], {})
+
+    start = time.perf_counter()
+    for i in range(200):
+        index.search(syllables[i % len(syllables)] + "a", limit=50)
+        index.search(min_pp=1000 + i, max_pp=1100 + i, limit=50)
+    elapsed = time.perf_counter() - start
+    # 400 consultas sobre 50 mil jogadores: alguns ms cada, mesmo em máquinas lentas
+    assert elapsed < 4.0, elapsed
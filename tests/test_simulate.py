@@ -0,0 +1,71 @@
+import random
+import time
+
+from commands import ranking_accuracies
+from app.ppcalc.simulate import RerankSimulator
+from benchmarks.bench_simulate import synthetic_state
+
+from conftest import DATASET
+
+
+def _state(dm):
+    return {
+        "bsbr_data": dm.bsbr_data,
+        "player_details": dm.player_details,
+        "maps_data": dm.maps_data,
+        "map_leaderboards": dm.map_leaderboards.boards
+    }
+
+
+def _simulate(dm, changes):
+    state = _state(dm)
+    simulator = RerankSimulator(state["bsbr_data"], state["player_details"], state["maps_data"])
+    scores = ranking_accuracies(state, changes)
+    accuracies = {(pid, lb_id): acc for lb_id, rows in scores.items() for pid, acc in rows}
+    return simulator.simulate(changes, accuracies=accuracies, new_scores=scores)
+
+
+def test_noop_change_moves_nobody(refreshed):
+    # Mesmas estrelas usadas pelo ranking publicado, em todos os mapas
+    _, rank_maps = refreshed._load_ranked_maps()
+    changes = {m["leaderboard_id"]: float(m["stars"]) for m in rank_maps}
+
+    result = _simulate(refreshed, changes)
+
+    assert [row for row in result["players"] if row[1] != row[2]] == []
+    published = {p["id"]: p["pp"] for p in refreshed.bsbr_data}
+    assert {p["id"]: p["pp"] for p in result["ranking"]} == published
+
+
+def test_new_map_scores_skip_no_fail(refreshed):
+    ranked = set(DATASET.ranked_ids)
+    lb_id, scores = next(
+        (lb, s) for lb, s in DATASET.leaderboard_scores.items()
+        if lb not in ranked and any(score["modifiers"] for score in s)
+    )
+    max_score = DATASET.leaderboards[lb_id]["maxScore"]
+
+    rows = ranking_accuracies(_state(refreshed), [lb_id])[str(lb_id)]
+
+    expected = [
+        (s["leaderboardPlayerInfo"]["id"], (s["modifiedScore"] / max_score) * 100)
+        for s in scores if "NF" not in s["modifiers"]
+    ]
+    assert sorted(rows) == sorted(expected)
+    assert len(rows) < len(scores)
+
+
+def test_full_base_simulation_time():
+    # Base BR inteira sintética: 3000 jogadores, 2000 mapas, 200 mil scores
+    bsbr_data, player_details, maps_data = synthetic_state(3000, 2000, 100, seed=7)
+    simulator = RerankSimulator(bsbr_data, player_details, maps_data, workers=1)
+    rng = random.Random(7)
+    changes = {m["leaderboard_id"]: round(rng.uniform(1, 13), 2) for m in rng.sample(maps_data, 100)}
+
+    start = time.perf_counter()
+    result = simulator.simulate(changes)
+    elapsed = time.perf_counter() - start
+
+    assert sum(m["scores"] for m in result["maps"].values()) == 100 * 100
+    assert len(result["ranking"]) == 3000
+    assert elapsed < 1.0, f"simulação levou {elapsed:.2f}s"
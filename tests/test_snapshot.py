@@ -0,0 +1,115 @@
+import struct
+from datetime import datetime
+
+from app.data import snapshot
+
+
+def _state():
+    score = {
+        "map_name": "Mapa", "map_cover": "https://cdn/c.png", "diff": "Expert", "stars": "9.5★",
+        "acc": 95.5, "pp": 310.25, "score": 1234567, "map_rank": 2, "leaderboard_id": 42
+    }
+    detail_score = {
+        "leaderboard_id": "42", "map_name": "Mapa", "map_cover": "https://cdn/c.png", "diff": "Expert", "stars": "9.5★",
+        "acc": 95.5, "pp": 310.25, "score": 1234567, "map_rank": 1, "weighted_pp": 310.25
+    }
+    return {
+        "generation": 7,
+        "last_updated": datetime(2026, 1, 2, 3, 4, 5),
+        "last_api_calls": {"players": 3},
+        "scoresaber_data": [{"id": "1", "profilePicture": "https://cdn/a.jpg", "pos": 1, "name": "A", "pp": "8,000.00pp"}],
+        "bsbr_data": [
+            {"pos": 1, "name": "A", "id": "1", "profilePicture": "https://cdn/a.jpg", "pp": "310.25pp"},
+            {"pos": 2, "name": "B", "id": "2", "profilePicture": None, "pp": "0.00pp"}
+        ],
+        "maps_data": [{"leaderboard_id": "42", "stars": "9.5"}],
+        "player_details": {"1": {"scores": [detail_score], "total_medals": 8}, "2": {"scores": [], "total_medals": 0}},
+        "star_buckets": {"9": [["1", 310.25]]},
+        "ranking_deltas": [{"base": 6, "generation": 7, "players": [], "map_leaders": []}],
+        "map_leaderboards": {"42": [["1", "A", 1234567, 95.5, 310.25, "2026-01-01T00:00:00Z"]]},
+        "recommendations": {"1": {"acc": 95.5, "maps": [["43", 12.5, 96.0, None], ["44", 10.0, 95.0, 3.5]]}},
+        "global_scores_cache": {"1": [score], "2": [dict(score, map_cover=None, leaderboard_id=43)]}
+    }
+
+
+def _assert_state(loaded, state):
+    assert loaded["generation"] == 7
+    assert loaded["last_updated"] == state["last_updated"]
+    assert loaded["last_api_calls"] == state["last_api_calls"]
+    for name in snapshot._JSON_SECTIONS[1:]:
+        assert loaded[name] == state[name], name
+    for name in snapshot._TABLES:
+        assert snapshot._plain(loaded[name]) == state[name], name
+    scores = loaded["global_scores_cache"]
+    assert set(scores) == {"1", "2"}
+    assert scores["1"] == state["global_scores_cache"]["1"]
+    assert scores["2"][0]["map_cover"] is None
+
+
+def test_round_trip(tmp_path):
+    state = _state()
+    snapshot.save_snapshot(state, folder=str(tmp_path))
+    loaded = snapshot.load_snapshot(folder=str(tmp_path))
+
+    _assert_state(loaded, state)
+    # Ranking e detalhes ficam no mmap e são montados sob demanda
+    assert isinstance(loaded["bsbr_data"], snapshot.TableRowsView)
+    assert isinstance(loaded["player_details"], snapshot.TableView)
+    assert loaded["bsbr_data"][-1]["profilePicture"] is None
+    assert loaded["bsbr_data"][:1] == state["bsbr_data"][:1]
+    assert loaded["recommendations"]["1"]["maps"][0][3] is None
+
+    # Regravar um estado carregado (views) gera o mesmo conteúdo
+    snapshot.save_snapshot(dict(loaded, generation=7), folder=str(tmp_path))
+    _assert_state(snapshot.load_snapshot(folder=str(tmp_path)), state)
+
+
+def test_unexpected_shape_falls_back_to_json(tmp_path):
+    state = _state()
+    state["player_details"]["1"]["scores"][0]["extra"] = True
+    state["bsbr_data"][0]["pos"] = "1"
+    snapshot.save_snapshot(state, folder=str(tmp_path))
+    loaded = snapshot.load_snapshot(folder=str(tmp_path))
+
+    assert loaded["player_details"] == state["player_details"]
+    assert loaded["bsbr_data"] == state["bsbr_data"]
+    assert isinstance(loaded["map_leaderboards"], snapshot.TableView)
+
+
+def test_format_version_mismatch(tmp_path, monkeypatch):
+    path = snapshot.save_snapshot(_state(), folder=str(tmp_path))
+    assert snapshot.load_snapshot(folder=str(tmp_path)) is not None
+
+    # Um leitor de outra versão recusa o arquivo em vez de interpretá-lo errado
+    monkeypatch.setattr(snapshot, "FORMAT_VERSION", snapshot.FORMAT_VERSION + 1)
+    assert snapshot.load_snapshot(folder=str(tmp_path)) is None
+
+    monkeypatch.undo()
+    with open(path, "r+b") as f:
+        f.write(struct.pack("<8s", b"OUTRACOI"))
+    assert snapshot.load_snapshot(folder=str(tmp_path)) is None
+
+
+def test_published_state_is_columnar(tmp_path, refreshed, capsys):
+    state = refreshed.export_state()
+    snapshot.save_snapshot(state, folder=str(tmp_path))
+    assert "fora do formato" not in capsys.readouterr().out
+
+    loaded = snapshot.load_snapshot(folder=str(tmp_path))
+    for name in snapshot._TABLES:
+        assert snapshot._plain(loaded[name]) == snapshot._plain(state[name]), name
+
+
+def test_load_player_names(tmp_path):
+    assert snapshot.load_player_names(folder=str(tmp_path)) == {}
+
+    state = _state()
+    state["scoresaber_data"].append({"id": "3", "profilePicture": None, "pos": 2, "name": "C", "pp": "1.00pp"})
+    state["bsbr_data"][0]["name"] = "A (BR)"
+    snapshot.save_snapshot(state, folder=str(tmp_path))
+    assert snapshot.load_player_names(folder=str(tmp_path)) == {"1": "A (BR)", "2": "B", "3": "C"}
+
+    # Ranking gravado como JSON (formato inesperado) também é lido
+    state["bsbr_data"][0]["pos"] = "1"
+    snapshot.save_snapshot(dict(state, generation=8), folder=str(tmp_path))
+    assert snapshot.load_player_names(folder=str(tmp_path)) == {"1": "A (BR)", "2": "B", "3": "C"}
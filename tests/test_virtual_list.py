@@ -0,0 +1,54 @@
+import flet as ft
+
+from app.components.virtual_list import RecycledRow, VirtualList
+
+
+class TextRow(RecycledRow):
+    def build(self):
+        self.text = ft.Text("")
+        return ft.Container(content=self.text)
+
+    def bind(self, item):
+        self.set(self.text, "value", item)
+
+
+class FakePage:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, *controls):
+        self.updates.append(controls)
+
+
+def _items(prefix="item"):
+    return [f"{prefix} {i}" for i in range(25)]
+
+
+def test_refresh_changed_outside_page():
+    items = _items()
+    list_view = VirtualList(TextRow, lambda: items, page_size=10)
+    items[0] = "novo"
+
+    # Ainda não adicionada à página (ex: aba não exibida): só faz o rebind
+    assert list_view.page is None
+    list_view.refresh_changed()
+    assert list_view.rows[0].text.value == "novo"
+
+
+def test_source_swap_keeps_page_and_sends_changed_rows(monkeypatch):
+    fake = FakePage()
+    monkeypatch.setattr(VirtualList, "page", property(lambda self: fake))
+    list_view = VirtualList(TextRow, _items(), page_size=10)
+    list_view.current_page = 2
+    list_view.bind_page()
+
+    # Novo resultado da busca com a sessão aberta: mesma página, só as linhas que mudaram
+    results = _items()
+    results[12] = "mudou"
+    list_view.source = results
+    list_view.refresh_changed()
+
+    assert list_view.current_page == 2
+    changed_rows = [c for c in fake.updates[-1] if c in [row.control for row in list_view.rows]]
+    assert changed_rows == [list_view.rows[2].control]
+    assert list_view.rows[2].text.value == "mudou"
@@ -0,0 +1,11 @@
+import sys
+from app.data.database import init_db
+from app.data.data_manager import DataManager
+
+# Processo de atualização separado do servidor web.
+# Uso: python worker.py [intervalo_em_segundos]
+# O servidor deve rodar com BSBR_REFRESH_MODE=worker para apenas ler o snapshot.
+if __name__ == "__main__":
+    interval = int(sys.argv[1]) if len(sys.argv) > 1 else 1800
+    init_db()
+    DataManager.run_worker(interval_seconds=interval)